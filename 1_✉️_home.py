@@ -1,6 +1,11 @@
+# Medição da inicialização (ligada pela variável PERFIL_INICIALIZACAO), iniciada antes das demais importações
+from analise.importacao import MedicaoPagina
+startup = MedicaoPagina('home')
+
 import streamlit as st
 import os
-from PIL import Image
+
+startup.marcar('importacoes')
 
 # --- Configurações da Página ---
 # A configuração da página deve ser a primeira chamada do Streamlit
@@ -137,4 +142,6 @@ for item in ESCOLARIDADE:
     escolaridade_markdown += f"**Período:** {item['Periodo']}<br>"
     escolaridade_markdown += f"**Descrição:** {item['Descricao']}<br>"
 
-st.markdown(f'<div class="card"><p>{escolaridade_markdown}</p></div>', unsafe_allow_html=True)
\ No newline at end of file
+st.markdown(f'<div class="card"><p>{escolaridade_markdown}</p></div>', unsafe_allow_html=True)
+
+startup.marcar('primeira_pintura')
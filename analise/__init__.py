@@ -0,0 +1,6 @@
+"""
+Camada de dados e de cálculo usada pelas páginas de análise do Streamlit.
+
+Os módulos deste pacote não desenham nada na tela: eles carregam, organizam e
+processam os dados das partidas para que as páginas apenas exibam os resultados.
+"""
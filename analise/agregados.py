@@ -0,0 +1,39 @@
+"""
+Métricas por jogador e seleção dos maiores valores.
+
+As métricas são somadas por jogador pelo motor SQL (`analise.consultas`), que
+agrega direto dos arquivos colunares; aqui ficam a definição de cada métrica
+e a seleção parcial usada para ordenar os resultados.
+"""
+import numpy as np
+
+# Métricas somadas por jogador e as colunas de origem de cada uma
+METRICAS_JOGADOR = {
+    'gols': ['statistics_goals'],
+    'assistencias': ['statistics_goal_assist'],
+    'finalizacoes': [
+        'statistics_on_target_scoring_attempt',
+        'statistics_shot_off_target',
+        'statistics_blocked_scoring_attempt',
+    ],
+    'xg': ['statistics_expected_goals'],
+    'xa': ['statistics_expected_assists'],
+    'minutos': ['statistics_minutes_played'],
+}
+
+
+def maiores(tabela, coluna, n):
+    """
+    As `n` linhas com os maiores valores de `coluna`, em ordem decrescente.
+    Usa seleção parcial (`argpartition`), que não ordena a tabela inteira.
+    """
+    valores = np.nan_to_num(tabela[coluna].to_numpy(dtype=np.float64), nan=-np.inf)
+    n = min(n, len(valores))
+    if n <= 0:
+        return tabela.iloc[:0]
+    if n < len(valores):
+        escolhidas = np.argpartition(-valores, n - 1)[:n]
+    else:
+        escolhidas = np.arange(len(valores))
+    escolhidas = escolhidas[np.argsort(-valores[escolhidas], kind='stable')]
+    return tabela.iloc[escolhidas]
@@ -0,0 +1,353 @@
+"""
+Armazenamento colunar (Parquet) do arquivo de partidas.
+
+O CSV é lido uma única vez, recebe um esquema explícito (categorias, inteiros
+pequenos anuláveis e float32) e é gravado em Parquet ao lado do arquivo
+original. Nas cargas seguintes o Parquet é usado enquanto for mais novo que o CSV.
+
+Linhas acrescentadas ao final do CSV são lidas sozinhas e gravadas em partes
+ao lado do Parquet principal, sem reescrevê-lo. Cada parte tem no nome o
+trecho do CSV (em bytes) que ela cobre, `<nome>.parte-<início>-<fim>.parquet`:
+quem anexa as mesmas linhas grava o mesmo arquivo, e a leitura só aceita a
+sequência de partes que continua exatamente de onde o Parquet principal parou.
+"""
+import glob
+import io
+import json
+import multiprocessing
+import os
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from analise.colunas import ColunasSobDemanda
+
+# Colunas de texto com poucos valores distintos, guardadas como categorias
+COLUNAS_CATEGORICAS = ['tournament', 'home_or_away', 'stadium', 'player_name', 'player_position']
+
+# Colunas com casas decimais; as demais estatísticas são contagens inteiras
+# enquanto os valores delas forem inteiros que cabem em Int16
+COLUNAS_FLOAT32 = ['statistics_rating', 'statistics_expected_goals', 'statistics_expected_assists']
+
+# Colunas de identificação numérica (ano, rodada, placar, camisa)
+COLUNAS_INTEIRAS = ['ano', 'jogo', 'home_score', 'away_score', 'player_number']
+
+COLUNAS_BOOLEANAS = ['player_sub', 'player_captain']
+
+# Chave usada nos metadados do Parquet para guardar as medidas da leitura do CSV
+_CHAVE_METADADOS = b'ituano_carga_csv'
+# Chave com o número de bytes do CSV que o Parquet principal contém
+_CHAVE_BYTES = b'ituano_bytes_csv'
+
+# Trecho do CSV (bytes de início e fim) no nome de uma parte
+_PADRAO_PARTE = re.compile(r'\.parte-(\d+)-(\d+)\.parquet$')
+
+
+def _cabe_em_int16(valores):
+    """
+    Indica se todos os valores preenchidos são inteiros dentro da faixa de Int16.
+    """
+    valores = valores.dropna().to_numpy(dtype='float64')
+    limites = np.iinfo(np.int16)
+    return bool(np.all((valores == np.round(valores)) & (valores >= limites.min) & (valores <= limites.max)))
+
+
+def esquema_da_coluna(coluna, valores=None):
+    """
+    Retorna o tipo pandas definido para uma coluna do arquivo de partidas.
+    Colunas fora do esquema são mantidas como texto.
+
+    Com os `valores`, uma coluna inteira só fica como Int16 se eles couberem:
+    uma estatística nova com casas decimais ou fora da faixa vira float32, e
+    uma que não seja numérica continua como texto.
+    """
+    if coluna in COLUNAS_CATEGORICAS:
+        return 'category'
+    if coluna in COLUNAS_FLOAT32:
+        return 'float32'
+    if coluna in COLUNAS_INTEIRAS or coluna.startswith('statistics_'):
+        if valores is None:
+            return 'Int16'
+        if not pd.api.types.is_numeric_dtype(valores) or pd.api.types.is_bool_dtype(valores):
+            return 'str'
+        return 'Int16' if _cabe_em_int16(valores) else 'float32'
+    if coluna in COLUNAS_BOOLEANAS:
+        return 'boolean'
+    return 'str'
+
+
+def normalizar_colunas(df):
+    """
+    Aplica o pré-processamento de nomes e valores que a página sempre fez
+    (nomes em minúsculas, nomes de jogadores sem espaços, `player_sub` booleano).
+    """
+    df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_')
+
+    if 'player_name' in df.columns:
+        df['player_name'] = df['player_name'].astype(str).str.strip()
+
+    if 'player_sub' in df.columns:
+        df['player_sub'] = df['player_sub'].fillna(False).astype(bool)
+
+    # Renomeia colunas se necessário para unificar
+    rename_map = {
+        'statistics_total_passes': 'statistics_total_passes',
+        'statistics_total_shots': 'statistics_total_shots',
+        'statistics_accurate_passes': 'statistics_accurate_passes',
+        'statistics_goals': 'statistics_goals'
+    }
+
+    for expected, fallback in rename_map.items():
+        if fallback not in df.columns:
+            # Se a coluna com o nome original não existir, tenta encontrar com um nome alternativo
+            if f"_{fallback}" in df.columns:
+                df.rename(columns={f"_{fallback}": expected}, inplace=True)
+
+    return df
+
+
+def aplicar_esquema(df, tipos=None):
+    """
+    Converte cada coluna para o tipo definido em `esquema_da_coluna` a partir
+    dos valores dela, ou para o tipo dado em `tipos` (por nome da coluna).
+    """
+    tipos = tipos or {}
+    return df.astype({
+        coluna: tipos.get(coluna) or esquema_da_coluna(coluna, df[coluna]) for coluna in df.columns
+    })
+
+
+def tipos_do_esquema(esquema):
+    """
+    Tipos pandas que reproduzem as colunas numéricas de um esquema Arrow já
+    gravado (Int16 ou float32), para que linhas anexadas sigam o arquivo principal.
+    """
+    return {
+        campo.name: 'Int16' if pa.types.is_int16(campo.type) else 'float32'
+        for campo in esquema
+        if pa.types.is_int16(campo.type) or pa.types.is_float32(campo.type)
+    }
+
+
+def memoria_mb(df):
+    """
+    Memória ocupada pelo DataFrame em megabytes, contando o conteúdo dos textos.
+    """
+    return float(df.memory_usage(deep=True).sum()) / 1024 ** 2
+
+
+def caminho_parquet(caminho_csv):
+    """
+    Caminho do arquivo colunar correspondente a um CSV (mesma pasta, extensão .parquet).
+    """
+    return os.path.splitext(caminho_csv)[0] + '.parquet'
+
+
+def _todas_as_partes(caminho_csv):
+    """
+    Todos os arquivos de parte gravados ao lado do Parquet, válidos ou não.
+    """
+    return glob.glob(glob.escape(os.path.splitext(caminho_csv)[0]) + '.parte-*.parquet')
+
+
+def bytes_cobertos(caminho):
+    """
+    Número de bytes do CSV gravados no Parquet principal, ou None se o arquivo
+    não o registra (Parquet de uma versão anterior).
+    """
+    metadados = pq.read_schema(caminho).metadata or {}
+    return int(metadados[_CHAVE_BYTES]) if _CHAVE_BYTES in metadados else None
+
+
+def _sequencia_partes(caminho_csv):
+    """
+    Partes que continuam o Parquet principal sem lacunas nem sobreposições,
+    em ordem, e o número de bytes do CSV cobertos ao final delas. Partes fora
+    da sequência (de uma conversão anterior) são ignoradas.
+    """
+    cobertos = bytes_cobertos(caminho_parquet(caminho_csv))
+    trechos = {}
+    for parte in _todas_as_partes(caminho_csv):
+        encontrado = _PADRAO_PARTE.search(parte)
+        if encontrado:
+            trechos[int(encontrado.group(1))] = (int(encontrado.group(2)), parte)
+    partes = []
+    while cobertos in trechos:
+        cobertos, parte = trechos[cobertos]
+        partes.append(parte)
+    return partes, cobertos
+
+
+def caminhos_partes(caminho_csv):
+    """
+    Partes com linhas anexadas ao Parquet principal, na ordem do CSV.
+    """
+    return _sequencia_partes(caminho_csv)[0]
+
+
+def arquivos_parquet(caminho_csv):
+    """
+    Todos os arquivos colunares de um CSV: o Parquet principal seguido das partes.
+    """
+    return [caminho_parquet(caminho_csv)] + caminhos_partes(caminho_csv)
+
+
+def parquet_atualizado(caminho_csv):
+    """
+    Indica se o Parquet existe, é mais novo que o CSV de origem e, com as
+    partes anexadas, cobre o CSV inteiro. Quando há partes, vale a data da
+    parte mais recente.
+    """
+    destino = caminho_parquet(caminho_csv)
+    if not os.path.exists(destino) or bytes_cobertos(destino) is None:
+        return False
+    partes, cobertos = _sequencia_partes(caminho_csv)
+    gravado = max(os.path.getmtime(arquivo) for arquivo in [destino] + partes)
+    return cobertos == os.path.getsize(caminho_csv) and gravado >= os.path.getmtime(caminho_csv)
+
+
+def converter_para_parquet(caminho_csv):
+    """
+    Lê o CSV, aplica o esquema e grava o Parquet correspondente.
+    O tempo e a memória da leitura do CSV ficam salvos nos metadados do arquivo
+    para que o relatório de carga possa compará-los com a leitura colunar.
+    Retorna o DataFrame já convertido e as medidas do CSV.
+    """
+    inicio = time.perf_counter()
+    with open(caminho_csv, 'rb') as arquivo:
+        conteudo = arquivo.read()
+    df = normalizar_colunas(pd.read_csv(io.BytesIO(conteudo)))
+    medidas_csv = {
+        'tempo_s': time.perf_counter() - inicio,
+        'memoria_mb': memoria_mb(df),
+    }
+
+    df = aplicar_esquema(df)
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+    metadados = dict(tabela.schema.metadata or {})
+    metadados[_CHAVE_METADADOS] = json.dumps(medidas_csv).encode()
+    metadados[_CHAVE_BYTES] = str(len(conteudo)).encode()
+    tabela = tabela.replace_schema_metadata(metadados)
+
+    # Grava em um arquivo temporário e troca de uma vez, para que outro processo
+    # nunca leia um Parquet pela metade
+    destino = caminho_parquet(caminho_csv)
+    temporario = f'{destino}.{os.getpid()}.tmp'
+    pq.write_table(tabela, temporario, compression='zstd')
+    os.replace(temporario, destino)
+
+    # O Parquet novo já contém todas as linhas: as partes antigas deixam de valer
+    for parte in _todas_as_partes(caminho_csv):
+        try:
+            os.remove(parte)
+        except FileNotFoundError:
+            # Outro processo já a removeu
+            pass
+
+    return df, medidas_csv
+
+
+def ler_linhas_anexadas(caminho_csv, inicio, fim, esquema=None):
+    """
+    Lê apenas as linhas do CSV entre os bytes `inicio` e `fim`, usando o
+    cabeçalho do início do arquivo, com o mesmo pré-processamento e esquema da
+    leitura completa. Com o `esquema` Arrow do Parquet principal, as colunas
+    numéricas recebem os tipos dele. Retorna None se o trecho não começa e
+    termina em limites de linha, ou se os valores não cabem nesses tipos.
+    """
+    with open(caminho_csv, 'rb') as arquivo:
+        cabecalho = arquivo.readline()
+        arquivo.seek(inicio - 1)
+        if arquivo.read(1) != b'\n':
+            return None
+        novas = arquivo.read(fim - inicio)
+    if len(novas) != fim - inicio or not novas.endswith(b'\n'):
+        return None
+
+    df = normalizar_colunas(pd.read_csv(io.BytesIO(cabecalho + novas)))
+    try:
+        return aplicar_esquema(df, tipos_do_esquema(esquema) if esquema is not None else None)
+    except (TypeError, ValueError):
+        # Por exemplo, casas decimais em uma coluna gravada como Int16:
+        # só a conversão completa escolhe o tipo de novo
+        return None
+
+
+def gravar_parte(caminho_csv, df, esquema, inicio, fim):
+    """
+    Grava as linhas anexadas dos bytes `inicio` a `fim` do CSV como uma parte
+    do Parquet, com o mesmo esquema Arrow do arquivo principal. Se a parte
+    desse trecho já existe (gravada por outra fonte ou outro processo), ela é
+    reaproveitada. Retorna o caminho da parte.
+    Levanta `pa.ArrowInvalid` se as linhas não couberem no esquema.
+    """
+    tabela = pa.Table.from_pandas(df, preserve_index=False).cast(esquema)
+    destino = os.path.splitext(caminho_csv)[0] + f'.parte-{inicio:012d}-{fim:012d}.parquet'
+    if os.path.exists(destino):
+        return destino
+    # O nome temporário é único por thread: duas fontes do mesmo processo
+    # podem gravar a mesma parte ao mesmo tempo
+    temporario = f'{destino}.{os.getpid()}.{threading.get_ident()}.tmp'
+    pq.write_table(tabela, temporario, compression='zstd')
+    os.replace(temporario, destino)
+    return destino
+
+
+def medidas_csv_salvas(caminho):
+    """
+    Lê dos metadados do Parquet as medidas registradas na conversão do CSV.
+    """
+    metadados = pq.read_schema(caminho).metadata or {}
+    if _CHAVE_METADADOS not in metadados:
+        return {}
+    return json.loads(metadados[_CHAVE_METADADOS])
+
+
+def _converter(caminho_csv):
+    """
+    Converte um CSV em um processo separado e devolve só as medidas da leitura,
+    sem enviar o DataFrame de volta.
+    """
+    return converter_para_parquet(caminho_csv)[1]
+
+
+def abrir_dados(caminhos_csv):
+    """
+    Garante que o Parquet de cada CSV está atualizado e os abre juntos para
+    leitura sob demanda, sem carregar nenhuma coluna. Aceita um caminho ou
+    uma lista (por exemplo, as partições de um conjunto de dados); CSVs
+    desatualizados são convertidos em paralelo, um por processo.
+
+    Retorna as colunas sob demanda e um relatório com a origem, o tempo de
+    abertura e as medidas da leitura dos CSVs. A memória é consultada depois,
+    em `ColunasSobDemanda.memoria_mb`, pois cresce conforme as colunas são usadas.
+    """
+    caminhos_csv = [caminhos_csv] if isinstance(caminhos_csv, str) else list(caminhos_csv)
+    inicio = time.perf_counter()
+    desatualizados = [caminho for caminho in caminhos_csv if not parquet_atualizado(caminho)]
+    processos = min(len(desatualizados), os.cpu_count() or 1)
+    if processos > 1:
+        contexto = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=processos, mp_context=contexto) as executor:
+            list(executor.map(_converter, desatualizados))
+    else:
+        for caminho in desatualizados:
+            _converter(caminho)
+
+    medidas_csv = [medidas_csv_salvas(caminho_parquet(caminho)) for caminho in caminhos_csv]
+    completas = all('tempo_s' in medidas for medidas in medidas_csv)
+    colunas = ColunasSobDemanda([arquivo for caminho in caminhos_csv for arquivo in arquivos_parquet(caminho)])
+    relatorio = {
+        'origem': 'csv' if desatualizados else 'parquet',
+        'tempo_s': time.perf_counter() - inicio,
+        'tempo_csv_s': sum(medidas['tempo_s'] for medidas in medidas_csv) if completas else None,
+        'memoria_csv_mb': sum(medidas['memoria_mb'] for medidas in medidas_csv) if completas else None,
+        'arquivos_csv': len(caminhos_csv),
+    }
+    return colunas, relatorio
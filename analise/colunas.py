@@ -0,0 +1,252 @@
+"""
+Acesso preguiçoso às colunas do arquivo colunar de partidas.
+
+Cada coluna só é lida do Parquet na primeira vez em que alguém pede por ela e
+fica guardada em memória a partir daí. Uma execução da página que usa três
+colunas nunca materializa as outras. Os dados podem estar divididos em vários
+arquivos (partições e linhas anexadas depois), lidos como uma só tabela; uma
+coluna ausente em algum deles aparece como vazia nas linhas dele.
+
+Colunas numéricas quase vazias (como as estatísticas só de goleiros ou de
+pênaltis) ficam em memória em forma esparsa, guardando apenas os valores
+preenchidos e suas posições. `matriz` e `frame` devolvem os valores densos,
+então quem as usa não precisa saber a forma guardada.
+"""
+import copy
+import json
+import threading
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pyarrow.types as pat
+from pandas.api.types import union_categoricals
+
+
+# Tipo das colunas esparsas: só os valores preenchidos (float32) e suas posições
+TIPO_ESPARSO = pd.SparseDtype('float32', np.nan)
+
+# Uma coluna fica esparsa quando ocupa no máximo esta fração da memória densa
+FRACAO_MAXIMA_ESPARSA = 0.5
+
+
+def compactar(serie):
+    """
+    Forma esparsa de uma coluna numérica, quando ela ocupa no máximo
+    `FRACAO_MAXIMA_ESPARSA` da memória da coluna densa; senão, a própria coluna.
+    """
+    if not (pd.api.types.is_integer_dtype(serie.dtype) or pd.api.types.is_float_dtype(serie.dtype)):
+        return serie
+    esparsa = serie.astype(TIPO_ESPARSO)
+    if esparsa.memory_usage(deep=True) <= FRACAO_MAXIMA_ESPARSA * serie.memory_usage(deep=True):
+        return esparsa
+    return serie
+
+
+def _bytes_por_linha(tipo):
+    """
+    Bytes por linha de uma coluna densa do tipo informado (inteiros anuláveis
+    guardam um byte extra de máscara).
+    """
+    if hasattr(tipo, 'numpy_dtype'):
+        return tipo.numpy_dtype.itemsize + 1
+    return np.dtype(tipo).itemsize
+
+
+def _concatenar(anterior, novas, n_novas):
+    """
+    Junta duas Series do mesmo tipo, unindo as categorias quando categóricas.
+    `novas` None representa `n_novas` valores ausentes.
+    """
+    if novas is None:
+        novas = pd.Series(pd.NA, index=range(n_novas), dtype=anterior.dtype)
+    if isinstance(anterior.dtype, pd.CategoricalDtype):
+        return pd.Series(union_categoricals([anterior, novas.astype('category')]), name=anterior.name)
+    return pd.concat([anterior, novas.astype(anterior.dtype)], ignore_index=True)
+
+
+def _metadados_pandas(esquemas):
+    """
+    Junta os metadados pandas dos arquivos (um registro por coluna), para que
+    o tipo pandas de cada coluna seja restaurado mesmo quando ela falta no
+    primeiro arquivo.
+    """
+    juntos = None
+    for esquema in esquemas:
+        bruto = (esquema.metadata or {}).get(b'pandas')
+        if bruto is None:
+            continue
+        metadados = json.loads(bruto)
+        if juntos is None:
+            juntos = metadados
+            continue
+        vistas = {registro['name'] for registro in juntos['columns']}
+        juntos['columns'] += [registro for registro in metadados['columns'] if registro['name'] not in vistas]
+    return None if juntos is None else {b'pandas': json.dumps(juntos).encode()}
+
+
+class ColunasSobDemanda:
+    """
+    Coleção de colunas de um ou mais arquivos Parquet (partições e partes
+    anexadas, em ordem) carregadas sob demanda. O esquema e o número de linhas vêm dos metadados,
+    sem ler os dados.
+    """
+
+    def __init__(self, caminhos):
+        self.caminhos = [caminhos] if isinstance(caminhos, str) else list(caminhos)
+        # Os arquivos ficam mapeados desde a abertura: se um novo Parquet substituir
+        # estes caminhos, as leituras seguintes continuam vendo a mesma versão
+        self._arquivos = [pq.ParquetFile(pa.memory_map(caminho)) for caminho in self.caminhos]
+        # Esquema unificado: colunas de todos os arquivos, com os tipos promovidos
+        esquemas = [arquivo.schema_arrow for arquivo in self._arquivos]
+        esquema = pa.unify_schemas(esquemas, promote_options='permissive')
+        self._metadados = _metadados_pandas(esquemas)
+        self.esquema = esquema
+        self.colunas = [nome for nome in esquema.names if not nome.startswith('__index_level_')]
+        self.n_linhas = sum(arquivo.metadata.num_rows for arquivo in self._arquivos)
+        self._numericas = [
+            campo.name for campo in esquema
+            if campo.name in self.colunas and (pat.is_integer(campo.type) or pat.is_floating(campo.type))
+        ]
+        self._cache = {}
+        # Tipo original das colunas guardadas em forma esparsa
+        self._tipos_densos = {}
+        self._trava = threading.Lock()
+
+    def __contains__(self, nome):
+        return nome in self.colunas
+
+    def __len__(self):
+        return self.n_linhas
+
+    def colunas_numericas(self):
+        """
+        Nomes das colunas numéricas, obtidos apenas pelo esquema do arquivo.
+        """
+        return list(self._numericas)
+
+    def colunas_carregadas(self):
+        """
+        Nomes das colunas que já estão em memória.
+        """
+        return list(self._cache)
+
+    def _carregar(self, nomes):
+        faltantes = [nome for nome in dict.fromkeys(nomes) if nome not in self._cache]
+        if not faltantes:
+            return
+        with self._trava:
+            faltantes = [nome for nome in faltantes if nome not in self._cache]
+            if faltantes:
+                # Uma única leitura para todas as colunas que ainda não estão em memória
+                lidas = self._ler(faltantes)
+                for nome in faltantes:
+                    original = lidas[nome]
+                    serie = compactar(original)
+                    if isinstance(serie.dtype, pd.SparseDtype):
+                        self._tipos_densos[nome] = original.dtype
+                    self._cache[nome] = serie
+
+    def _ler(self, nomes):
+        tabelas = []
+        for arquivo in self._arquivos:
+            presentes = [nome for nome in nomes if nome in arquivo.schema_arrow.names]
+            tabela = arquivo.read(columns=presentes)
+            # Colunas que o arquivo não tem entram como nulas, no tipo unificado
+            for nome in nomes:
+                if nome not in presentes:
+                    campo = self.esquema.field(nome)
+                    tabela = tabela.append_column(campo, pa.nulls(len(tabela), campo.type))
+            tabelas.append(tabela.select(nomes))
+        tabela = pa.concat_tables(tabelas, promote_options='permissive')
+        return tabela.replace_schema_metadata(self._metadados).to_pandas()
+
+    def anexadas(self, caminho, linhas):
+        """
+        Nova coleção com as `linhas` (já gravadas na parte `caminho`) ao final.
+        As colunas já em memória recebem só as linhas novas, sem reler o arquivo;
+        a coleção atual não muda.
+        """
+        novas = copy.copy(self)
+        novas.caminhos = self.caminhos + [caminho]
+        novas._arquivos = self._arquivos + [pq.ParquetFile(pa.memory_map(caminho))]
+        novas._metadados = _metadados_pandas([arquivo.schema_arrow for arquivo in novas._arquivos])
+        novas.n_linhas = self.n_linhas + len(linhas)
+        novas._trava = threading.Lock()
+        with self._trava:
+            carregadas = dict(self._cache)
+            novas._tipos_densos = dict(self._tipos_densos)
+        novas._cache = {
+            nome: _concatenar(serie, linhas[nome] if nome in linhas else None, len(linhas))
+            for nome, serie in carregadas.items()
+        }
+        return novas
+
+    def coluna(self, nome):
+        """
+        Retorna uma coluna como Series, lendo-a do arquivo se for a primeira vez.
+        Colunas quase vazias vêm na forma esparsa (`TIPO_ESPARSO`).
+        """
+        self._carregar([nome])
+        return self._cache[nome]
+
+    def _densa(self, nome, posicoes=None):
+        serie = self._cache[nome]
+        if posicoes is not None:
+            serie = serie.take(posicoes)
+        if nome in self._tipos_densos:
+            serie = serie.sparse.to_dense().astype(self._tipos_densos[nome])
+        return serie
+
+    def esparsas(self):
+        """
+        Nomes das colunas em memória guardadas na forma esparsa.
+        """
+        return list(self._tipos_densos)
+
+    def frame(self, nomes, posicoes=None):
+        """
+        Monta um DataFrame apenas com as colunas pedidas, na ordem pedida e com
+        seus tipos originais, opcionalmente restrito às posições de linha informadas.
+        """
+        nomes = list(nomes)
+        self._carregar(nomes)
+        return pd.DataFrame({nome: self._densa(nome, posicoes) for nome in nomes})
+
+    def ler_sem_guardar(self, nomes):
+        """
+        Lê colunas direto do arquivo sem mantê-las em memória, para cálculos
+        feitos uma única vez (como cubos de contagem).
+        """
+        return self._ler(list(nomes))
+
+    def matriz(self, nomes, posicoes=None):
+        """
+        Matriz float64 (linhas x colunas pedidas) com NaN no lugar dos ausentes,
+        opcionalmente restrita às posições de linha informadas.
+        """
+        nomes = list(nomes)
+        self._carregar(nomes)
+        n_linhas = self.n_linhas if posicoes is None else len(posicoes)
+        valores = np.empty((n_linhas, len(nomes)), dtype=np.float64)
+        for j, nome in enumerate(nomes):
+            coluna = self._cache[nome].to_numpy(dtype=np.float64, na_value=np.nan)
+            valores[:, j] = coluna if posicoes is None else coluna[posicoes]
+        return valores
+
+    def memoria_mb(self):
+        """
+        Memória ocupada pelas colunas já carregadas, em megabytes.
+        """
+        return sum(float(serie.memory_usage(deep=True)) for serie in list(self._cache.values())) / 1024 ** 2
+
+    def memoria_densa_mb(self):
+        """
+        Memória que as colunas já carregadas ocupariam sem a forma esparsa, em megabytes.
+        """
+        total = 0.0
+        for nome, serie in list(self._cache.items()):
+            tipo = self._tipos_densos.get(nome)
+            total += float(serie.memory_usage(deep=True)) if tipo is None else len(serie) * _bytes_por_linha(tipo)
+        return total / 1024 ** 2
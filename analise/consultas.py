@@ -0,0 +1,153 @@
+"""
+Motor de consultas SQL embutido (DuckDB) sobre os arquivos colunares.
+
+A tabela `partidas` é uma visão sobre os Parquet de uma versão dos dados, lidos
+direto do disco: filtros e agregações rodam vetorizados dentro do motor, que
+lê só as colunas usadas e descarta grupos de linhas pelos filtros (predicate
+pushdown). Não há servidor nem rede: o motor roda no processo e só enxerga os
+arquivos de dados.
+"""
+import os
+import threading
+
+from analise.agregados import METRICAS_JOGADOR
+from analise.importacao import modulo_tardio
+from analise.indice import TODOS
+
+duckdb = modulo_tardio('duckdb')
+
+TABELA = 'partidas'
+
+# Máximo de linhas devolvidas por uma consulta livre
+LIMITE_LINHAS = 10_000
+
+
+def _texto_sql(valor):
+    """
+    Literal de texto SQL, com as aspas simples escapadas.
+    """
+    return "'" + str(valor).replace("'", "''") + "'"
+
+
+class MotorConsultas:
+    """
+    Conexão DuckDB em memória com a visão `partidas` sobre os arquivos informados.
+
+    Depois de criada a visão, o acesso a arquivos fica restrito aos próprios
+    arquivos de dados e a configuração é travada, então consultas livres não
+    leem nem gravam nenhum outro arquivo. Cada consulta usa um cursor
+    próprio, o que permite usar o motor de várias threads.
+
+    A conexão (e a importação do DuckDB) só acontece na primeira consulta,
+    então criar o motor durante a carga dos dados não custa nada.
+    """
+
+    def __init__(self, caminhos):
+        self.caminhos = [os.path.abspath(caminho) for caminho in caminhos]
+        self._trava = threading.Lock()
+        self._conexao = None
+        self._colunas = None
+
+    def _conectar(self):
+        """
+        Abre a conexão e cria a visão na primeira chamada; depois só a devolve.
+        """
+        with self._trava:
+            if self._conexao is None:
+                conexao = duckdb.connect()
+                arquivos = ', '.join(_texto_sql(caminho) for caminho in self.caminhos)
+                conexao.execute(
+                    f'CREATE VIEW {TABELA} AS SELECT * FROM read_parquet([{arquivos}], union_by_name = true)'
+                )
+                # Só os próprios arquivos da visão: as pastas deles podem conter o código e os segredos do app
+                conexao.execute(f'SET allowed_paths = [{arquivos}]')
+                conexao.execute('SET enable_external_access = false')
+                conexao.execute('SET lock_configuration = true')
+                self._colunas = [linha[0] for linha in conexao.execute(f'DESCRIBE {TABELA}').fetchall()]
+                self._conexao = conexao
+            return self._conexao
+
+    @property
+    def colunas(self):
+        """
+        Colunas da tabela `partidas`.
+        """
+        self._conectar()
+        return self._colunas
+
+    def consultar(self, sql, parametros=None):
+        """
+        Executa uma consulta (com parâmetros `?`) e devolve um DataFrame.
+        """
+        cursor = self._conectar().cursor()
+        try:
+            return cursor.execute(sql, parametros or []).df()
+        finally:
+            cursor.close()
+
+    def consulta_livre(self, sql, limite=LIMITE_LINHAS):
+        """
+        Consulta digitada por um analista. Aceita uma única instrução de leitura
+        (SELECT, inclusive com WITH) e devolve no máximo `limite` linhas.
+        Retorna o DataFrame e se o resultado foi cortado pelo limite.
+        Levanta `ValueError` para qualquer outro tipo de instrução.
+        """
+        instrucoes = duckdb.extract_statements(sql)
+        if len(instrucoes) != 1 or instrucoes[0].type != duckdb.StatementType.SELECT:
+            raise ValueError('Escreva uma única consulta de leitura (SELECT).')
+        cursor = self._conectar().cursor()
+        try:
+            resultado = cursor.sql(sql).limit(limite + 1).df()
+        finally:
+            cursor.close()
+        return resultado.iloc[:limite], len(resultado) > limite
+
+
+def filtro_sql(dimensoes, chave):
+    """
+    Cláusula WHERE e parâmetros para uma chave de filtros (na ordem de
+    `dimensoes`, com `TODOS` como coringa). Sem filtros, a cláusula é vazia.
+    """
+    condicoes, parametros = [], []
+    for dimensao, valor in zip(dimensoes, chave):
+        if valor != TODOS:
+            condicoes.append(f'"{dimensao}" = ?')
+            parametros.append(valor)
+    clausula = 'WHERE ' + ' AND '.join(condicoes) if condicoes else ''
+    return clausula, parametros
+
+
+def _expressao_metrica(origem):
+    """
+    Soma por linha das colunas de origem de uma métrica: nula só quando todas
+    são nulas, como `sum(min_count=1)` do pandas.
+    """
+    if not origem:
+        return 'NULL'
+    if len(origem) == 1:
+        return f'"{origem[0]}"'
+    todas_nulas = ' AND '.join(f'"{coluna}" IS NULL' for coluna in origem)
+    soma = ' + '.join(f'COALESCE("{coluna}", 0)' for coluna in origem)
+    return f'CASE WHEN {todas_nulas} THEN NULL ELSE {soma} END'
+
+
+def totais_por_jogador(motor, dimensoes, chave):
+    """
+    Métricas de `METRICAS_JOGADOR` somadas por jogador e o número de jogos de
+    cada um, para uma chave de filtros, agregadas dentro do motor.
+    Retorna um DataFrame indexado por jogador, em ordem alfabética.
+    """
+    clausula, parametros = filtro_sql(dimensoes, chave)
+    metricas = [
+        f'CAST(COALESCE(SUM({_expressao_metrica([c for c in origem if c in motor.colunas])}), 0) AS DOUBLE) AS {nome}'
+        for nome, origem in METRICAS_JOGADOR.items()
+    ]
+    condicao = f'{clausula} AND player_name IS NOT NULL' if clausula else 'WHERE player_name IS NOT NULL'
+    sql = f"""
+        SELECT player_name, {', '.join(metricas)}, CAST(COUNT(*) AS DOUBLE) AS jogos
+        FROM {TABELA}
+        {condicao}
+        GROUP BY player_name
+        ORDER BY player_name
+    """
+    return motor.consultar(sql, parametros).set_index('player_name')
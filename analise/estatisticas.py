@@ -0,0 +1,376 @@
+"""
+Motor de estatísticas descritivas.
+
+Calcula, de uma só vez e de forma vetorizada, as medidas de todas as colunas
+numéricas de uma matriz (linhas = jogos de jogadores, colunas = variáveis),
+com valores ausentes representados por NaN.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+from analise.importacao import modulo_tardio
+
+stats = modulo_tardio('scipy.stats')
+
+QUANTIS_PADRAO = (0.25, 0.5, 0.75)
+
+
+def _quantis_ordenados(ordenados, contagem, q):
+    """
+    Quantil `q` de cada coluna já ordenada (NaN ao final), com interpolação
+    linear, o mesmo método padrão do pandas e do NumPy. NaN em todas as
+    colunas quando não há linhas.
+    """
+    if ordenados.shape[0] == 0:
+        return np.full(ordenados.shape[1], np.nan)
+    colunas = np.arange(ordenados.shape[1])
+    posicao = q * np.maximum(contagem - 1, 0)
+    abaixo = np.floor(posicao).astype(np.intp)
+    acima = np.ceil(posicao).astype(np.intp)
+    fracao = posicao - abaixo
+    valor = ordenados[abaixo, colunas] + (ordenados[acima, colunas] - ordenados[abaixo, colunas]) * fracao
+    return np.where(contagem > 0, valor, np.nan)
+
+
+def _moda_ordenada(ordenados, contagem):
+    """
+    Moda de cada coluna já ordenada, calculada pelo comprimento das sequências
+    de valores repetidos. Em caso de empate retorna o menor valor, como
+    `Series.mode()[0]`, e indica se a moda é única.
+    """
+    n_linhas, n_colunas = ordenados.shape
+    if n_linhas == 0:
+        return np.full(n_colunas, np.nan), np.zeros(n_colunas, dtype=bool)
+
+    linhas = np.arange(n_linhas)[:, None]
+    validos = linhas < contagem[None, :]
+
+    # Marca o início de cada sequência de valores iguais
+    inicio = np.ones(ordenados.shape, dtype=bool)
+    inicio[1:] = ordenados[1:] != ordenados[:-1]
+    posicao_inicio = np.maximum.accumulate(np.where(inicio, linhas, 0), axis=0)
+
+    # Comprimento acumulado da sequência em cada linha; o máximo é a moda
+    comprimento = np.where(validos, linhas - posicao_inicio + 1, 0)
+    maior = comprimento.max(axis=0)
+    linha_moda = comprimento.argmax(axis=0)
+
+    moda = np.where(contagem > 0, ordenados[linha_moda, np.arange(n_colunas)], np.nan)
+    unica = (comprimento == maior[None, :]).sum(axis=0) == 1
+    return moda, unica & (contagem > 0)
+
+
+def _momentos(valores):
+    """
+    Contagem, média e variância amostral (ddof=1) de cada coluna de uma
+    matriz com NaN, ignorando os ausentes. Variância é NaN com menos de 2 valores.
+    """
+    ausentes = np.isnan(valores)
+    contagem = (~ausentes).sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        media = np.where(ausentes, 0.0, valores).sum(axis=0) / contagem
+        desvios = np.where(ausentes, 0.0, valores - media)
+        variancia = (desvios ** 2).sum(axis=0) / (contagem - 1)
+    return contagem, media, np.where(contagem > 1, variancia, np.nan)
+
+
+def combinar_momentos(primeiro, segundo):
+    """
+    Momentos (contagem, média, variância amostral) da união de dois conjuntos
+    disjuntos de linhas, a partir dos momentos de cada um (fórmula de Chan),
+    sem rever os valores.
+    """
+    contagem_1, media_1, variancia_1 = primeiro
+    contagem_2, media_2, variancia_2 = segundo
+    contagem = contagem_1 + contagem_2
+    with np.errstate(invalid='ignore', divide='ignore'):
+        delta = np.where(contagem_2 > 0, media_2, 0.0) - np.where(contagem_1 > 0, media_1, 0.0)
+        media = np.where(contagem_1 > 0, media_1, 0.0) + delta * contagem_2 / contagem
+        quadrados = (
+            np.where(contagem_1 > 1, variancia_1 * (contagem_1 - 1), 0.0)
+            + np.where(contagem_2 > 1, variancia_2 * (contagem_2 - 1), 0.0)
+            + delta ** 2 * contagem_1 * contagem_2 / contagem
+        )
+        variancia = quadrados / (contagem - 1)
+    media = np.where(contagem > 0, media, np.nan)
+    return contagem, media, np.where(contagem > 1, variancia, np.nan)
+
+
+class MomentosPorFiltro:
+    """
+    Momentos (contagem, média e variância) das colunas numéricas memorizados
+    por chave de filtros. Quando linhas são anexadas, cada chave memorizada é
+    atualizada só com os momentos das linhas novas.
+    """
+
+    def __init__(self):
+        self._memo = {}
+        self._trava = threading.Lock()
+
+    def momentos(self, chave, valores):
+        """
+        Momentos da chave, calculados de `valores` (a matriz das linhas do
+        filtro) apenas na primeira vez.
+        """
+        chave = tuple(chave)
+        encontrado = self._memo.get(chave)
+        if encontrado is None:
+            with self._trava:
+                encontrado = self._memo.setdefault(chave, _momentos(np.asarray(valores, dtype=np.float64)))
+        return encontrado
+
+    def anexado(self, valores_novos):
+        """
+        Novos momentos depois de anexar linhas. `valores_novos(chave)` devolve
+        a matriz apenas das linhas novas que atendem a chave.
+        Os momentos atuais não mudam.
+        """
+        momentos = MomentosPorFiltro()
+        with self._trava:
+            memo = dict(self._memo)
+        momentos._memo = {
+            chave: combinar_momentos(anteriores, _momentos(valores_novos(chave)))
+            for chave, anteriores in memo.items()
+        }
+        return momentos
+
+
+def resumo_estatistico(valores, colunas, quantis=QUANTIS_PADRAO, momentos=None):
+    """
+    Resumo descritivo de todas as colunas de `valores` (matriz float com NaN).
+
+    Uma única ordenação por coluna fornece mínimo, máximo, quantis, mediana e
+    moda; somas fornecem média, desvio padrão e erro padrão. Os `momentos`
+    (contagem, média, variância) podem vir já calculados. Retorna um
+    DataFrame com uma linha por coluna (contagem zero e NaN nas demais
+    medidas quando `valores` não tem linhas).
+    """
+    valores = np.asarray(valores, dtype=np.float64)
+    contagem, media, variancia = _momentos(valores) if momentos is None else momentos
+    with np.errstate(invalid='ignore', divide='ignore'):
+        desvio_padrao = np.sqrt(variancia)
+        erro_padrao = desvio_padrao / np.sqrt(contagem)
+
+    ordenados = np.sort(valores, axis=0)
+    moda, moda_unica = _moda_ordenada(ordenados, contagem)
+
+    resumo = {
+        'contagem': contagem,
+        'media': media,
+        'mediana': _quantis_ordenados(ordenados, contagem, 0.5),
+        'moda': moda,
+        'moda_unica': moda_unica,
+        'desvio_padrao': desvio_padrao,
+        'erro_padrao': erro_padrao,
+        'minimo': _quantis_ordenados(ordenados, contagem, 0.0),
+        'maximo': _quantis_ordenados(ordenados, contagem, 1.0),
+    }
+    for q in quantis:
+        resumo[f'q{round(q * 100):02d}'] = _quantis_ordenados(ordenados, contagem, q)
+
+    return pd.DataFrame(resumo, index=pd.Index(list(colunas), name='coluna'))
+
+
+def teste_t_uma_amostra(media, erro_padrao, contagem, valor_hipotetico, alternativa='two-sided'):
+    """
+    Teste t de uma amostra calculado a partir do resumo (média, erro padrão e
+    contagem), com o mesmo resultado de `stats.ttest_1samp`. Aceita escalares
+    ou arrays, o que permite testar várias colunas de uma vez.
+    Retorna a estatística t e o valor-p.
+    """
+    with np.errstate(invalid='ignore', divide='ignore'):
+        t = (np.asarray(media) - valor_hipotetico) / np.asarray(erro_padrao)
+    return t, _valor_p_t(t, np.asarray(contagem) - 1, alternativa)
+
+
+def _valor_p_t(t, graus_liberdade, alternativa):
+    """
+    Valor-p da distribuição t para a alternativa pedida (escalares ou arrays).
+    """
+    if alternativa == 'two-sided':
+        return 2 * stats.t.sf(np.abs(t), graus_liberdade)
+    if alternativa == 'greater':
+        return stats.t.sf(t, graus_liberdade)
+    if alternativa == 'less':
+        return stats.t.cdf(t, graus_liberdade)
+    raise ValueError(f"Alternativa desconhecida: {alternativa}")
+
+
+def benjamini_hochberg(valores_p):
+    """
+    Valores-p ajustados pelo procedimento de Benjamini-Hochberg (controle da
+    taxa de falsas descobertas). Valores ausentes são ignorados e preservados.
+    """
+    valores_p = np.asarray(valores_p, dtype=np.float64)
+    ajustados = np.full(valores_p.shape, np.nan)
+    validos = np.flatnonzero(~np.isnan(valores_p))
+    if validos.size == 0:
+        return ajustados
+
+    ordem = validos[np.argsort(valores_p[validos])]
+    m = validos.size
+    escalonados = valores_p[ordem] * m / np.arange(1, m + 1)
+    # Mínimo acumulado do maior para o menor garante a monotonicidade
+    ajustados[ordem] = np.minimum(np.minimum.accumulate(escalonados[::-1])[::-1], 1.0)
+    return ajustados
+
+
+def testes_t_em_lote(valores, colunas, valores_hipoteticos, alternativa='two-sided'):
+    """
+    Teste t de uma amostra em todas as colunas de uma só vez, cada uma contra
+    o seu valor hipotético, com valores-p ajustados por Benjamini-Hochberg.
+    Retorna um DataFrame com uma linha por coluna.
+    """
+    contagem, media, variancia = _momentos(np.asarray(valores, dtype=np.float64))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        t = (media - valores_hipoteticos) / np.sqrt(variancia / contagem)
+    valor_p = _valor_p_t(t, contagem - 1, alternativa)
+
+    return pd.DataFrame({
+        'n': contagem,
+        'media': media,
+        'valor_hipotetico': valores_hipoteticos,
+        'estatistica_t': t,
+        'graus_liberdade': contagem - 1,
+        'valor_p': valor_p,
+        'valor_p_ajustado': benjamini_hochberg(valor_p),
+    }, index=pd.Index(list(colunas), name='coluna'))
+
+
+def testes_welch_em_lote(primeiro, segundo, colunas, alternativa='two-sided'):
+    """
+    Teste t de Welch (variâncias diferentes) entre dois grupos de linhas em
+    todas as colunas de uma só vez, com valores-p ajustados por
+    Benjamini-Hochberg. A diferença é a média do primeiro menos a do segundo.
+    """
+    n1, media1, variancia1 = _momentos(np.asarray(primeiro, dtype=np.float64))
+    n2, media2, variancia2 = _momentos(np.asarray(segundo, dtype=np.float64))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        parcela1 = variancia1 / n1
+        parcela2 = variancia2 / n2
+        t = (media1 - media2) / np.sqrt(parcela1 + parcela2)
+        graus_liberdade = (parcela1 + parcela2) ** 2 / (parcela1 ** 2 / (n1 - 1) + parcela2 ** 2 / (n2 - 1))
+    valor_p = _valor_p_t(t, graus_liberdade, alternativa)
+
+    return pd.DataFrame({
+        'n_primeiro': n1,
+        'n_segundo': n2,
+        'media_primeiro': media1,
+        'media_segundo': media2,
+        'estatistica_t': t,
+        'graus_liberdade': graus_liberdade,
+        'valor_p': valor_p,
+        'valor_p_ajustado': benjamini_hochberg(valor_p),
+    }, index=pd.Index(list(colunas), name='coluna'))
+
+
+METODOS_CORRELACAO = ('pearson', 'spearman')
+
+
+def correlacoes(valores, metodo='pearson', minimo_pares=3):
+    """
+    Matriz de correlação entre todas as colunas de `valores` (matriz com NaN),
+    usando em cada par apenas as linhas em que as duas colunas têm valor.
+
+    As somas de cada par (contagem, somas, somas dos quadrados e produtos
+    cruzados restritos às linhas completas do par) saem de um único produto
+    de matrizes sobre [valores, valores², máscara]. Para Spearman, as duas
+    colunas de cada par são trocadas pelos postos dentro das linhas do par,
+    como no pandas (ver `_spearman_por_padrao`).
+    Pares com menos de `minimo_pares` linhas ou sem variação ficam NaN.
+    Retorna a matriz de correlações e a de quantidade de linhas de cada par.
+    """
+    valores = np.asarray(valores, dtype=np.float64)
+    if metodo not in METODOS_CORRELACAO:
+        raise ValueError(f"Método de correlação desconhecido: {metodo}")
+
+    k = valores.shape[1]
+    presentes = ~np.isnan(valores)
+    zerados = np.where(presentes, valores, 0.0)
+    blocos = np.hstack([zerados, zerados ** 2, presentes.astype(np.float64)])
+    produtos = blocos.T @ blocos
+
+    pares = produtos[2 * k:, 2 * k:].round().astype(np.int64)
+    if metodo == 'spearman':
+        return _spearman_por_padrao(valores, presentes, pares, minimo_pares), pares
+
+    somas = produtos[:k, 2 * k:]            # soma de x_i nas linhas em que x_j existe
+    quadrados = produtos[k:2 * k, 2 * k:]   # soma de x_i² nas linhas em que x_j existe
+    return _pearson_das_somas(pares, somas, somas.T, quadrados, quadrados.T, produtos[:k, :k], minimo_pares), pares
+
+
+def _pearson_das_somas(pares, soma_x, soma_y, quadrados_x, quadrados_y, cruzados, minimo_pares):
+    """
+    Correlação de Pearson de cada par a partir das somas restritas às linhas
+    completas do par (x é a coluna da linha da matriz, y a da coluna).
+    """
+    with np.errstate(invalid='ignore', divide='ignore'):
+        covariancia = cruzados - soma_x * soma_y / pares
+        variancia_x = quadrados_x - soma_x ** 2 / pares
+        variancia_y = quadrados_y - soma_y ** 2 / pares
+        correlacao = covariancia / np.sqrt(variancia_x * variancia_y)
+    # Variâncias que só restam por arredondamento contam como colunas constantes
+    constante = ((variancia_x <= 1e-12 * np.maximum(quadrados_x, 1.0))
+                 | (variancia_y <= 1e-12 * np.maximum(quadrados_y, 1.0)))
+    return np.where((pares >= minimo_pares) & ~constante, np.clip(correlacao, -1.0, 1.0), np.nan)
+
+
+def _postos_sob_mascaras(coluna, mascaras):
+    """
+    Postos (empates com o posto médio) de `coluna`, sem valores ausentes,
+    entre as linhas de cada coluna de `mascaras`, todos de uma ordenação:
+    com a coluna ordenada, o posto dentro de uma máscara é a contagem
+    acumulada da máscara. Fora da máscara o posto é zero.
+    """
+    ordem = np.argsort(coluna, kind='stable')
+    ordenada = coluna[ordem]
+    marcadas = mascaras[ordem]
+    acumulado = np.cumsum(marcadas, axis=0)
+    # Grupos de valores empatados: linhas da primeira e da última ocorrência
+    inicio = np.r_[True, ordenada[1:] != ordenada[:-1]]
+    primeira = np.flatnonzero(inicio)
+    ultima = np.r_[primeira[1:] - 1, len(coluna) - 1]
+    # As linhas marcadas de um grupo ocupam os postos (antes + 1) até (fim)
+    medios = (acumulado[primeira] - marcadas[primeira] + 1 + acumulado[ultima]) / 2
+    postos = np.empty(mascaras.shape)
+    postos[ordem] = medios[np.cumsum(inicio) - 1]
+    return np.where(mascaras, postos, 0.0)
+
+
+def _spearman_por_padrao(valores, presentes, pares, minimo_pares):
+    """
+    Correlação de Spearman de cada par, como `DataFrame.corr('spearman')`:
+    as duas colunas são trocadas pelos seus postos (empates com o posto
+    médio) só entre as linhas em que ambas têm valor, e os postos são
+    correlacionados por Pearson.
+
+    Os postos são calculados por padrão de valores ausentes, nunca por par.
+    Para o padrão das linhas em que a coluna i tem valor, todas as colunas
+    j são ordenadas de uma vez dentro dessas linhas, e a coluna i recebe os
+    postos sob as máscaras de todas as colunas de uma só ordenação dela
+    (`_postos_sob_mascaras`). As somas de cada par saem de somas por coluna
+    e seguem para `_pearson_das_somas`. O custo é de uma ordenação de uma
+    matriz (linhas do padrão x colunas) por padrão distinto, no máximo um por
+    coluna, mais uma ordenação de cada coluna.
+    """
+    k = valores.shape[1]
+    soma_x, soma_y, quadrados_x, quadrados_y, cruzados = (np.zeros((k, k)) for _ in range(5))
+    padroes, grupo = np.unique(presentes.T, axis=0, return_inverse=True)
+    for indice, padrao in enumerate(padroes):
+        if not padrao.any():
+            continue
+        linhas, mascaras = valores[padrao], presentes[padrao]
+        # Postos de cada coluna j entre as linhas do padrão em que j tem valor
+        y = np.nan_to_num(stats.rankdata(linhas, axis=0, nan_policy='omit'))
+        quadrados = (y ** 2).sum(axis=0)
+        for i in np.flatnonzero(grupo.ravel() == indice):
+            # Postos da coluna i entre as mesmas linhas, para cada máscara j
+            x = _postos_sob_mascaras(linhas[:, i], mascaras)
+            soma_x[i], soma_y[i] = x.sum(axis=0), y.sum(axis=0)
+            quadrados_x[i], quadrados_y[i] = (x ** 2).sum(axis=0), quadrados
+            cruzados[i] = (x * y).sum(axis=0)
+    correlacao = _pearson_das_somas(pares, soma_x, soma_y, quadrados_x, quadrados_y, cruzados, minimo_pares)
+    # Os dois lados de um par usam os mesmos postos; a média só remove a diferença de arredondamento
+    return (correlacao + correlacao.T) / 2
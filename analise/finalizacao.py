@@ -0,0 +1,109 @@
+"""
+Eficiência de finalização: gols e assistências contra o esperado (xG e xA).
+
+As linhas de jogos são somadas por grupo (jogador ou partida) de uma só vez,
+a partir de uma matriz e dos códigos dos grupos. A significância de marcar
+mais (ou menos) que o esperado vem da distribuição de Poisson com média igual
+ao xG (ou xA) do grupo, calculada em forma fechada para todos os grupos juntos.
+Só entram as partidas em que o xG foi medido.
+"""
+import numpy as np
+import pandas as pd
+
+from analise.estatisticas import benjamini_hochberg
+from analise.importacao import modulo_tardio
+
+stats = modulo_tardio('scipy.stats')
+
+# Métricas somadas por grupo e as colunas de origem de cada uma
+METRICAS_FINALIZACAO = {
+    'gols': ['statistics_goals'],
+    'xg': ['statistics_expected_goals'],
+    'assistencias': ['statistics_goal_assist'],
+    'xa': ['statistics_expected_assists'],
+    'finalizacoes': [
+        'statistics_on_target_scoring_attempt',
+        'statistics_shot_off_target',
+        'statistics_blocked_scoring_attempt',
+    ],
+    'no_alvo': ['statistics_on_target_scoring_attempt'],
+    'grandes_chances_perdidas': ['statistics_big_chance_missed'],
+}
+
+
+def colunas_finalizacao(colunas_disponiveis):
+    """
+    Colunas de origem das métricas presentes nos dados. Lista vazia se faltar
+    gols ou xG, sem os quais não há o que comparar.
+    """
+    disponiveis = set(colunas_disponiveis)
+    if not {'statistics_goals', 'statistics_expected_goals'} <= disponiveis:
+        return []
+    return sorted({coluna for origem in METRICAS_FINALIZACAO.values() for coluna in origem if coluna in disponiveis})
+
+
+def somas_por_grupo(valores, codigos, n_grupos):
+    """
+    Soma das colunas de `valores` por grupo (ausentes contam como zero).
+    """
+    somas = np.zeros((n_grupos, valores.shape[1]))
+    np.add.at(somas, codigos, np.nan_to_num(valores))
+    return somas
+
+
+def linhas_cobertas(esperados, codigos_partida):
+    """
+    Linhas de partidas com pelo menos um valor de xG registrado. Nas demais
+    o xG não foi medido (e não é zero), então elas ficam fora da comparação.
+    """
+    codigos_partida = np.asarray(codigos_partida)
+    if codigos_partida.size == 0:
+        return np.zeros(0, dtype=bool)
+    cobertas = np.zeros(codigos_partida.max() + 1, dtype=bool)
+    cobertas[codigos_partida[~np.isnan(esperados)]] = True
+    return cobertas[codigos_partida]
+
+
+def valor_p_poisson(observados, esperados):
+    """
+    Valor-p bilateral de observar `observados` eventos quando a contagem é
+    Poisson com média `esperados`: o dobro da menor cauda, limitado a 1.
+    NaN onde não há valor esperado positivo.
+    """
+    observados = np.asarray(observados, dtype=np.float64)
+    esperados = np.asarray(esperados, dtype=np.float64)
+    positivos = esperados > 0
+    media = np.where(positivos, esperados, 1.0)
+    acima = stats.poisson.sf(observados - 1, media)
+    abaixo = stats.poisson.cdf(observados, media)
+    return np.where(positivos, np.minimum(1.0, 2 * np.minimum(acima, abaixo)), np.nan)
+
+
+def eficiencia(valores, colunas, codigos, grupos):
+    """
+    Gols menos xG, assistências menos xA, conversão das finalizações e
+    significância (Poisson, com ajuste de Benjamini-Hochberg) por grupo.
+
+    `valores` tem uma linha por jogo de jogador e as `colunas` informadas;
+    `codigos` diz o grupo de cada linha, e `grupos` nomeia os grupos.
+    Retorna um DataFrame com uma linha por grupo.
+    """
+    posicao = {coluna: j for j, coluna in enumerate(colunas)}
+    somas = somas_por_grupo(np.asarray(valores, dtype=np.float64), codigos, len(grupos))
+    metricas = {
+        nome: somas[:, [posicao[coluna] for coluna in origem if coluna in posicao]].sum(axis=1)
+        if any(coluna in posicao for coluna in origem) else np.full(len(grupos), np.nan)
+        for nome, origem in METRICAS_FINALIZACAO.items()
+    }
+
+    resultado = pd.DataFrame(metricas, index=grupos)
+    resultado['gols_menos_xg'] = resultado['gols'] - resultado['xg']
+    resultado['assistencias_menos_xa'] = resultado['assistencias'] - resultado['xa']
+    with np.errstate(invalid='ignore', divide='ignore'):
+        resultado['conversao'] = np.where(resultado['finalizacoes'] > 0, resultado['gols'] / resultado['finalizacoes'], np.nan)
+        resultado['conversao_no_alvo'] = np.where(resultado['no_alvo'] > 0, resultado['gols'] / resultado['no_alvo'], np.nan)
+    resultado['valor_p_gols'] = valor_p_poisson(resultado['gols'], resultado['xg'])
+    resultado['valor_p_gols_ajustado'] = benjamini_hochberg(resultado['valor_p_gols'])
+    resultado['valor_p_assistencias'] = valor_p_poisson(resultado['assistencias'], resultado['xa'])
+    resultado['valor_p_assistencias_ajustado'] = benjamini_hochberg(resultado['valor_p_assistencias'])
+    return resultado
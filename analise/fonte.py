@@ -0,0 +1,266 @@
+"""
+Fonte de dados com recarga automática.
+
+A fonte identifica cada CSV de partidas pela data de modificação, tamanho e hash
+do conteúdo. Uma thread em segundo plano verifica os arquivos periodicamente e,
+quando algum muda, prepara a nova versão por completo antes de trocá-la pela
+atual de uma só vez. Cada execução da página pega a versão vigente naquele
+momento e usa o identificador da versão nas chaves de cache.
+
+Quando o CSV só ganhou linhas no final (o conteúdo antigo é um prefixo do novo)
+e elas são de partidas posteriores à última carregada, apenas essas linhas são
+lidas e gravadas como uma parte do Parquet, e as estruturas derivadas
+registradas são atualizadas com elas em vez de reconstruídas.
+"""
+import hashlib
+import os
+import threading
+import time
+from typing import NamedTuple
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from analise.armazenamento import (
+    abrir_dados, arquivos_parquet, caminho_parquet, gravar_parte, ler_linhas_anexadas
+)
+
+# Intervalo entre verificações do arquivo, em segundos
+INTERVALO_VERIFICACAO = 5.0
+
+
+def identidade_arquivo(caminho):
+    """
+    Data de modificação (ns) e tamanho do arquivo: mudam sempre que ele é reescrito.
+    """
+    estado = os.stat(caminho)
+    return estado.st_mtime_ns, estado.st_size
+
+
+def hash_arquivo(caminho, tamanho_bloco=1024 * 1024):
+    """
+    Hash SHA-256 do conteúdo do arquivo, lido em blocos.
+    """
+    resumo = hashlib.sha256()
+    with open(caminho, 'rb') as arquivo:
+        for bloco in iter(lambda: arquivo.read(tamanho_bloco), b''):
+            resumo.update(bloco)
+    return resumo.hexdigest()
+
+
+def hash_com_prefixo(caminho, tamanho_prefixo, tamanho_bloco=1024 * 1024):
+    """
+    Hashes SHA-256 dos primeiros `tamanho_prefixo` bytes e do arquivo inteiro,
+    calculados em uma única leitura. Retorna a tupla (prefixo, total).
+    """
+    resumo = hashlib.sha256()
+    prefixo = None
+    lidos = 0
+    with open(caminho, 'rb') as arquivo:
+        for bloco in iter(lambda: arquivo.read(tamanho_bloco), b''):
+            if prefixo is None and lidos + len(bloco) >= tamanho_prefixo:
+                resumo.update(bloco[:tamanho_prefixo - lidos])
+                prefixo = resumo.hexdigest()
+                resumo.update(bloco[tamanho_prefixo - lidos:])
+            else:
+                resumo.update(bloco)
+            lidos += len(bloco)
+    return prefixo, resumo.hexdigest()
+
+
+def ultima_partida(ano, jogo):
+    """
+    Maior par (ano, jogo) presente, comparado primeiro pelo ano.
+    Retorna None se não houver nenhum par completo.
+    """
+    ano = ano.to_numpy(dtype='float64', na_value=float('nan'))
+    jogo = jogo.to_numpy(dtype='float64', na_value=float('nan'))
+    validos = (ano == ano) & (jogo == jogo)
+    if not validos.any():
+        return None
+    maior_ano = ano[validos].max()
+    return int(maior_ano), int(jogo[validos & (ano == maior_ano)].max())
+
+
+class VersaoDados(NamedTuple):
+    """
+    Uma versão publicada dos dados: identificador, colunas sob demanda,
+    relatório da carga e estruturas derivadas (por nome).
+    """
+    versao: str
+    colunas: object
+    relatorio: dict
+    derivados: dict
+
+
+def ultimas_partidas(caminho_csv):
+    """
+    Última partida (ano, jogo) de um CSV, lida só dessas duas colunas dos seus
+    arquivos colunares. Retorna None se o arquivo não tiver as duas colunas.
+    """
+    tabelas = []
+    for arquivo in arquivos_parquet(caminho_csv):
+        if not {'ano', 'jogo'} <= set(pq.read_schema(arquivo).names):
+            return None
+        tabelas.append(pq.read_table(arquivo, columns=['ano', 'jogo']))
+    tabela = pa.concat_tables(tabelas, promote_options='permissive').to_pandas()
+    return ultima_partida(tabela['ano'], tabela['jogo'])
+
+
+class FonteDados:
+    """
+    Mantém a versão atual dos dados de um ou mais CSVs (por exemplo, as
+    partições selecionadas de um conjunto de dados) e a substitui quando
+    algum deles muda.
+
+    `atual()` devolve uma `VersaoDados` lida de uma só vez, então quem a usa
+    nunca mistura dados de versões diferentes.
+
+    `derivados` mapeia um nome para o par de funções (construir, anexar):
+    `construir(colunas, prontos)` monta a estrutura a partir das colunas, e
+    `anexar(anterior, linhas_novas, colunas, prontos)` devolve a estrutura
+    atualizada com as linhas anexadas. `prontos` traz as estruturas já
+    montadas antes dela, na ordem do dicionário.
+    """
+
+    def __init__(self, caminhos_csv, derivados=None, intervalo=INTERVALO_VERIFICACAO, observar=True):
+        self.caminhos_csv = [caminhos_csv] if isinstance(caminhos_csv, str) else list(caminhos_csv)
+        self.derivados = dict(derivados or {})
+        self.intervalo = intervalo
+        self._trava = threading.Lock()
+        self._identidades = {caminho: identidade_arquivo(caminho) for caminho in self.caminhos_csv}
+        self._hashes = {caminho: hash_arquivo(caminho) for caminho in self.caminhos_csv}
+        self._atual = self._preparar(self._identidades, self._hashes)
+        self._parar = threading.Event()
+        self._observador = None
+        if observar:
+            self._observador = threading.Thread(target=self._observar, name='observador-dados', daemon=True)
+            self._observador.start()
+
+    def _publicar(self, identidades, hashes, colunas, relatorio, derivados):
+        modificado = max(identidade[0] for identidade in identidades.values())
+        tamanho = sum(identidade[1] for identidade in identidades.values())
+        if len(hashes) == 1:
+            conteudo = next(iter(hashes.values()))
+        else:
+            conteudo = hashlib.sha256(''.join(hashes[caminho] for caminho in self.caminhos_csv).encode()).hexdigest()
+        versao = f'{modificado}-{tamanho}-{conteudo[:12]}'
+        relatorio = dict(relatorio, versao=versao, carregado_em=time.time())
+        return VersaoDados(versao, colunas, relatorio, derivados)
+
+    def _preparar(self, identidades, hashes):
+        colunas, relatorio = abrir_dados(self.caminhos_csv)
+        derivados = {}
+        for nome, (construir, _) in self.derivados.items():
+            derivados[nome] = construir(colunas, derivados)
+        relatorio['ultimas_partidas'] = {caminho: ultimas_partidas(caminho) for caminho in self.caminhos_csv}
+        return self._publicar(identidades, hashes, colunas, relatorio, derivados)
+
+    def _linhas_anexadas(self, caminho, tamanho, ultima):
+        """
+        Linhas acrescentadas a um CSV desde a versão atual até `tamanho` bytes,
+        ou None se elas não forem todas de partidas posteriores à última
+        carregada dele.
+        """
+        esquema = pq.read_schema(caminho_parquet(caminho))
+        novas = ler_linhas_anexadas(caminho, self._identidades[caminho][1], tamanho, esquema)
+        if ultima is None or novas is None or novas.empty:
+            return None
+        if list(novas.columns) != esquema.names:
+            return None
+        ano, jogo = novas['ano'], novas['jogo']
+        posteriores = (ano > ultima[0]) | ((ano == ultima[0]) & (jogo > ultima[1]))
+        return novas if posteriores.fillna(False).all() else None
+
+    def _anexar(self, identidades, hashes, alterados):
+        """
+        Prepara a nova versão só com as linhas acrescentadas aos CSVs
+        `alterados`. Retorna None se alguma delas não for de partida posterior
+        à última carregada (ou não couber no esquema), caso em que os arquivos
+        devem ser lidos por inteiro.
+        """
+        inicio = time.perf_counter()
+        atual = self._atual
+        ultimas = dict(atual.relatorio['ultimas_partidas'])
+        anexos = {}
+        for caminho in alterados:
+            anexos[caminho] = self._linhas_anexadas(caminho, identidades[caminho][1], ultimas.get(caminho))
+            if anexos[caminho] is None:
+                return None
+
+        # Uma parte gravada vale mesmo se esta versão não for publicada: o nome
+        # dela é o trecho do CSV que contém, então a próxima tentativa (ou outra
+        # fonte sobre o mesmo arquivo) a reaproveita em vez de duplicar as linhas
+        colunas, derivados = atual.colunas, atual.derivados
+        for caminho, novas in anexos.items():
+            esquema = pq.read_schema(caminho_parquet(caminho))
+            try:
+                parte = gravar_parte(caminho, novas, esquema, self._identidades[caminho][1], identidades[caminho][1])
+            except pa.ArrowInvalid:
+                return None
+            colunas = colunas.anexadas(parte, novas)
+            anteriores, derivados = derivados, {}
+            for nome, (_, anexar) in self.derivados.items():
+                derivados[nome] = anexar(anteriores[nome], novas, colunas, derivados)
+            ultimas[caminho] = ultima_partida(novas['ano'], novas['jogo'])
+
+        relatorio = dict(
+            atual.relatorio,
+            origem='csv (linhas anexadas)',
+            tempo_s=time.perf_counter() - inicio,
+            linhas_anexadas=sum(len(novas) for novas in anexos.values()),
+            ultimas_partidas=ultimas,
+        )
+        return self._publicar(identidades, hashes, colunas, relatorio, derivados)
+
+    def atual(self):
+        """
+        Versão vigente (identificador, colunas sob demanda, relatório e derivados).
+        """
+        return self._atual
+
+    def verificar(self):
+        """
+        Verifica os arquivos e troca a versão se o conteúdo de algum mudou.
+        Um arquivo apenas tocado (mesmo hash) não gera recarga.
+        Retorna True quando uma nova versão foi publicada.
+        """
+        identidades = {caminho: identidade_arquivo(caminho) for caminho in self.caminhos_csv}
+        if identidades == self._identidades:
+            return False
+
+        with self._trava:
+            hashes, anexados = dict(self._hashes), True
+            for caminho, identidade in identidades.items():
+                if identidade != self._identidades[caminho]:
+                    prefixo, hashes[caminho] = hash_com_prefixo(caminho, self._identidades[caminho][1])
+                    if hashes[caminho] != self._hashes[caminho]:
+                        anexados &= identidade[1] > self._identidades[caminho][1] and prefixo == self._hashes[caminho]
+            alterados = [caminho for caminho in self.caminhos_csv if hashes[caminho] != self._hashes[caminho]]
+            if not alterados:
+                self._identidades = identidades
+                return False
+            # Se a preparação falhar (arquivo ainda sendo escrito), as identidades
+            # antigas são mantidas e a próxima verificação tenta de novo
+            nova = self._anexar(identidades, hashes, alterados) if anexados else None
+            if nova is None:
+                nova = self._preparar(identidades, hashes)
+            self._identidades, self._hashes = identidades, hashes
+            # A troca é uma única atribuição: as execuções em andamento continuam
+            # com a versão antiga, e as próximas já recebem a nova
+            self._atual = nova
+            return True
+
+    def _observar(self):
+        while not self._parar.wait(self.intervalo):
+            try:
+                self.verificar()
+            except Exception:
+                # O arquivo pode estar sendo reescrito; tenta de novo na próxima verificação
+                continue
+
+    def parar(self):
+        """
+        Encerra a thread de observação.
+        """
+        self._parar.set()
@@ -0,0 +1,169 @@
+"""
+Forma recente dos jogadores: médias móveis das últimas N partidas.
+
+As atuações (linhas com minutos jogados) são ordenadas uma única vez por
+jogador, ano e jogo, e cada jogador guarda as somas acumuladas das suas
+estatísticas. A média das últimas N partidas em qualquer ponto é a diferença
+de duas somas acumuladas dividida pela quantidade de valores, calculada para
+todas as partidas do jogador de uma vez. A série de um jogador não depende
+das linhas dos demais, então partidas novas só estendem as somas dos
+jogadores que atuaram nelas.
+"""
+import copy
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+# Estatísticas acompanhadas na forma recente
+COLUNAS_FORMA = ['statistics_rating', 'statistics_expected_goals', 'statistics_goals', 'statistics_total_pass']
+
+# Colunas em que um valor ausente numa atuação é apenas nenhum registro (zero);
+# nas demais (a nota), o ausente fica fora da média
+COLUNAS_SEM_CONTAGEM = ('statistics_rating',)
+
+JANELA_PADRAO = 5
+
+
+class SerieJogador(NamedTuple):
+    """
+    Atuações de um jogador em ordem de (ano, jogo) e as somas acumuladas de
+    cada estatística e da quantidade de valores, com uma linha inicial de zeros.
+    """
+    ano: np.ndarray
+    jogo: np.ndarray
+    somas: np.ndarray
+    contagens: np.ndarray
+
+
+def _preparar(valores, colunas):
+    """
+    Valores float com os ausentes das colunas de contagem trocados por zero.
+    """
+    valores = np.array(valores, dtype=np.float64)
+    contagem = np.array([coluna not in COLUNAS_SEM_CONTAGEM for coluna in colunas], dtype=bool)
+    valores[:, contagem] = np.nan_to_num(valores[:, contagem])
+    return valores
+
+
+def _acumular(valores, inicial_somas=None, inicial_contagens=None):
+    """
+    Somas acumuladas (com a linha inicial) dos valores e da quantidade de não ausentes.
+    """
+    largura = valores.shape[1]
+    inicial_somas = np.zeros(largura) if inicial_somas is None else inicial_somas
+    inicial_contagens = np.zeros(largura, dtype=np.int64) if inicial_contagens is None else inicial_contagens
+    somas = np.vstack([inicial_somas, inicial_somas + np.cumsum(np.nan_to_num(valores), axis=0)])
+    contagens = np.vstack([inicial_contagens, inicial_contagens + np.cumsum(~np.isnan(valores), axis=0)])
+    return somas, contagens
+
+
+def _series(jogadores, ano, jogo, valores, minutos, colunas):
+    """
+    Séries por jogador a partir das linhas de jogos: uma ordenação e uma soma
+    acumulada para todas as linhas, depois separadas por jogador.
+    """
+    jogadores = pd.Series(jogadores).to_numpy(dtype=object)
+    ano = pd.Series(ano).to_numpy(dtype=np.float64, na_value=np.nan)
+    jogo = pd.Series(jogo).to_numpy(dtype=np.float64, na_value=np.nan)
+    minutos = pd.Series(minutos).to_numpy(dtype=np.float64, na_value=np.nan)
+    atuou = (minutos > 0) & (ano == ano) & (jogo == jogo) & pd.notna(jogadores)
+
+    codigos, nomes = pd.factorize(jogadores[atuou])
+    ordem = np.lexsort((jogo[atuou], ano[atuou], codigos))
+    codigos = codigos[ordem]
+    ano, jogo = ano[atuou][ordem].astype(np.int64), jogo[atuou][ordem].astype(np.int64)
+    valores = _preparar(valores[atuou][ordem], colunas)
+    somas, contagens = _acumular(valores)
+
+    limites = np.concatenate([[0], np.cumsum(np.bincount(codigos, minlength=len(nomes)))])
+    return {
+        nome: SerieJogador(
+            ano[inicio:fim], jogo[inicio:fim],
+            somas[inicio:fim + 1] - somas[inicio], contagens[inicio:fim + 1] - contagens[inicio],
+        )
+        for nome, inicio, fim in zip(nomes, limites[:-1], limites[1:])
+    }
+
+
+class FormaJogadores:
+    """
+    Séries de atuações de todos os jogadores, para médias móveis das
+    últimas N partidas de qualquer um deles.
+    """
+
+    def __init__(self, jogadores, ano, jogo, valores, minutos, colunas=COLUNAS_FORMA):
+        self.colunas = list(colunas)
+        self._series = _series(jogadores, ano, jogo, valores, minutos, self.colunas)
+
+    def __contains__(self, jogador):
+        return jogador in self._series
+
+    def jogadores(self):
+        """
+        Jogadores com pelo menos uma atuação, em ordem alfabética.
+        """
+        return sorted(self._series)
+
+    def atuacoes(self, jogador):
+        """
+        Quantidade de atuações do jogador.
+        """
+        return len(self._series[jogador].ano)
+
+    def forma(self, jogador, janela=JANELA_PADRAO):
+        """
+        Média de cada estatística nas últimas `janela` atuações do jogador,
+        em cada uma das suas partidas (as primeiras usam as que houver).
+        Retorna um DataFrame indexado por (ano, jogo), em ordem cronológica.
+        Levanta `KeyError` se o jogador não tiver atuações.
+        """
+        serie = self._series[jogador]
+        fim = np.arange(1, len(serie.ano) + 1)
+        inicio = np.maximum(fim - janela, 0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            medias = (serie.somas[fim] - serie.somas[inicio]) / (serie.contagens[fim] - serie.contagens[inicio])
+        indice = pd.MultiIndex.from_arrays([serie.ano, serie.jogo], names=['ano', 'jogo'])
+        return pd.DataFrame(medias, index=indice, columns=self.colunas)
+
+    def anexado(self, jogadores, ano, jogo, valores, minutos):
+        """
+        Novas séries depois de linhas acrescentadas. Só os jogadores que
+        atuaram nelas mudam: quando as partidas novas são posteriores às que o
+        jogador já tinha, as somas acumuladas apenas continuam; senão, a
+        série dele é reordenada. As séries atuais não mudam.
+        """
+        forma = copy.copy(self)
+        forma._series = dict(self._series)
+        for jogador, nova in _series(jogadores, ano, jogo, valores, minutos, self.colunas).items():
+            anterior = self._series.get(jogador)
+            if anterior is None:
+                forma._series[jogador] = nova
+                continue
+            ultima = (anterior.ano[-1], anterior.jogo[-1])
+            if (nova.ano[0], nova.jogo[0]) > ultima:
+                somas = np.vstack([anterior.somas, anterior.somas[-1] + nova.somas[1:]])
+                contagens = np.vstack([anterior.contagens, anterior.contagens[-1] + nova.contagens[1:]])
+                forma._series[jogador] = SerieJogador(
+                    np.concatenate([anterior.ano, nova.ano]), np.concatenate([anterior.jogo, nova.jogo]),
+                    somas, contagens,
+                )
+            else:
+                forma._series[jogador] = _juntar_desordenadas(anterior, nova)
+        return forma
+
+
+def _juntar_desordenadas(anterior, nova):
+    """
+    Junta duas séries de um jogador cujas partidas se intercalam, refazendo
+    as somas acumuladas a partir dos valores de cada atuação.
+    """
+    ano = np.concatenate([anterior.ano, nova.ano])
+    jogo = np.concatenate([anterior.jogo, nova.jogo])
+    # Valores de cada atuação recuperados das diferenças das somas (ausentes onde a contagem não mudou)
+    valores = np.vstack([np.diff(anterior.somas, axis=0), np.diff(nova.somas, axis=0)])
+    preenchidos = np.vstack([np.diff(anterior.contagens, axis=0), np.diff(nova.contagens, axis=0)]) > 0
+    valores = np.where(preenchidos, valores, np.nan)
+    ordem = np.lexsort((jogo, ano))
+    somas, contagens = _acumular(valores[ordem])
+    return SerieJogador(ano[ordem], jogo[ordem], somas, contagens)
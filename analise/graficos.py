@@ -0,0 +1,46 @@
+"""
+Gráficos montados a partir de dados já agregados no servidor.
+
+Em vez de enviar cada valor bruto para o Plotly agrupar no navegador, as
+contagens por faixa são calculadas com NumPy e o gráfico recebe apenas uma
+barra por faixa. O tamanho da figura não depende do número de linhas.
+"""
+import numpy as np
+import plotly.graph_objects as go
+
+
+def histograma(valores, n_faixas=20):
+    """
+    Contagens e bordas das faixas de um histograma, ignorando valores ausentes.
+    Retorna arrays vazios quando não há valores.
+    """
+    valores = np.asarray(valores, dtype=np.float64)
+    valores = valores[~np.isnan(valores)]
+    if valores.size == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0)
+    contagens, bordas = np.histogram(valores, bins=n_faixas)
+    return contagens, bordas
+
+
+def figura_histograma(contagens, bordas, titulo, rotulo_x, template='plotly_dark'):
+    """
+    Figura de barras com uma barra por faixa já contada, visualmente igual a
+    um histograma. Aceita linhas verticais (`add_vline`) no eixo dos valores.
+    """
+    larguras = np.diff(bordas)
+    figura = go.Figure(go.Bar(
+        x=bordas[:-1],
+        y=contagens,
+        width=larguras,
+        offset=0,
+        customdata=np.column_stack([bordas[:-1], bordas[1:]]),
+        hovertemplate='%{customdata[0]:,.2f} a %{customdata[1]:,.2f}<br>Contagem: %{y}<extra></extra>',
+    ))
+    figura.update_layout(
+        title=titulo,
+        template=template,
+        bargap=0,
+        xaxis_title=rotulo_x,
+        yaxis_title='count',
+    )
+    return figura
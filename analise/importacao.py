@@ -0,0 +1,111 @@
+"""
+Importação tardia dos módulos pesados e medição da inicialização das páginas.
+
+`scipy.stats` e `plotly.express` levam mais tempo para importar do que o
+Streamlit leva para desenhar o cabeçalho e a barra lateral, e o `duckdb` só é
+usado pelas consultas SQL (os totais por jogador e o console). Com
+`modulo_tardio`, o módulo só é importado no primeiro acesso a um atributo
+dele, ou seja, quando uma seção que o usa é desenhada; até lá, o nome guarda
+apenas uma referência. O `plotly.graph_objects` fica de fora: o próprio
+`import streamlit` já o carrega.
+
+Com a variável de ambiente `PERFIL_INICIALIZACAO` apontando para um arquivo,
+as importações tardias e as etapas marcadas nas páginas (`MedicaoPagina`)
+são gravadas nele, um registro JSON por linha:
+
+    PERFIL_INICIALIZACAO=perfil.jsonl streamlit run 1_✉️_home.py
+
+Sem a variável, nada é medido nem gravado.
+"""
+import importlib
+import json
+import os
+import sys
+import threading
+import time
+
+# Variável de ambiente com o arquivo que recebe os registros da medição
+VARIAVEL_PERFIL = 'PERFIL_INICIALIZACAO'
+
+_trava = threading.Lock()
+# Páginas que já rodaram neste processo (a primeira execução é a partida a frio)
+_paginas_executadas = set()
+
+
+def perfil_ativo():
+    """
+    Indica se a medição da inicialização está ligada.
+    """
+    return bool(os.environ.get(VARIAVEL_PERFIL))
+
+
+def registrar(evento, **dados):
+    """
+    Grava um registro da medição (com o processo e o instante) no arquivo de
+    `PERFIL_INICIALIZACAO`. Não faz nada com a medição desligada.
+    """
+    destino = os.environ.get(VARIAVEL_PERFIL)
+    if not destino:
+        return
+    registro = {'evento': evento, 'pid': os.getpid(), 'instante': time.time(), **dados}
+    with _trava, open(destino, 'a', encoding='utf-8') as arquivo:
+        arquivo.write(json.dumps(registro, ensure_ascii=False) + '\n')
+
+
+class ModuloTardio:
+    """
+    Módulo importado só no primeiro acesso a um atributo. Depois disso, cada
+    acesso é repassado ao módulo já carregado.
+    """
+
+    def __init__(self, nome):
+        self._nome = nome
+        self._modulo = None
+
+    def _carregar(self):
+        if self._modulo is None:
+            carregado = self._nome in sys.modules
+            inicio = time.perf_counter()
+            modulo = importlib.import_module(self._nome)
+            if not carregado:
+                registrar('importacao', modulo=self._nome, tempo_s=time.perf_counter() - inicio)
+            self._modulo = modulo
+        return self._modulo
+
+    def __getattr__(self, atributo):
+        return getattr(self._carregar(), atributo)
+
+    def __repr__(self):
+        estado = 'carregado' if self._modulo is not None else 'não carregado'
+        return f'<módulo tardio {self._nome!r} ({estado})>'
+
+
+def modulo_tardio(nome):
+    """
+    Referência ao módulo `nome` que só o importa quando for usado, por exemplo
+    `stats = modulo_tardio('scipy.stats')` no lugar de `from scipy import stats`.
+    """
+    return ModuloTardio(nome)
+
+
+class MedicaoPagina:
+    """
+    Tempos de uma execução de página desde a sua criação (no topo do script,
+    antes das importações) até cada etapa marcada, como o fim das importações
+    e a primeira pintura (cabeçalho e barra lateral desenhados).
+    """
+
+    def __init__(self, pagina):
+        self.pagina = pagina
+        self.inicio = time.perf_counter()
+        with _trava:
+            self.primeira_execucao = pagina not in _paginas_executadas
+            _paginas_executadas.add(pagina)
+
+    def marcar(self, etapa):
+        """
+        Registra o tempo decorrido até `etapa` nesta execução.
+        """
+        if perfil_ativo():
+            registrar('etapa', pagina=self.pagina, etapa=etapa, tempo_s=time.perf_counter() - self.inicio,
+                      primeira_execucao=self.primeira_execucao)
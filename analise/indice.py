@@ -0,0 +1,134 @@
+"""
+Índice de filtros pré-calculado.
+
+Para cada dimensão de filtro (torneio, local do jogo, ano, posição) o índice
+guarda, por valor, as posições das linhas em ordem crescente. Os pares de
+torneio e local, incluindo o coringa 'Todos', são calculados na construção;
+as combinações com as demais dimensões são obtidas pela interseção das listas
+de posições e memorizadas, sem varrer a tabela inteira a cada filtro.
+"""
+import copy
+import itertools
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Valor que representa "sem filtro" em qualquer dimensão
+TODOS = 'Todos'
+
+DIMENSOES_FILTRO = ['tournament', 'home_or_away', 'ano', 'player_position']
+
+
+def _listas_de_posicoes(coluna):
+    """
+    Agrupa as posições das linhas por valor da coluna com uma única ordenação.
+    Valores ausentes não entram em nenhuma lista.
+    """
+    codigos, valores = pd.factorize(coluna, sort=True)
+    validos = np.flatnonzero(codigos >= 0)
+    ordem = validos[np.argsort(codigos[validos], kind='stable')]
+    contagens = np.bincount(codigos[validos], minlength=len(valores))
+    partes = np.split(ordem.astype(np.int32), np.cumsum(contagens)[:-1])
+    return {valor: parte for valor, parte in zip(valores.tolist(), partes)}
+
+
+def _juntar_listas(anteriores, novas, deslocamento):
+    """
+    Junta as listas de posições de linhas antigas e de linhas novas (cujas
+    posições começam em `deslocamento`), mantendo os valores em ordem crescente.
+    """
+    vazia = np.zeros(0, dtype=np.int32)
+    return {
+        valor: np.concatenate([anteriores.get(valor, vazia), novas.get(valor, vazia) + deslocamento])
+        for valor in sorted(set(anteriores) | set(novas))
+    }
+
+
+class IndiceFiltros:
+    """
+    Mapeia cada combinação de filtros para as posições das linhas que a atendem.
+    As chaves seguem a ordem de `dimensoes`, com `TODOS` como coringa.
+    """
+
+    def __init__(self, colunas, n_linhas, dimensoes=DIMENSOES_FILTRO):
+        self.n_linhas = n_linhas
+        self.dimensoes = [dim for dim in dimensoes if dim in colunas]
+        self._listas = {dim: _listas_de_posicoes(colunas[dim]) for dim in self.dimensoes}
+        self._todas = np.arange(n_linhas, dtype=np.int32)
+        self._memo = {}
+        self._trava = threading.Lock()
+
+        # Pré-calcula todas as combinações das duas primeiras dimensões
+        primeiras = self.dimensoes[:2]
+        opcoes = [[TODOS] + self.valores(dim) for dim in primeiras]
+        for combinacao in itertools.product(*opcoes):
+            chave = tuple(combinacao) + (TODOS,) * (len(self.dimensoes) - len(primeiras))
+            self._memo[chave] = self._calcular(chave)
+
+    def valores(self, dimensao):
+        """
+        Valores distintos de uma dimensão, em ordem crescente.
+        """
+        return list(self._listas.get(dimensao, {}))
+
+    def chave(self, **filtros):
+        """
+        Monta a chave do índice a partir de filtros nomeados pela dimensão.
+        Dimensões omitidas valem `TODOS`.
+        """
+        return tuple(filtros.get(dim, TODOS) for dim in self.dimensoes)
+
+    def _calcular(self, chave):
+        listas = [
+            self._listas[dim].get(valor, self._todas[:0])
+            for dim, valor in zip(self.dimensoes, chave) if valor != TODOS
+        ]
+        if not listas:
+            return self._todas
+        # Intersecta da menor lista para a maior, o que mantém cada passo barato
+        listas.sort(key=len)
+        posicoes = listas[0]
+        for lista in listas[1:]:
+            posicoes = np.intersect1d(posicoes, lista, assume_unique=True)
+        return posicoes
+
+    def posicoes(self, chave):
+        """
+        Posições (ordenadas) das linhas que atendem a chave de filtros.
+        """
+        chave = tuple(chave)
+        encontrado = self._memo.get(chave)
+        if encontrado is None:
+            with self._trava:
+                encontrado = self._memo.setdefault(chave, self._calcular(chave))
+        return encontrado
+
+    def anexado(self, colunas, n_novas):
+        """
+        Novo índice com `n_novas` linhas acrescentadas ao final. As posições das
+        linhas novas vêm de um índice pequeno montado só sobre elas e são
+        acrescentadas às listas e às combinações já memorizadas; as linhas
+        antigas não são percorridas de novo. O índice atual não muda.
+        """
+        novas = IndiceFiltros(colunas, n_novas, self.dimensoes)
+        indice = copy.copy(self)
+        indice.n_linhas = self.n_linhas + n_novas
+        indice._listas = {
+            dim: _juntar_listas(self._listas[dim], novas._listas[dim], self.n_linhas)
+            for dim in self.dimensoes
+        }
+        indice._todas = np.arange(indice.n_linhas, dtype=np.int32)
+        indice._trava = threading.Lock()
+
+        with self._trava:
+            memo = dict(self._memo)
+        chaves = list(memo) + [chave for chave in novas._memo if chave not in memo]
+        indice._memo = {
+            chave: np.concatenate([
+                memo[chave] if chave in memo else self._calcular(chave),
+                novas.posicoes(chave) + self.n_linhas,
+            ])
+            for chave in chaves
+        }
+        return indice
@@ -0,0 +1,44 @@
+"""
+Normalização das estatísticas por 90 minutos jogados.
+
+Somas e médias de contagens brutas favorecem quem joga mais: um reserva que
+entra no fim do jogo e um titular não ficam na mesma escala. Aqui as colunas
+de contagem viram taxas por 90 minutos em uma única operação de matriz: cada
+linha é multiplicada por 90 / minutos, e as linhas abaixo do mínimo de minutos
+(ou sem minutos) ficam ausentes, em vez de gerar taxas infladas.
+"""
+import numpy as np
+
+COLUNA_MINUTOS = 'statistics_minutes_played'
+
+MINUTOS_POR_JOGO = 90
+
+# Mínimo padrão de minutos para a taxa de uma linha (ou de um jogador) ser considerada
+MINUTOS_MINIMOS = 30
+
+# Colunas statistics_* que não são contagens e, portanto, não são normalizadas
+COLUNAS_SEM_NORMALIZAR = (COLUNA_MINUTOS, 'statistics_rating')
+
+
+def colunas_normalizaveis(colunas):
+    """
+    Máscara das colunas que viram taxas por 90 minutos: as `statistics_*`,
+    exceto os próprios minutos e a nota.
+    """
+    return np.array([
+        coluna.startswith('statistics_') and coluna not in COLUNAS_SEM_NORMALIZAR
+        for coluna in colunas
+    ], dtype=bool)
+
+
+def por_90(valores, minutos, normalizar, minutos_minimos=MINUTOS_MINIMOS):
+    """
+    Matriz com as colunas marcadas em `normalizar` convertidas em taxas por
+    90 minutos e as demais sem alteração. Nas colunas normalizadas, as linhas
+    com menos de `minutos_minimos` (ou sem minutos) ficam NaN.
+    """
+    valores = np.asarray(valores, dtype=np.float64)
+    minutos = np.asarray(minutos, dtype=np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        fator = np.where(minutos >= max(minutos_minimos, 1), MINUTOS_POR_JOGO / minutos, np.nan)
+    return np.where(normalizar, valores * fator[:, None], valores)
@@ -0,0 +1,86 @@
+"""
+Conjunto de dados particionado por clube, temporada e torneio.
+
+Os CSVs ficam em pastas no formato `chave=valor`, por exemplo
+`dados/time_alvo=Ituano/ano=2024/tournament=Paulista%20Série%20A1/partidas.csv`.
+As chaves de cada arquivo vêm apenas do caminho, então os filtros por essas
+dimensões descartam partições inteiras antes de qualquer leitura, e só os
+arquivos que restam são abertos.
+"""
+import os
+from typing import NamedTuple
+from urllib.parse import unquote
+
+from analise.indice import TODOS
+
+DIMENSOES_PARTICAO = ['time_alvo', 'ano', 'tournament']
+
+# Nome da pasta das linhas sem valor na chave de partição
+VALOR_AUSENTE = '__ausente__'
+
+
+class Particao(NamedTuple):
+    """
+    Um arquivo do conjunto e os valores das chaves de partição do seu caminho.
+    """
+    caminho: str
+    chaves: dict
+
+
+def _valor_da_pasta(texto):
+    """
+    Valor de uma chave a partir do nome da pasta (números inteiros voltam a ser int).
+    """
+    texto = unquote(texto)
+    if texto == VALOR_AUSENTE:
+        return None
+    return int(texto) if texto.lstrip('-').isdigit() else texto
+
+
+def descobrir_particoes(raiz):
+    """
+    Lista os CSVs abaixo de `raiz` com as chaves lidas das pastas `chave=valor`,
+    sem abrir nenhum arquivo. Retorna as partições ordenadas pelo caminho.
+    """
+    particoes = []
+    for pasta, _, arquivos in os.walk(raiz):
+        relativo = os.path.relpath(pasta, raiz)
+        chaves = {}
+        for parte in relativo.split(os.sep):
+            if '=' in parte:
+                chave, valor = parte.split('=', 1)
+                chaves[chave] = _valor_da_pasta(valor)
+        for arquivo in arquivos:
+            if arquivo.endswith('.csv'):
+                particoes.append(Particao(os.path.join(pasta, arquivo), chaves))
+    return sorted(particoes, key=lambda particao: particao.caminho)
+
+
+def dimensoes_particionadas(particoes):
+    """
+    Dimensões de `DIMENSOES_PARTICAO` presentes no caminho de todas as partições.
+    """
+    if not particoes:
+        return []
+    return [dim for dim in DIMENSOES_PARTICAO if all(dim in particao.chaves for particao in particoes)]
+
+
+def valores_particao(particoes, dimensao):
+    """
+    Valores distintos de uma chave de partição, em ordem crescente.
+    """
+    return sorted({particao.chaves[dimensao] for particao in particoes if particao.chaves.get(dimensao) is not None})
+
+
+def podar(particoes, **filtros):
+    """
+    Partições que atendem os filtros nomeados pela dimensão (`TODOS` é coringa).
+    Uma dimensão que não aparece no caminho de uma partição não a descarta.
+    """
+    return [
+        particao for particao in particoes
+        if all(
+            valor == TODOS or dimensao not in particao.chaves or particao.chaves[dimensao] == valor
+            for dimensao, valor in filtros.items()
+        )
+    ]
@@ -0,0 +1,146 @@
+"""
+Tabela de partidas reconstruída a partir das linhas de jogadores.
+
+O CSV repete os dados de cada partida (times, estádio, placar, técnicos) em
+todas as linhas dos jogadores dela. Aqui esses dados ficam uma única vez por
+partida, e cada linha de jogador guarda apenas o número inteiro da sua
+partida. As linhas de uma partida, os resultados e os totais do time por
+partida saem desse código, sem varrer e deduplicar as linhas de jogadores.
+"""
+import copy
+
+import numpy as np
+import pandas as pd
+
+# Colunas que identificam uma partida (o clube alvo só existe no conjunto com vários clubes)
+CHAVE_PARTIDA = ['time_alvo', 'ano', 'jogo']
+
+# Colunas repetidas em todas as linhas de uma partida
+COLUNAS_PARTIDA = CHAVE_PARTIDA + [
+    'tournament', 'home_or_away', 'home_team', 'away_team', 'stadium',
+    'home_score', 'away_score', 'home_manager', 'away_manager',
+]
+
+RESULTADOS = {1: 'Vitória', 0: 'Empate', -1: 'Derrota'}
+
+
+def colunas_partida(colunas_disponiveis):
+    """
+    Colunas de `COLUNAS_PARTIDA` presentes nos dados. Lista vazia se faltar
+    `ano` ou `jogo`, sem os quais não há como identificar as partidas.
+    """
+    disponiveis = set(colunas_disponiveis)
+    if not {'ano', 'jogo'} <= disponiveis:
+        return []
+    return [coluna for coluna in COLUNAS_PARTIDA if coluna in disponiveis]
+
+
+class TabelaPartidas:
+    """
+    Uma linha por partida, na ordem da chave, e o código da partida de cada
+    linha de jogador (`codigos`, int32).
+    """
+
+    def __init__(self, linhas):
+        self.chave = [coluna for coluna in CHAVE_PARTIDA if coluna in linhas.columns]
+        codigos = linhas.groupby(self.chave, sort=True, dropna=False, observed=True).ngroup()
+        self.codigos = codigos.to_numpy(dtype=np.int32)
+        _, primeiras = np.unique(self.codigos, return_index=True)
+        # Texto guardado uma vez por partida dispensa as categorias
+        self.partidas = linhas.iloc[primeiras].reset_index(drop=True).astype({
+            coluna: 'str' for coluna in linhas.columns if isinstance(linhas[coluna].dtype, pd.CategoricalDtype)
+        })
+        self.partidas.index.name = 'partida'
+        # Memória que os mesmos dados ocupam repetidos em cada linha de jogador
+        self.memoria_por_linha_mb = float(linhas.memory_usage(deep=True, index=False).sum()) / 1024 ** 2
+        self._ids = {chave: partida for partida, chave in enumerate(self._chaves(self.partidas))}
+        self._agrupar()
+
+    def _chaves(self, linhas):
+        return linhas[self.chave].itertuples(index=False, name=None)
+
+    def _agrupar(self):
+        """
+        Posições das linhas de jogadores agrupadas por partida.
+        """
+        self._ordem = np.argsort(self.codigos, kind='stable').astype(np.int32)
+        contagens = np.bincount(self.codigos, minlength=len(self.partidas))
+        self._limites = np.concatenate([[0], np.cumsum(contagens)])
+
+    def __len__(self):
+        return len(self.partidas)
+
+    def linhas(self, partida):
+        """
+        Posições das linhas de jogadores de uma partida, em ordem crescente.
+        """
+        return self._ordem[self._limites[partida]:self._limites[partida + 1]]
+
+    def partidas_das_linhas(self, posicoes):
+        """
+        Códigos das partidas que têm pelo menos uma das linhas informadas.
+        """
+        return np.unique(self.codigos[posicoes])
+
+    def totais(self, valores):
+        """
+        Soma por partida de cada coluna de `valores` (uma linha por jogador,
+        na ordem das linhas), ignorando ausentes. Partidas sem nenhum valor em
+        uma coluna ficam NaN nela.
+        """
+        valores = np.asarray(valores, dtype=np.float64)
+        somas = np.zeros((len(self.partidas), valores.shape[1]))
+        preenchidos = np.zeros((len(self.partidas), valores.shape[1]), dtype=np.int64)
+        np.add.at(somas, self.codigos, np.nan_to_num(valores))
+        np.add.at(preenchidos, self.codigos, ~np.isnan(valores))
+        return np.where(preenchidos > 0, somas, np.nan)
+
+    def memoria_mb(self):
+        """
+        Memória da tabela de partidas e dos códigos das linhas, em megabytes.
+        """
+        return (float(self.partidas.memory_usage(deep=True).sum()) + self.codigos.nbytes) / 1024 ** 2
+
+    def anexado(self, linhas_novas):
+        """
+        Nova tabela com linhas de jogadores acrescentadas ao final. Partidas
+        já conhecidas recebem as linhas novas; as demais entram no fim da
+        tabela. Só as linhas novas são percorridas; a tabela atual não muda.
+        """
+        tabela = copy.copy(self)
+        tabela._ids = dict(self._ids)
+        codigos = np.empty(len(linhas_novas), dtype=np.int32)
+        primeiras = []
+        for posicao, chave in enumerate(self._chaves(linhas_novas)):
+            if chave not in tabela._ids:
+                tabela._ids[chave] = len(self.partidas) + len(primeiras)
+                primeiras.append(posicao)
+            codigos[posicao] = tabela._ids[chave]
+
+        novas = linhas_novas.iloc[primeiras].reindex(columns=self.partidas.columns)
+        tabela.partidas = pd.concat(
+            [self.partidas, novas.astype(self.partidas.dtypes.to_dict())], ignore_index=True
+        )
+        tabela.partidas.index.name = 'partida'
+        tabela.codigos = np.concatenate([self.codigos, codigos])
+        tabela.memoria_por_linha_mb = self.memoria_por_linha_mb * len(tabela.codigos) / max(len(self.codigos), 1)
+        tabela._agrupar()
+        return tabela
+
+
+def resultados(partidas):
+    """
+    Placar e resultado do clube alvo em cada partida (pelo lado em que ele
+    jogou, `home_or_away`). Retorna um DataFrame com `placar` e `resultado`.
+    """
+    casa = partidas['home_score'].to_numpy(dtype=np.float64, na_value=np.nan)
+    fora = partidas['away_score'].to_numpy(dtype=np.float64, na_value=np.nan)
+    placar = [
+        f'{int(gols_casa)} x {int(gols_fora)}' if gols_casa == gols_casa and gols_fora == gols_fora else '-'
+        for gols_casa, gols_fora in zip(casa, fora)
+    ]
+    saldo = np.sign(casa - fora)
+    if 'home_or_away' in partidas:
+        saldo = np.where(partidas['home_or_away'].to_numpy(dtype=object) == 'away', -saldo, saldo)
+    resultado = [RESULTADOS.get(valor, '-') if valor == valor else '-' for valor in saldo]
+    return pd.DataFrame({'placar': placar, 'resultado': resultado}, index=partidas.index)
@@ -0,0 +1,136 @@
+"""
+Percentis e postos de cada jogador em cada estatística.
+
+As linhas de jogos do filtro são agregadas por jogador (totais ou taxas por
+90 minutos; a nota pela média) e cada coluna do agregado é ordenada uma única
+vez para dar os postos de todos os jogadores juntos, no grupo todo ou dentro
+de cada posição. Consultar um jogador ou montar o radar dele é só ler uma
+linha da matriz pronta.
+"""
+import numpy as np
+import pandas as pd
+
+from analise.importacao import modulo_tardio
+from analise.normalizacao import colunas_normalizaveis, por_90
+
+stats = modulo_tardio('scipy.stats')
+
+# Colunas agregadas pela média dos jogos em vez da soma
+COLUNAS_MEDIA = ('statistics_rating',)
+
+# Estatísticas em que um valor menor é melhor: o percentil delas é invertido,
+# para que um percentil alto seja sempre bom
+COLUNAS_MENOR_MELHOR = (
+    'statistics_possession_lost_ctrl', 'statistics_duel_lost', 'statistics_aerial_lost',
+    'statistics_challenge_lost', 'statistics_dispossessed', 'statistics_fouls',
+    'statistics_total_offside', 'statistics_big_chance_missed', 'statistics_penalty_conceded',
+    'statistics_error_lead_to_a_goal', 'statistics_error_lead_to_a_shot', 'statistics_penalty_miss',
+    'statistics_own_goals', 'statistics_penalty_shootout_miss',
+)
+
+
+def agregado_por_jogador(valores, colunas, jogadores, minutos, posicoes=None, minutos_minimos=0, por_90_minutos=False):
+    """
+    Uma linha por jogador com as `colunas` somadas (ou em média, para
+    `COLUNAS_MEDIA`) nos jogos de `valores`. Com `por_90_minutos`, as
+    contagens viram taxas por 90 minutos. Ficam só os jogadores com pelo menos
+    `minutos_minimos` no total e as colunas com algum valor entre eles.
+    Retorna o agregado e a posição mais frequente de cada jogador (ou None).
+    """
+    valores = np.asarray(valores, dtype=np.float64)
+    codigos, nomes = pd.factorize(pd.Series(jogadores), sort=True)
+    validos = codigos >= 0
+    codigos, valores = codigos[validos], valores[validos]
+    n_jogadores, n_colunas = len(nomes), len(colunas)
+
+    somas = np.zeros((n_jogadores, n_colunas))
+    preenchidos = np.zeros((n_jogadores, n_colunas), dtype=np.int64)
+    np.add.at(somas, codigos, np.nan_to_num(valores))
+    np.add.at(preenchidos, codigos, ~np.isnan(valores))
+    minutos_totais = np.bincount(codigos, weights=np.nan_to_num(np.asarray(minutos, dtype=np.float64)[validos]),
+                                 minlength=n_jogadores)
+
+    agregado = por_90(somas, minutos_totais, colunas_normalizaveis(colunas), 1) if por_90_minutos else somas
+    media = np.isin(colunas, COLUNAS_MEDIA)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        agregado[:, media] = somas[:, media] / preenchidos[:, media]
+
+    mantidos = minutos_totais >= minutos_minimos
+    com_dados = preenchidos[mantidos].sum(axis=0) > 0
+    resultado = pd.DataFrame(
+        agregado[mantidos][:, com_dados], columns=pd.Index(colunas)[com_dados],
+        index=pd.Index(np.asarray(nomes)[mantidos], name='player_name'),
+    )
+    if posicoes is None:
+        return resultado, None
+
+    # Posição mais frequente: contagem (jogador x posição) e o maior de cada linha
+    codigos_posicao, nomes_posicao = pd.factorize(pd.Series(posicoes).to_numpy(dtype=object)[validos])
+    com_posicao = codigos_posicao >= 0
+    contagem = np.zeros((n_jogadores, len(nomes_posicao) + 1), dtype=np.int64)
+    np.add.at(contagem, (codigos[com_posicao], codigos_posicao[com_posicao]), 1)
+    # A última coluna (sempre zero) é a de quem não tem posição em nenhum jogo
+    contagem[:, -1] = contagem.max(axis=1) == 0
+    principal = np.append(np.asarray(nomes_posicao, dtype=object), None)[contagem.argmax(axis=1)]
+    return resultado, pd.Series(principal[mantidos], index=resultado.index, name='player_position')
+
+
+def _postos(valores):
+    """
+    Postos (1 = maior valor) e percentis (0 a 100) de cada coluna, com os
+    empates pelo posto médio. Uma ordenação por coluna.
+    """
+    crescentes = stats.rankdata(valores, axis=0, nan_policy='omit')
+    contagem = (~np.isnan(valores)).sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        percentis = 100 * (crescentes - 0.5) / contagem
+    return contagem + 1 - crescentes, percentis, np.broadcast_to(contagem, valores.shape)
+
+
+class PercentisJogadores:
+    """
+    Valores agregados, percentis e postos de todos os jogadores em todas as
+    colunas, comparados com o grupo inteiro ou só com a mesma posição.
+    """
+
+    def __init__(self, agregado, posicoes=None):
+        self.valores = agregado
+        self.posicoes = posicoes
+        valores = agregado.to_numpy(dtype=np.float64)
+        postos = np.full(valores.shape, np.nan)
+        percentis = np.full(valores.shape, np.nan)
+        totais = np.zeros(valores.shape)
+        grupos = [np.ones(len(agregado), dtype=bool)] if posicoes is None else [
+            (posicoes == posicao).to_numpy() for posicao in posicoes.dropna().unique()
+        ]
+        for grupo in grupos:
+            postos[grupo], percentis[grupo], totais[grupo] = _postos(valores[grupo])
+
+        # Nas colunas em que menos é melhor, o percentil e o posto são invertidos
+        invertidas = np.isin(agregado.columns, COLUNAS_MENOR_MELHOR)
+        percentis[:, invertidas] = 100 - percentis[:, invertidas]
+        postos[:, invertidas] = totais[:, invertidas] + 1 - postos[:, invertidas]
+        self.percentis = pd.DataFrame(percentis, index=agregado.index, columns=agregado.columns)
+        self.postos = pd.DataFrame(postos, index=agregado.index, columns=agregado.columns)
+        self.totais = pd.DataFrame(totais, index=agregado.index, columns=agregado.columns)
+
+    def __contains__(self, jogador):
+        return jogador in self.valores.index
+
+    def jogadores(self):
+        """
+        Jogadores comparados, em ordem alfabética.
+        """
+        return list(self.valores.index)
+
+    def jogador(self, nome):
+        """
+        Valor, percentil e posto (entre quantos) do jogador em cada coluna.
+        Levanta `KeyError` se o jogador não estiver no grupo.
+        """
+        return pd.DataFrame({
+            'valor': self.valores.loc[nome],
+            'percentil': self.percentis.loc[nome],
+            'posto': self.postos.loc[nome],
+            'de': self.totais.loc[nome],
+        }).rename_axis('coluna')
@@ -0,0 +1,305 @@
+"""
+Métodos de reamostragem: bootstrap e testes de permutação para a média.
+
+As reamostras são sorteadas como matrizes (reamostras x n) e processadas em
+blocos, para que milhares delas sejam calculadas sem laço em Python e sem
+estourar a memória. Os testes de permutação distribuem os blocos entre
+processos, com sementes derivadas de uma semente única, e avançam sem
+bloquear quem os acompanha.
+"""
+import itertools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from analise.importacao import modulo_tardio
+
+stats = modulo_tardio('scipy.stats')
+
+# Quantidade máxima de índices sorteados por bloco (cerca de 16 MB em int64)
+ELEMENTOS_POR_BLOCO = 2_000_000
+
+METODOS_BOOTSTRAP = ('percentil', 'bca')
+
+# Permutações calculadas por tarefa enviada a um processo
+PERMUTACOES_POR_TAREFA = 2_000
+
+# Tarefas por rodada. É fixo, e não igual ao número de núcleos, para que o
+# resultado (inclusive a parada antecipada) seja o mesmo em qualquer máquina
+TAREFAS_POR_RODADA = 8
+
+# Até este tamanho de amostra o teste de sinais enumera todas as 2^n combinações
+N_MAXIMO_EXATO = 16
+
+
+def medias_bootstrap(valores, n_reamostras, semente=0, elementos_por_bloco=ELEMENTOS_POR_BLOCO):
+    """
+    Médias de `n_reamostras` reamostras com reposição de `valores`.
+    A semente fixa torna o resultado reprodutível (e, portanto, memorizável).
+    """
+    valores = np.asarray(valores, dtype=np.float64)
+    n = len(valores)
+    gerador = np.random.default_rng(semente)
+    medias = np.empty(n_reamostras)
+    linhas_por_bloco = max(1, elementos_por_bloco // max(n, 1))
+
+    for inicio in range(0, n_reamostras, linhas_por_bloco):
+        fim = min(inicio + linhas_por_bloco, n_reamostras)
+        indices = gerador.integers(0, n, size=(fim - inicio, n))
+        medias[inicio:fim] = valores[indices].mean(axis=1)
+    return medias
+
+
+def _aceleracao_jackknife(valores):
+    """
+    Aceleração do BCa pelo jackknife da média. As médias sem cada observação
+    têm forma fechada, (soma - x_i) / (n - 1), então não há laço.
+    """
+    n = len(valores)
+    medias_jackknife = (valores.sum() - valores) / (n - 1)
+    desvios = medias_jackknife.mean() - medias_jackknife
+    denominador = 6.0 * (desvios ** 2).sum() ** 1.5
+    if denominador == 0:
+        return 0.0
+    return (desvios ** 3).sum() / denominador
+
+
+def intervalo_bootstrap(valores, medias, confianca, metodo='percentil'):
+    """
+    Intervalo de confiança bootstrap da média a partir das médias reamostradas.
+    `metodo` é 'percentil' ou 'bca' (corrigido de viés e acelerado).
+    Retorna os limites inferior e superior.
+    """
+    alfa = 1.0 - confianca
+    probabilidades = np.array([alfa / 2, 1 - alfa / 2])
+
+    if metodo == 'bca':
+        valores = np.asarray(valores, dtype=np.float64)
+        estimativa = valores.mean()
+        proporcao_abaixo = (medias < estimativa).mean() + 0.5 * (medias == estimativa).mean()
+        vies = stats.norm.ppf(np.clip(proporcao_abaixo, 1e-10, 1 - 1e-10))
+        aceleracao = _aceleracao_jackknife(valores)
+        z = stats.norm.ppf(probabilidades)
+        probabilidades = stats.norm.cdf(vies + (vies + z) / (1 - aceleracao * (vies + z)))
+    elif metodo != 'percentil':
+        raise ValueError(f"Método de bootstrap desconhecido: {metodo}")
+
+    inferior, superior = np.quantile(medias, probabilidades)
+    return inferior, superior
+
+
+def criar_executor(n_processos=None):
+    """
+    Pool de processos para os testes de permutação. Usa o método 'spawn', que
+    é seguro mesmo quando o processo principal tem várias threads (como o Streamlit).
+    """
+    return ProcessPoolExecutor(
+        max_workers=n_processos or os.cpu_count(),
+        mp_context=multiprocessing.get_context('spawn'),
+    )
+
+
+def _extremos(estatisticas, observado, alternativa):
+    """
+    Quantas estatísticas permutadas são tão ou mais extremas que a observada.
+    A tolerância evita que erros de arredondamento descartem empates exatos.
+    """
+    tolerancia = 1e-12 * max(1.0, abs(observado))
+    if alternativa == 'two-sided':
+        return int((np.abs(estatisticas) >= abs(observado) - tolerancia).sum())
+    if alternativa == 'greater':
+        return int((estatisticas >= observado - tolerancia).sum())
+    if alternativa == 'less':
+        return int((estatisticas <= observado + tolerancia).sum())
+    raise ValueError(f"Alternativa desconhecida: {alternativa}")
+
+
+def _tarefa_sinais(desvios, observado, alternativa, n_permutacoes, semente):
+    """
+    Tarefa de um processo: inverte sinais aleatoriamente e conta os extremos.
+    """
+    gerador = np.random.default_rng(semente)
+    linhas_por_bloco = max(1, ELEMENTOS_POR_BLOCO // max(len(desvios), 1))
+    extremos = 0
+    for inicio in range(0, n_permutacoes, linhas_por_bloco):
+        linhas = min(linhas_por_bloco, n_permutacoes - inicio)
+        sinais = gerador.integers(0, 2, size=(linhas, len(desvios)), dtype=np.int8) * 2 - 1
+        extremos += _extremos(sinais @ desvios / len(desvios), observado, alternativa)
+    return extremos
+
+
+def _tarefa_duas_amostras(combinados, n_primeira, observado, alternativa, n_permutacoes, semente):
+    """
+    Tarefa de um processo: embaralha os rótulos dos grupos e conta os extremos
+    da diferença de médias.
+    """
+    gerador = np.random.default_rng(semente)
+    n_segunda = len(combinados) - n_primeira
+    linhas_por_bloco = max(1, ELEMENTOS_POR_BLOCO // max(len(combinados), 1))
+    total = combinados.sum()
+    extremos = 0
+    for inicio in range(0, n_permutacoes, linhas_por_bloco):
+        linhas = min(linhas_por_bloco, n_permutacoes - inicio)
+        embaralhados = gerador.permuted(np.broadcast_to(combinados, (linhas, len(combinados))), axis=1)
+        soma_primeira = embaralhados[:, :n_primeira].sum(axis=1)
+        diferencas = soma_primeira / n_primeira - (total - soma_primeira) / n_segunda
+        extremos += _extremos(diferencas, observado, alternativa)
+    return extremos
+
+
+def _faixa_valor_p(extremos, total, confianca):
+    """
+    Faixa de Clopper-Pearson para o valor-p estimado com `total` permutações.
+    """
+    alfa = 1 - confianca
+    inferior = stats.beta.ppf(alfa / 2, extremos, total - extremos + 1) if extremos > 0 else 0.0
+    superior = stats.beta.ppf(1 - alfa / 2, extremos + 1, total - extremos) if extremos < total else 1.0
+    return inferior, superior
+
+
+class PermutacoesEmAndamento:
+    """
+    Teste de permutação por Monte Carlo rodando em rodadas de tarefas no
+    `executor`. Nada aqui espera pelos processos: `avancar` só recolhe a
+    rodada se ela já terminou, decide se o teste para (quando a faixa de
+    confiança do valor-p já está toda abaixo ou toda acima de `alfa`) e envia
+    a rodada seguinte. Quem acompanha o teste chama `avancar` de tempos em
+    tempos até `concluido`.
+    Pode ser acompanhado de várias threads ao mesmo tempo.
+    """
+
+    def __init__(self, executor, tarefa, argumentos, estatistica, n_maximo, alfa, confianca_parada, semente):
+        self._executor = executor
+        self._tarefa = tarefa
+        self._argumentos = argumentos
+        self._estatistica = estatistica
+        self.n_maximo = n_maximo
+        self._alfa = alfa
+        self._confianca_parada = confianca_parada
+        self._sementes = np.random.SeedSequence(semente)
+        self._trava = threading.Lock()
+        self._extremos = self.permutacoes = 0
+        self._resultado = None
+        self._enviar_rodada()
+
+    @classmethod
+    def concluida(cls, resultado):
+        """
+        Execução já terminada com `resultado` (por exemplo, um teste exato).
+        """
+        execucao = cls.__new__(cls)
+        execucao._trava = threading.Lock()
+        execucao._resultado = resultado
+        execucao.n_maximo = execucao.permutacoes = resultado['permutacoes']
+        execucao._futuros = []
+        return execucao
+
+    def _enviar_rodada(self):
+        self._tamanhos = []
+        restante = self.n_maximo - self.permutacoes
+        for _ in range(TAREFAS_POR_RODADA):
+            if restante <= 0:
+                break
+            self._tamanhos.append(min(PERMUTACOES_POR_TAREFA, restante))
+            restante -= self._tamanhos[-1]
+        self._futuros = [
+            self._executor.submit(self._tarefa, *self._argumentos, tamanho, semente_tarefa)
+            for tamanho, semente_tarefa in zip(self._tamanhos, self._sementes.spawn(len(self._tamanhos)))
+        ]
+
+    def _concluir(self, parou_cedo):
+        # Correção +1: a própria amostra observada conta como uma permutação
+        self._resultado = {
+            'estatistica': self._estatistica,
+            'valor_p': (self._extremos + 1) / (self.permutacoes + 1),
+            'permutacoes': self.permutacoes,
+            'exato': False,
+            'parou_cedo': parou_cedo,
+            'faixa_valor_p': _faixa_valor_p(self._extremos, self.permutacoes, self._confianca_parada),
+        }
+        self._executor = self._argumentos = None
+
+    def avancar(self):
+        """
+        Recolhe a rodada em andamento, se já terminou, e envia a próxima ou
+        encerra o teste. Retorna imediatamente; indica se o teste terminou.
+        """
+        with self._trava:
+            if self._resultado is not None or not all(futuro.done() for futuro in self._futuros):
+                return self._resultado is not None
+            self._extremos += sum(futuro.result() for futuro in self._futuros)
+            self.permutacoes += sum(self._tamanhos)
+
+            inferior, superior = _faixa_valor_p(self._extremos, self.permutacoes, self._confianca_parada)
+            if superior < self._alfa or inferior > self._alfa:
+                self._concluir(parou_cedo=self.permutacoes < self.n_maximo)
+            elif self.permutacoes >= self.n_maximo:
+                self._concluir(parou_cedo=False)
+            else:
+                self._enviar_rodada()
+            return self._resultado is not None
+
+    @property
+    def concluido(self):
+        return self._resultado is not None
+
+    def progresso(self):
+        """
+        Fração do máximo de permutações já calculada (1 quando concluído).
+        """
+        return 1.0 if self.concluido else self.permutacoes / self.n_maximo
+
+    def resultado(self):
+        """
+        Dicionário com a estatística, o valor-p e detalhes da execução, ou
+        None se o teste ainda não terminou.
+        """
+        return self._resultado
+
+
+def iniciar_permutacao_uma_amostra(valores, valor_hipotetico, alternativa='two-sided', executor=None,
+                                   n_maximo=100_000, alfa=0.05, confianca_parada=0.99, semente=0):
+    """
+    Teste de permutação de sinais para a média de uma amostra. Sob a hipótese
+    nula os desvios em relação a `valor_hipotetico` são simétricos, então
+    inverter seus sinais não muda a distribuição da média.
+
+    Com até `N_MAXIMO_EXATO` valores todas as combinações de sinais são
+    enumeradas (teste exato, já concluído no retorno); acima disso começa um
+    Monte Carlo no `executor`. Retorna a `PermutacoesEmAndamento`.
+    """
+    desvios = np.asarray(valores, dtype=np.float64) - valor_hipotetico
+    observado = desvios.mean()
+
+    if len(desvios) <= N_MAXIMO_EXATO:
+        sinais = np.array(list(itertools.product((-1.0, 1.0), repeat=len(desvios))))
+        extremos = _extremos(sinais @ desvios / len(desvios), observado, alternativa)
+        return PermutacoesEmAndamento.concluida({
+            'estatistica': observado,
+            'valor_p': extremos / len(sinais),
+            'permutacoes': len(sinais),
+            'exato': True,
+            'parou_cedo': False,
+            'faixa_valor_p': (extremos / len(sinais),) * 2,
+        })
+
+    return PermutacoesEmAndamento(executor, _tarefa_sinais, (desvios, observado, alternativa), observado,
+                                  n_maximo, alfa, confianca_parada, semente)
+
+
+def iniciar_permutacao_duas_amostras(primeira, segunda, alternativa='two-sided', executor=None,
+                                     n_maximo=100_000, alfa=0.05, confianca_parada=0.99, semente=0):
+    """
+    Teste de permutação para a diferença de médias entre dois grupos
+    (média da primeira menos média da segunda), por Monte Carlo no
+    `executor`. Retorna a `PermutacoesEmAndamento`.
+    """
+    primeira = np.asarray(primeira, dtype=np.float64)
+    segunda = np.asarray(segunda, dtype=np.float64)
+    observado = primeira.mean() - segunda.mean()
+    combinados = np.concatenate([primeira, segunda])
+    return PermutacoesEmAndamento(executor, _tarefa_duas_amostras, (combinados, len(primeira), observado, alternativa),
+                                  observado, n_maximo, alfa, confianca_parada, semente)
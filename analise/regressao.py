@@ -0,0 +1,151 @@
+"""
+Modelo da nota dos jogadores (`statistics_rating`) a partir das demais estatísticas.
+
+Um modelo ridge por posição, ajustado sobre as estatísticas padronizadas de
+cada posição: as matrizes das equações normais de todas as posições são
+empilhadas e resolvidas em uma única chamada. Os coeficientes padronizados
+dizem o peso de cada estatística na nota, e os resíduos mostram quem recebe
+notas acima ou abaixo do que os números explicam.
+
+Os coeficientes ajustados são gravados em disco (`.npz`) com o identificador
+da versão dos dados no nome, e uma nova sessão os lê em vez de ajustar de novo.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+COLUNA_ALVO = 'statistics_rating'
+
+# Penalidade ridge sobre os coeficientes padronizados
+PENALIDADE_PADRAO = 1.0
+
+# Posições com menos linhas com nota que isto ficam sem modelo
+MINIMO_LINHAS = 30
+
+
+def colunas_explicativas(colunas_disponiveis):
+    """
+    Colunas `statistics_*` usadas para explicar a nota (todas menos ela).
+    """
+    return [coluna for coluna in colunas_disponiveis if coluna.startswith('statistics_') and coluna != COLUNA_ALVO]
+
+
+def caminho_modelo(pasta, versao):
+    """
+    Arquivo dos coeficientes ajustados para uma versão dos dados.
+    """
+    return os.path.join(pasta, f'nota-{versao}.npz')
+
+
+def _padronizar(valores, codigos, medias, desvios):
+    """
+    Estatísticas padronizadas pela média e pelo desvio do grupo de cada linha
+    (ausentes contam como zero; colunas constantes no grupo ficam zeradas).
+    """
+    centrados = np.nan_to_num(valores) - medias[codigos]
+    return np.divide(centrados, desvios[codigos], out=np.zeros_like(centrados), where=desvios[codigos] > 0)
+
+
+class ModeloNota:
+    """
+    Coeficientes ridge por grupo (posição): médias e desvios usados na
+    padronização, coeficientes padronizados, interceptos, R² e linhas usadas.
+    """
+
+    def __init__(self, grupos, colunas, medias, desvios, coeficientes, interceptos, r2, linhas, penalidade):
+        self.grupos = list(grupos)
+        self.colunas = list(colunas)
+        self.medias = medias
+        self.desvios = desvios
+        self.coeficientes = coeficientes
+        self.interceptos = interceptos
+        self.r2 = r2
+        self.linhas = linhas
+        self.penalidade = penalidade
+
+    @classmethod
+    def ajustar(cls, valores, alvo, codigos, grupos, colunas, penalidade=PENALIDADE_PADRAO):
+        """
+        Ajusta um modelo por grupo. `valores` tem uma linha por jogo e as
+        `colunas` explicativas, `alvo` é a nota e `codigos` o grupo de cada
+        linha (negativo para nenhum). Linhas sem nota são ignoradas.
+        """
+        valores = np.asarray(valores, dtype=np.float64)
+        alvo = np.asarray(alvo, dtype=np.float64)
+        codigos = np.asarray(codigos)
+        usadas = (codigos >= 0) & ~np.isnan(alvo)
+        valores, alvo, codigos = np.nan_to_num(valores[usadas]), alvo[usadas], codigos[usadas]
+        n_grupos, n_colunas = len(grupos), valores.shape[1]
+
+        linhas = np.bincount(codigos, minlength=n_grupos)
+        mascaras = [codigos == grupo for grupo in range(n_grupos)]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            medias = np.stack([valores[mascara].sum(axis=0) for mascara in mascaras]) / linhas[:, None]
+            interceptos = np.bincount(codigos, weights=alvo, minlength=n_grupos) / linhas
+        medias = np.nan_to_num(medias)
+        centrados = valores - medias[codigos]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            desvios = np.sqrt(np.stack([(centrados[mascara] ** 2).sum(axis=0) for mascara in mascaras]) / linhas[:, None])
+        desvios = np.nan_to_num(desvios)
+        padronizados = _padronizar(valores, codigos, medias, desvios)
+        centrado_alvo = alvo - interceptos[codigos]
+
+        # Equações normais de todos os grupos, resolvidas juntas
+        gram = np.stack([padronizados[mascara].T @ padronizados[mascara] for mascara in mascaras])
+        gram += penalidade * np.eye(n_colunas)
+        termos = np.stack([padronizados[mascara].T @ centrado_alvo[mascara] for mascara in mascaras])
+        coeficientes = np.linalg.solve(gram, termos[..., None])[..., 0]
+        coeficientes[linhas < MINIMO_LINHAS] = np.nan
+
+        residuos = centrado_alvo - (padronizados * coeficientes[codigos]).sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            r2 = 1 - (np.bincount(codigos, weights=residuos ** 2, minlength=n_grupos)
+                      / np.bincount(codigos, weights=centrado_alvo ** 2, minlength=n_grupos))
+        return cls(grupos, colunas, medias, desvios, coeficientes, interceptos, r2, linhas, penalidade)
+
+    def prever(self, valores, codigos):
+        """
+        Nota prevista para cada linha pelo modelo do seu grupo. NaN nas
+        linhas sem grupo ou de grupos sem modelo.
+        """
+        codigos = np.asarray(codigos)
+        validos = codigos >= 0
+        previstas = np.full(len(codigos), np.nan)
+        grupo = codigos[validos]
+        padronizados = _padronizar(np.asarray(valores, dtype=np.float64)[validos], grupo, self.medias, self.desvios)
+        previstas[validos] = self.interceptos[grupo] + (padronizados * self.coeficientes[grupo]).sum(axis=1)
+        return previstas
+
+    def importancia(self):
+        """
+        Coeficientes padronizados (variação da nota por desvio padrão de cada
+        estatística), uma coluna por grupo.
+        """
+        return pd.DataFrame(self.coeficientes.T, index=pd.Index(self.colunas, name='coluna'), columns=self.grupos)
+
+    def salvar(self, caminho):
+        """
+        Grava os coeficientes em `caminho` (.npz), trocando o arquivo de uma só vez.
+        """
+        os.makedirs(os.path.dirname(caminho) or '.', exist_ok=True)
+        temporario = f'{caminho}.{os.getpid()}.tmp'
+        with open(temporario, 'wb') as arquivo:
+            np.savez(
+                arquivo, grupos=np.array(self.grupos, dtype=str), colunas=np.array(self.colunas, dtype=str),
+                medias=self.medias, desvios=self.desvios, coeficientes=self.coeficientes,
+                interceptos=self.interceptos, r2=self.r2, linhas=self.linhas, penalidade=self.penalidade,
+            )
+        os.replace(temporario, caminho)
+
+    @classmethod
+    def carregar(cls, caminho):
+        """
+        Lê os coeficientes gravados por `salvar`.
+        """
+        with np.load(caminho) as arquivo:
+            return cls(
+                arquivo['grupos'].tolist(), arquivo['colunas'].tolist(), arquivo['medias'], arquivo['desvios'],
+                arquivo['coeficientes'], arquivo['interceptos'], arquivo['r2'], arquivo['linhas'],
+                float(arquivo['penalidade']),
+            )
@@ -0,0 +1,115 @@
+"""
+Busca de jogadores semelhantes.
+
+Cada jogador é descrito por um perfil: suas taxas por 90 minutos em passes,
+duelos, finalizações, xG, xA e ações defensivas, somadas em todos os jogos do
+filtro. Os perfis são padronizados (z-score por coluna) e normalizados uma
+única vez; a semelhança com um jogador é então o cosseno entre os perfis, que
+sai de um único produto matriz-vetor (BLAS). Os mais próximos são escolhidos
+por seleção parcial (`argpartition`), sem ordenar o elenco inteiro.
+"""
+import numpy as np
+import pandas as pd
+
+from analise.normalizacao import por_90
+
+# Colunas que compõem o perfil de um jogador, agrupadas pelo tipo de ação
+PERFIL_JOGADOR = {
+    'passes': [
+        'statistics_total_pass', 'statistics_accurate_pass', 'statistics_total_long_balls',
+        'statistics_accurate_long_balls', 'statistics_key_pass', 'statistics_total_cross',
+    ],
+    'duelos': [
+        'statistics_duel_won', 'statistics_duel_lost', 'statistics_aerial_won',
+        'statistics_aerial_lost', 'statistics_won_contest', 'statistics_dispossessed',
+    ],
+    'finalizacoes': [
+        'statistics_on_target_scoring_attempt', 'statistics_shot_off_target',
+        'statistics_blocked_scoring_attempt', 'statistics_goals',
+    ],
+    'criacao': ['statistics_expected_goals', 'statistics_expected_assists', 'statistics_big_chance_created'],
+    'defesa': [
+        'statistics_total_tackle', 'statistics_interception_won', 'statistics_total_clearance',
+        'statistics_outfielder_block',
+    ],
+}
+
+# Minutos mínimos no filtro para um jogador entrar na busca (três jogos completos)
+MINUTOS_MINIMOS_PERFIL = 270
+
+
+def colunas_perfil(colunas_disponiveis):
+    """
+    Colunas de `PERFIL_JOGADOR` presentes nos dados, na ordem do perfil.
+    """
+    disponiveis = set(colunas_disponiveis)
+    return [coluna for grupo in PERFIL_JOGADOR.values() for coluna in grupo if coluna in disponiveis]
+
+
+def perfis_por_jogador(valores, colunas, jogadores, minutos, minutos_minimos=MINUTOS_MINIMOS_PERFIL):
+    """
+    Perfil de cada jogador: as `colunas` de `valores` (uma linha por jogo)
+    somadas por jogador e convertidas em taxas por 90 minutos. Jogadores com
+    menos de `minutos_minimos` no total ficam de fora.
+    Retorna um DataFrame indexado pelo nome do jogador.
+    """
+    codigos, nomes = pd.factorize(pd.Series(jogadores), sort=True)
+    validos = codigos >= 0
+    somas = np.zeros((len(nomes), valores.shape[1]))
+    np.add.at(somas, codigos[validos], np.nan_to_num(valores[validos]))
+    minutos_totais = np.bincount(codigos[validos], weights=np.nan_to_num(minutos[validos]), minlength=len(nomes))
+
+    taxas = por_90(somas, minutos_totais, np.ones(valores.shape[1], dtype=bool), minutos_minimos)
+    mantidos = minutos_totais >= minutos_minimos
+    return pd.DataFrame(taxas[mantidos], columns=list(colunas),
+                        index=pd.Index(np.asarray(nomes)[mantidos], name='player_name'))
+
+
+class IndiceSimilaridade:
+    """
+    Perfis padronizados e normalizados de um grupo de jogadores, prontos para
+    buscas por semelhança de cosseno. Cada busca custa um produto
+    matriz-vetor e uma seleção parcial.
+    """
+
+    def __init__(self, perfis):
+        self.perfis = perfis
+        valores = perfis.to_numpy(dtype=np.float64)
+        media = valores.mean(axis=0) if len(valores) else np.zeros(valores.shape[1])
+        desvio = valores.std(axis=0) if len(valores) else np.ones(valores.shape[1])
+        # Colunas constantes não distinguem ninguém e ficam zeradas
+        padronizados = np.divide(valores - media, desvio, out=np.zeros_like(valores), where=desvio > 0)
+        normas = np.linalg.norm(padronizados, axis=1, keepdims=True)
+        self._matriz = np.divide(padronizados, normas, out=np.zeros_like(padronizados), where=normas > 0)
+        self._posicoes = {jogador: posicao for posicao, jogador in enumerate(self.perfis.index)}
+
+    def __contains__(self, jogador):
+        return jogador in self._posicoes
+
+    def __len__(self):
+        return len(self._posicoes)
+
+    def jogadores(self):
+        """
+        Jogadores do índice, em ordem alfabética.
+        """
+        return list(self.perfis.index)
+
+    def semelhantes(self, jogador, k=10):
+        """
+        Os `k` jogadores mais semelhantes a `jogador` (ele próprio excluído),
+        do mais para o menos parecido. Retorna um DataFrame com a semelhança
+        (cosseno, de -1 a 1) e as taxas por 90 minutos de cada um.
+        Levanta `KeyError` se o jogador não estiver no índice.
+        """
+        posicao = self._posicoes[jogador]
+        semelhanca = self._matriz @ self._matriz[posicao]
+        semelhanca[posicao] = -np.inf
+        k = min(k, len(semelhanca) - 1)
+        if k <= 0:
+            return self.perfis.iloc[:0].assign(semelhanca=np.zeros(0))
+        escolhidos = np.argpartition(-semelhanca, k - 1)[:k]
+        escolhidos = escolhidos[np.argsort(-semelhanca[escolhidos], kind='stable')]
+        resultado = self.perfis.iloc[escolhidos].copy()
+        resultado.insert(0, 'semelhanca', semelhanca[escolhidos])
+        return resultado
@@ -0,0 +1,85 @@
+"""
+Suporte à Tabela de Jogos paginada.
+
+A tabela é ordenada e fatiada no servidor: apenas as linhas da página visível
+e as colunas escolhidas são montadas e enviadas ao navegador. As colunas sem
+nenhum valor para um filtro são conhecidas por um cubo de contagens de valores
+preenchidos, calculado uma única vez.
+"""
+import copy
+import math
+
+import numpy as np
+import pandas as pd
+
+from analise.indice import TODOS
+
+
+class ColunasPreenchidas:
+    """
+    Cubo com a quantidade de valores preenchidos de cada coluna por combinação
+    das dimensões de filtro. Responde quais colunas têm dados para um filtro
+    sem varrer as linhas novamente.
+    """
+
+    def __init__(self, chaves, valores):
+        self.dimensoes = list(chaves.columns)
+        self.colunas = list(valores.columns)
+        agrupado = (
+            valores.notna().astype(np.int32)
+            .groupby([chaves[dimensao] for dimensao in self.dimensoes], observed=True, dropna=False, sort=False)
+            .sum()
+        )
+        self.chaves = agrupado.index.to_frame(index=False)
+        self.contagens = agrupado.to_numpy()
+
+    def colunas_com_dados(self, chave):
+        """
+        Colunas que têm pelo menos um valor preenchido para a chave de filtros.
+        """
+        selecionadas = np.ones(len(self.chaves), dtype=bool)
+        for dimensao, valor in zip(self.dimensoes, chave):
+            if valor != TODOS:
+                selecionadas &= (self.chaves[dimensao] == valor).to_numpy(dtype=bool, na_value=False)
+        totais = self.contagens[selecionadas].sum(axis=0)
+        return [coluna for coluna, total in zip(self.colunas, totais) if total > 0]
+
+    def anexado(self, chaves, valores):
+        """
+        Novo cubo com as contagens de linhas acrescentadas. As linhas novas
+        são contadas sozinhas e suas combinações entram ao final; combinações
+        repetidas são somadas em `colunas_com_dados`. O cubo atual não muda.
+        """
+        novas = ColunasPreenchidas(chaves[self.dimensoes], valores.reindex(columns=self.colunas))
+        preenchidas = copy.copy(self)
+        preenchidas.chaves = pd.concat([self.chaves, novas.chaves], ignore_index=True)
+        preenchidas.contagens = np.vstack([self.contagens, novas.contagens])
+        return preenchidas
+
+
+def ordenar_posicoes(coluna, posicoes, crescente=True):
+    """
+    Reordena as posições de linha pelos valores de `coluna`, com os ausentes
+    sempre ao final. A ordenação é estável, preservando a ordem original nos empates.
+    """
+    valores = coluna.take(posicoes).reset_index(drop=True)
+    if isinstance(valores.dtype, pd.CategoricalDtype):
+        # Ordena categorias pelo texto, não pela ordem interna dos códigos
+        valores = valores.astype('str')
+    ordem = valores.sort_values(ascending=crescente, na_position='last', kind='stable').index.to_numpy()
+    return np.asarray(posicoes)[ordem]
+
+
+def total_paginas(n_linhas, tamanho_pagina):
+    """
+    Quantidade de páginas necessária para exibir `n_linhas` (no mínimo uma).
+    """
+    return max(1, math.ceil(n_linhas / tamanho_pagina))
+
+
+def fatia_pagina(posicoes, pagina, tamanho_pagina):
+    """
+    Posições de linha da página informada (começando em 1).
+    """
+    inicio = (pagina - 1) * tamanho_pagina
+    return posicoes[inicio:inicio + tamanho_pagina]
@@ -1,8 +1,14 @@
+# Medição da inicialização (ligada pela variável PERFIL_INICIALIZACAO), iniciada antes das demais importações
+from analise.importacao import MedicaoPagina
+startup = MedicaoPagina('formacaoExperiencias')
+
 # Importa a biblioteca Streamlit
 import streamlit as st
 # Importa a biblioteca 'os' para manipulação de caminhos de arquivos
 import os
 
+startup.marcar('importacoes')
+
 # --- Título Principal da Página ---
 st.title('Formação e Experiência')
 st.markdown('---')
@@ -348,3 +354,5 @@ with st.expander("Certificados Alura"):
             st.markdown(f"- **Data de Emissão:** {curso['data_emissao']}")
             st.markdown(f"- **Código da Credencial:** `{curso['codigo']}`")
         st.markdown("---")
+
+startup.marcar('primeira_pintura')
@@ -1,6 +1,12 @@
+# Medição da inicialização (ligada pela variável PERFIL_INICIALIZACAO), iniciada antes das demais importações
+from analise.importacao import MedicaoPagina
+startup = MedicaoPagina('skills')
+
 # Importa a biblioteca Streamlit para criar a aplicação web
 import streamlit as st
 
+startup.marcar('importacoes')
+
 # --- Configurações da Página e Tema Personalizado ---
 
 # Configura o layout da página para ser mais amplo
@@ -172,3 +178,4 @@ for categoria, lista_habilidades in skills.items():
         st.markdown('</div>', unsafe_allow_html=True)
         st.markdown("---")
 
+startup.marcar('primeira_pintura')
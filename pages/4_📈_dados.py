@@ -1,15 +1,115 @@
 # --- 1. Importação de Bibliotecas e Configuração Inicial ---
+# Medição da inicialização (ligada pela variável PERFIL_INICIALIZACAO), iniciada antes das demais importações
+from analise.importacao import MedicaoPagina, modulo_tardio
+startup = MedicaoPagina('dados')
+
 # Importa as bibliotecas necessárias para a aplicação
 import streamlit as st
 import pandas as pd
-import plotly.express as px
+import numpy as np
+import plotly.graph_objects as go
 import os
-from scipy import stats
 import math
 
+from analise.agregados import maiores
+from analise.consultas import LIMITE_LINHAS, TABELA, MotorConsultas, totais_por_jogador
+from analise.estatisticas import MomentosPorFiltro, correlacoes, resumo_estatistico, teste_t_uma_amostra, testes_t_em_lote, testes_welch_em_lote
+from analise.finalizacao import colunas_finalizacao, eficiencia, linhas_cobertas
+from analise.fonte import FonteDados
+from analise.forma import COLUNAS_FORMA, JANELA_PADRAO, FormaJogadores
+from analise.graficos import figura_histograma, histograma
+from analise.indice import DIMENSOES_FILTRO, IndiceFiltros, TODOS
+from analise.normalizacao import COLUNA_MINUTOS, MINUTOS_MINIMOS, colunas_normalizaveis, por_90
+from analise.percentis import PercentisJogadores, agregado_por_jogador
+from analise.partidas import TabelaPartidas, colunas_partida, resultados
+from analise.particoes import Particao, descobrir_particoes, dimensoes_particionadas, podar, valores_particao
+from analise.regressao import COLUNA_ALVO, ModeloNota, caminho_modelo, colunas_explicativas
+from analise.similaridade import MINUTOS_MINIMOS_PERFIL, IndiceSimilaridade, colunas_perfil, perfis_por_jogador
+from analise.reamostragem import (
+    criar_executor, iniciar_permutacao_duas_amostras, iniciar_permutacao_uma_amostra,
+    intervalo_bootstrap, medias_bootstrap
+)
+from analise.tabela import ColunasPreenchidas, fatia_pagina, ordenar_posicoes, total_paginas
+
+# O Plotly Express e o SciPy só são importados quando a primeira seção que os
+# usa é desenhada, depois do cabeçalho e da barra lateral (o `plotly.graph_objects`
+# já vem carregado pelo próprio Streamlit)
+px = modulo_tardio('plotly.express')
+stats = modulo_tardio('scipy.stats')
+startup.marcar('importacoes')
+
 # Define o nome do arquivo de dados
 DATA_FILE = 'dados-completos-Ituano.csv'
 
+# Pasta do conjunto particionado por clube, temporada e torneio
+# (time_alvo=.../ano=.../tournament=.../*.csv). Sem ela, usa-se DATA_FILE
+DATA_DIR = 'dados'
+
+# Pasta dos coeficientes do modelo da nota, gravados por versão dos dados. Fica na
+# raiz do app (a pasta acima de pages/), qualquer que seja a pasta de onde o Streamlit roda
+MODEL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.modelos')
+
+# Colunas exibidas por padrão na Tabela de Jogos (as demais podem ser adicionadas)
+TABLE_DEFAULT_COLUMNS = [
+    'ano', 'jogo', 'tournament', 'home_or_away', 'home_team', 'away_team', 'home_score', 'away_score',
+    'player_name', 'player_position', 'statistics_minutes_played', 'statistics_rating',
+    'statistics_goals', 'statistics_goal_assist', 'statistics_total_pass', 'statistics_accurate_pass'
+]
+
+# Opções de paginação da Tabela de Jogos
+TABLE_PAGE_SIZES = [25, 50, 100, 200]
+TABLE_ORIGINAL_ORDER = '(ordem original)'
+
+# Métodos do intervalo de confiança da Seção 4 (None = intervalo t paramétrico)
+CI_METHODS = {
+    'Teste t (paramétrico)': None,
+    'Bootstrap percentil': 'percentil',
+    'Bootstrap BCa': 'bca'
+}
+BOOTSTRAP_RESAMPLES = [1000, 2000, 5000, 10000, 20000]
+
+# Métodos do teste de hipótese da Seção 5
+TEST_METHODS = {
+    'Teste t': 't',
+    'Permutação de sinais (uma amostra)': 'sinais',
+    'Permutação casa x fora (duas amostras)': 'casa_fora'
+}
+PERMUTATION_LIMITS = [10000, 50000, 100000, 200000]
+# Intervalo (em segundos) entre as consultas a um teste de permutação em andamento
+PERMUTATION_POLL_SECONDS = 0.5
+# Testes de permutação (em andamento ou concluídos) guardados para todas as sessões
+PERMUTATION_RUNS_KEPT = 200
+
+# Comparações do teste em lote de todas as colunas statistics_*
+BATCH_TEST_MODES = {
+    'Uma amostra (contra a média geral)': 'uma_amostra',
+    'Casa x fora (Welch)': 'casa_fora'
+}
+
+# Colunas da escalação no Navegador de Partidas
+LINEUP_COLUMNS = [
+    'player_name', 'player_number', 'player_position', 'player_sub', 'player_captain',
+    'statistics_minutes_played', 'statistics_rating', 'statistics_goals', 'statistics_goal_assist'
+]
+
+# Métodos do explorador de correlações
+CORRELATION_METHODS = {'Pearson': 'pearson', 'Spearman (postos)': 'spearman'}
+# Pares com menos linhas em comum que isto ficam sem correlação (poucas linhas geram ±1 por acaso)
+CORRELATION_MIN_PAIRS = 20
+
+# Agrupamentos da análise de eficiência de finalização
+FINISHING_LEVELS = {'Por jogador': 'jogador', 'Por partida': 'partida'}
+
+# Estatísticas mostradas por padrão no radar de percentis
+RADAR_DEFAULT_COLUMNS = [
+    'statistics_rating', 'statistics_goals', 'statistics_expected_goals', 'statistics_goal_assist',
+    'statistics_key_pass', 'statistics_accurate_pass', 'statistics_duel_won', 'statistics_total_tackle',
+    'statistics_interception_won', 'statistics_possession_lost_ctrl'
+]
+
+# Nomes exibidos para as posições dos jogadores
+POSITION_LABELS = {'G': 'Goleiro', 'D': 'Defensor', 'M': 'Meio-campista', 'F': 'Atacante'}
+
 # Configura o layout da página para ser mais amplo
 st.set_page_config(layout="wide", page_title="Análise de Dados")
 
@@ -65,97 +165,697 @@ st.markdown('### Análises estatísticas e visualizações do desempenho do time
 st.markdown('---')
 
 # --- 2. Carregamento e Processamento de Dados ---
-@st.cache_data
-def load_data():
+def build_filter_index(data, derived):
+    """
+    Índice de filtros (torneio, local, ano e posição), que transforma cada
+    troca de filtro em uma consulta às posições já calculadas.
+    """
+    dimensions = [dim for dim in DIMENSOES_FILTRO if dim in data]
+    return IndiceFiltros({dim: data.coluna(dim) for dim in dimensions}, len(data))
+
+def append_filter_index(index, new_rows, data, derived):
+    return index.anexado({dim: new_rows[dim] for dim in index.dimensoes}, len(new_rows))
+
+def build_sql_engine(data, derived):
+    """
+    Motor SQL embutido (DuckDB) com a tabela `partidas` sobre os arquivos
+    colunares da versão, para agregações e consultas livres. A conexão só é
+    aberta na primeira consulta, depois da primeira pintura.
+    """
+    return MotorConsultas(data.caminhos)
+
+def append_sql_engine(engine, new_rows, data, derived):
+    # A visão passa a incluir a parte recém-gravada; nada é lido agora
+    return MotorConsultas(data.caminhos)
+
+def build_filled_columns(data, derived):
     """
-    Função para carregar os dados do arquivo CSV e fazer pré-processamento.
-    Inclui tratamento de erro caso o arquivo não seja encontrado.
+    Quantos valores preenchidos cada coluna tem por combinação de filtros, para
+    descartar colunas vazias sem varrer as linhas. As colunas são lidas só para
+    essa contagem e não ficam em memória.
+    """
+    dimensions = derived['filter_index'].dimensoes
+    return ColunasPreenchidas(data.frame(dimensions), data.ler_sem_guardar(data.colunas))
+
+def append_filled_columns(filled, new_rows, data, derived):
+    return filled.anexado(new_rows, new_rows)
+
+def build_column_moments(data, derived):
+    """
+    Contagem, média e variância das colunas numéricas por combinação de
+    filtros, preenchidas conforme os filtros são usados.
+    """
+    return MomentosPorFiltro()
+
+def append_column_moments(moments, new_rows, data, derived):
+    # Só as linhas novas são indexadas e convertidas em matriz
+    new_index = IndiceFiltros(
+        {dim: new_rows[dim] for dim in derived['filter_index'].dimensoes}, len(new_rows)
+    )
+    new_values = new_rows.reindex(columns=data.colunas_numericas()).to_numpy(dtype=np.float64, na_value=np.nan)
+    return moments.anexado(lambda key: new_values[new_index.posicoes(key)])
+
+def build_match_table(data, derived):
+    """
+    Tabela de partidas (uma linha por ano e jogo) e o código da partida de
+    cada linha de jogador. As colunas repetidas são lidas só para montá-la e
+    não ficam em memória. None se os dados não identificam as partidas.
+    """
+    columns = colunas_partida(data.colunas)
+    return TabelaPartidas(data.ler_sem_guardar(columns)) if columns else None
+
+def append_match_table(table, new_rows, data, derived):
+    return table.anexado(new_rows) if table is not None else None
+
+def build_player_form(data, derived):
+    """
+    Séries de atuações por jogador, ordenadas por ano e jogo, com as somas
+    acumuladas das estatísticas de forma. None se faltar alguma coluna.
+    """
+    if not all(col in data for col in ['player_name', 'ano', 'jogo', 'statistics_minutes_played']):
+        return None
+    columns = [col for col in COLUNAS_FORMA if col in data]
+    identity = data.ler_sem_guardar(['player_name', 'ano', 'jogo'])
+    values = data.matriz(columns + ['statistics_minutes_played'])
+    return FormaJogadores(identity['player_name'], identity['ano'], identity['jogo'],
+                          values[:, :-1], values[:, -1], columns)
+
+def append_player_form(form, new_rows, data, derived):
+    if form is None:
+        return None
+    values = new_rows.reindex(columns=form.colunas).to_numpy(dtype=np.float64, na_value=np.nan)
+    return form.anexado(new_rows['player_name'], new_rows['ano'], new_rows['jogo'], values,
+                        new_rows['statistics_minutes_played'])
+
+# Estruturas derivadas dos dados, montadas a cada carga completa e atualizadas
+# só com as linhas novas quando partidas são anexadas ao CSV (na ordem abaixo)
+DERIVED_DATA = {
+    'filter_index': (build_filter_index, append_filter_index),
+    'sql_engine': (build_sql_engine, append_sql_engine),
+    'filled_columns': (build_filled_columns, append_filled_columns),
+    'column_moments': (build_column_moments, append_column_moments),
+    'match_table': (build_match_table, append_match_table),
+    'player_form': (build_player_form, append_player_form),
+}
+
+def find_partitions():
+    """
+    Localiza os arquivos de dados: as partições da pasta `DATA_DIR` ou, sem
+    ela, o arquivo `DATA_FILE` como partição única. Só os nomes das pastas
+    são lidos, nenhum CSV é aberto aqui.
+    Inclui tratamento de erro caso os dados não sejam encontrados.
     """
     script_dir = os.path.dirname(os.path.abspath(__file__))
-    file_path = os.path.join(script_dir, DATA_FILE)
-    
-    if not os.path.exists(file_path):
-        parent_dir = os.path.dirname(script_dir)
-        file_path = os.path.join(parent_dir, DATA_FILE)
-        
-        if not os.path.exists(file_path):
-            st.error(f"Erro: O arquivo '{DATA_FILE}' não foi encontrado.")
-            st.info("Por favor, verifique se o arquivo está na pasta 'cp01', a mesma que o script principal (1_home.py).")
-            st.stop()
-    
+    parent_dir = os.path.dirname(script_dir)
+
+    for base_dir in (script_dir, parent_dir):
+        partitions = descobrir_particoes(os.path.join(base_dir, DATA_DIR))
+        if partitions:
+            return partitions
+
+    for base_dir in (script_dir, parent_dir):
+        file_path = os.path.join(base_dir, DATA_FILE)
+        if os.path.exists(file_path):
+            return [Particao(file_path, {})]
+
+    st.error(f"Erro: O arquivo '{DATA_FILE}' não foi encontrado.")
+    st.info("Por favor, verifique se o arquivo está na pasta 'cp01', a mesma que o script principal (1_home.py).")
+    st.stop()
+
+@st.cache_resource(max_entries=4, on_release=lambda source: source.parar())
+def load_data_source(paths):
+    """
+    Função para carregar os dados dos arquivos CSV e fazer pré-processamento.
+    Há uma fonte por seleção de partições: lê as colunas sob demanda dos
+    arquivos colunares e observa os CSVs em segundo plano, publicando uma nova
+    versão quando eles mudam. Partidas novas anexadas ao final de um CSV são
+    lidas sozinhas e atualizam as estruturas de `DERIVED_DATA` em vez de
+    reconstruí-las. Seleções antigas saem do cache e deixam de ser observadas.
+    """
     try:
-        df = pd.read_csv(file_path)
-        
-        # Pré-processamento simples de colunas
-        df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_')
-        
-        if 'player_name' in df.columns:
-            df['player_name'] = df['player_name'].astype(str).str.strip()
-        
-        if 'player_sub' in df.columns:
-            df['player_sub'] = df['player_sub'].fillna(False).astype(bool)
-        
-        # Renomeia colunas se necessário para unificar
-        rename_map = {
-            'statistics_total_passes': 'statistics_total_passes',
-            'statistics_total_shots': 'statistics_total_shots',
-            'statistics_accurate_passes': 'statistics_accurate_passes',
-            'statistics_goals': 'statistics_goals'
-        }
-        
-        for expected, fallback in rename_map.items():
-            if fallback not in df.columns:
-                # Se a coluna com o nome original não existir, tenta encontrar com um nome alternativo
-                if f"_{fallback}" in df.columns:
-                    df.rename(columns={f"_{fallback}": expected}, inplace=True)
-
-        return df
+        # Abre as cópias colunares (Parquet), convertendo apenas os CSVs desatualizados
+        return FonteDados(list(paths), DERIVED_DATA)
     except Exception as e:
         st.error(f"Erro ao ler o arquivo CSV. Detalhes: {e}")
         st.stop()
 
-# Carregar os dados
-df = load_data()
+def clamp_choice(key, options):
+    """
+    Mantém a escolha guardada no filtro `key` apenas se ela ainda está entre as
+    opções (que mudam com os outros filtros e com os dados); senão, volta para
+    a primeira opção, `Todos`.
+    """
+    if key in st.session_state and st.session_state[key] not in options:
+        st.session_state[key] = options[0]
+    return options
 
 # --- 3. Filtros de Dados ---
+partitions = find_partitions()
+partition_dims = dimensoes_particionadas(partitions)
+
 st.sidebar.title('Filtros de Dados')
 st.sidebar.markdown('---')
 
+# Um espaço por filtro, na ordem de exibição. Os filtros das chaves de partição
+# são escolhidos antes da carga, pelos nomes das pastas; os demais, depois dela
+club_box, tournament_box, home_away_box, year_box, position_box = [st.sidebar.container() for _ in range(5)]
+partition_filters = {}
+
+# Filtro 0: Clube (só no conjunto particionado por clube)
+if 'time_alvo' in partition_dims:
+    club_box.subheader('Clube')
+    partition_filters['time_alvo'] = club_box.selectbox(
+        'Selecione o Clube', clamp_choice('filter_club', [TODOS] + valores_particao(partitions, 'time_alvo')),
+        key='filter_club'
+    )
+
+if 'tournament' in partition_dims:
+    tournament_box.subheader('Torneio')
+    partition_filters['tournament'] = tournament_box.selectbox(
+        'Selecione o Torneio',
+        clamp_choice('filter_tournament', [TODOS] + valores_particao(podar(partitions, **partition_filters), 'tournament')),
+        key='filter_tournament'
+    )
+
+if 'ano' in partition_dims:
+    year_box.subheader('Temporada')
+    partition_filters['ano'] = year_box.selectbox(
+        'Selecione o Ano',
+        clamp_choice('filter_year', [TODOS] + valores_particao(podar(partitions, **partition_filters), 'ano')),
+        key='filter_year'
+    )
+
+# Poda das partições: só os arquivos que atendem os filtros acima são abertos
+selected_partitions = podar(partitions, **partition_filters)
+if not selected_partitions:
+    st.warning('Nenhum arquivo de dados atende os filtros selecionados.')
+    st.stop()
+
+# Carregar os dados: a versão, as colunas e o relatório vêm juntos, de uma só vez,
+# então uma recarga no meio desta execução não mistura versões
+data_source = load_data_source(tuple(partition.caminho for partition in selected_partitions))
+data_version, match_data, load_report, derived_data = data_source.atual()
+filter_index = derived_data['filter_index']
+startup.marcar('dados')
+
 # Filtro 1: Torneio
-if 'tournament' in df.columns:
-    tournaments = ['Todos'] + sorted(df['tournament'].dropna().unique().tolist())
-    st.sidebar.subheader('Torneio')
-    filter_tournament = st.sidebar.selectbox('Selecione o Torneio', tournaments)
+if 'tournament' in partition_filters:
+    filter_tournament = partition_filters['tournament']
+elif 'tournament' in match_data:
+    tournaments = [TODOS] + filter_index.valores('tournament')
+    tournament_box.subheader('Torneio')
+    filter_tournament = tournament_box.selectbox(
+        'Selecione o Torneio', clamp_choice('filter_tournament', tournaments), key='filter_tournament'
+    )
 else:
-    st.sidebar.warning("Coluna 'tournament' não encontrada.")
+    tournament_box.warning("Coluna 'tournament' não encontrada.")
     filter_tournament = 'Todos'
 
 # Filtro 2: Tipo de jogo (Casa ou Fora)
-if 'home_or_away' in df.columns:
-    home_away = ['Todos'] + sorted(df['home_or_away'].dropna().unique().tolist())
-    st.sidebar.subheader('Local do Jogo')
-    filter_home_away = st.sidebar.selectbox('Onde foi o Jogo?', home_away)
+if 'home_or_away' in match_data:
+    home_away = [TODOS] + filter_index.valores('home_or_away')
+    home_away_box.subheader('Local do Jogo')
+    filter_home_away = home_away_box.selectbox(
+        'Onde foi o Jogo?', clamp_choice('filter_home_away', home_away), key='filter_home_away'
+    )
 else:
-    st.sidebar.warning("Coluna 'home_or_away' não encontrada.")
+    home_away_box.warning("Coluna 'home_or_away' não encontrada.")
     filter_home_away = 'Todos'
 
-# Aplica os filtros
-df_filtered = df.copy()
+# Filtro 3: Ano (temporada)
+if 'ano' in partition_filters:
+    filter_year = partition_filters['ano']
+elif 'ano' in match_data:
+    year_box.subheader('Temporada')
+    filter_year = year_box.selectbox(
+        'Selecione o Ano', clamp_choice('filter_year', [TODOS] + filter_index.valores('ano')), key='filter_year'
+    )
+else:
+    filter_year = TODOS
+
+# Filtro 4: Posição do jogador
+if 'player_position' in match_data:
+    position_box.subheader('Posição')
+    filter_position = position_box.selectbox(
+        'Selecione a Posição',
+        clamp_choice('filter_position', [TODOS] + filter_index.valores('player_position')),
+        format_func=lambda position: POSITION_LABELS.get(position, position),
+        key='filter_position'
+    )
+else:
+    filter_position = TODOS
+
+# Escala das estatísticas: contagens brutas ou taxas por 90 minutos jogados,
+# para comparar titulares e reservas. Vale para todos os gráficos e testes
+if COLUNA_MINUTOS in match_data.colunas_numericas():
+    st.sidebar.markdown('---')
+    st.sidebar.subheader('Escala')
+    per_90 = st.sidebar.toggle('Por 90 minutos', key='per_90')
+    min_minutes = st.sidebar.number_input(
+        'Mínimo de minutos jogados', min_value=1, max_value=90, value=MINUTOS_MINIMOS, step=5,
+        key='per_90_min_minutes', disabled=not per_90
+    )
+else:
+    per_90 = False
+# None = contagens brutas; um número = taxas por 90 minutos com esse mínimo de minutos
+rate_minutes = int(min_minutes) if per_90 else None
+
+# Relatório da carga: preenchido no fim da página, depois que as seções leram suas colunas
+st.sidebar.markdown('---')
+load_report_box = st.sidebar.expander('Desempenho da Carga de Dados')
+startup.marcar('primeira_pintura')
+
+# Aplica os filtros: consulta as posições das linhas no índice, sem varrer nem copiar os dados
+filter_key = filter_index.chave(
+    tournament=filter_tournament,
+    home_or_away=filter_home_away,
+    ano=filter_year,
+    player_position=filter_position
+)
+
+# Torneio, temporada e posição se combinam livremente, e muitas combinações não têm
+# nenhum jogo (um torneio que o clube não disputou naquele ano, por exemplo)
+if len(filter_index.posicoes(filter_key)) == 0:
+    st.warning('Nenhum jogo atende aos filtros selecionados. Ajuste o torneio, a temporada ou a posição na barra lateral.')
+
+# Colunas numéricas conhecidas pelo esquema do arquivo, sem carregar os dados
+numeric_columns = match_data.colunas_numericas()
+statistics_columns = [col for col in numeric_columns if col.startswith('statistics_')]
+
+@st.cache_data(show_spinner=False)
+def per_90_matrix(version, key, min_minutes):
+    """
+    Todas as colunas numéricas das linhas do filtro, com as contagens
+    statistics_* convertidas em taxas por 90 minutos numa única operação de
+    matriz. Memorizada por filtro e mínimo de minutos, então alternar a escala
+    não recalcula nada.
+    """
+    values = match_data.matriz(numeric_columns, filter_index.posicoes(key))
+    minutes = values[:, numeric_columns.index(COLUNA_MINUTOS)]
+    return por_90(values, minutes, colunas_normalizaveis(numeric_columns), min_minutes)
 
-if filter_tournament != 'Todos':
-    df_filtered = df_filtered[df_filtered['tournament'] == filter_tournament]
+def filtered_values(version, key, columns, min_minutes=None):
+    """
+    Matriz das colunas nas linhas do filtro: contagens brutas (`min_minutes`
+    None) ou colunas recortadas da matriz por 90 minutos do filtro.
+    """
+    if min_minutes is None:
+        return match_data.matriz(columns, filter_index.posicoes(key))
+    return per_90_matrix(version, key, min_minutes)[:, [numeric_columns.index(col) for col in columns]]
 
-if filter_home_away != 'Todos':
-    df_filtered = df_filtered[df_filtered['home_or_away'] == filter_home_away]
+@st.cache_data(show_spinner=False)
+def column_stats(version, key, min_minutes=None):
+    """
+    Resumo descritivo (contagem, média, mediana, moda, desvio, erro padrão e
+    quantis) de todas as colunas numéricas, calculado de uma vez para uma
+    combinação de filtros e memorizado por ela.
+    """
+    values = filtered_values(version, key, numeric_columns, min_minutes)
+    if min_minutes is not None:
+        return resumo_estatistico(values, numeric_columns)
+    # Contagem, média e variância vêm dos momentos mantidos por filtro, que
+    # são atualizados (e não recalculados) quando partidas são anexadas
+    moments = derived_data['column_moments'].momentos(key, values)
+    return resumo_estatistico(values, numeric_columns, momentos=moments)
+
+@st.cache_data(show_spinner=False)
+def player_totals(version, key, min_minutes=None):
+    """
+    Totais por jogador (gols, assistências, finalizações, xG, xA, minutos e
+    jogos) para uma combinação de filtros, agregados pelo motor SQL direto dos
+    arquivos colunares. Compartilhado pelo gráfico e pela resposta da Seção 2.
+    Com `min_minutes`, as métricas viram taxas por 90 minutos, e os jogadores
+    com menos minutos no total ficam sem taxa.
+    """
+    totals = totais_por_jogador(derived_data['sql_engine'], filter_index.dimensoes, key)
+    if min_minutes is None:
+        return totals
+    rates = por_90(totals.to_numpy(), totals['minutos'].to_numpy(),
+                   ~totals.columns.isin(['minutos', 'jogos']), min_minutes)
+    return pd.DataFrame(rates, index=totals.index, columns=totals.columns)
+
+@st.cache_data(show_spinner=False)
+def table_columns_with_data(version, key):
+    """
+    Colunas com pelo menos um valor para a combinação de filtros.
+    """
+    return derived_data['filled_columns'].colunas_com_dados(key)
+
+@st.cache_data(show_spinner=False)
+def table_order(version, key, sort_column, ascending):
+    """
+    Posições das linhas filtradas na ordem pedida para a Tabela de Jogos.
+    A ordenação é feita no servidor e memorizada por filtro e coluna.
+    """
+    positions = filter_index.posicoes(key)
+    if sort_column == TABLE_ORIGINAL_ORDER:
+        return positions
+    return ordenar_posicoes(match_data.coluna(sort_column), positions, ascending)
+
+@st.cache_data(show_spinner=False)
+def column_histogram(version, key, min_minutes, column, bins=20):
+    """
+    Contagens e bordas do histograma de uma coluna para uma combinação de filtros.
+    Só as contagens seguem para o gráfico, não os valores brutos.
+    """
+    return histograma(filtered_values(version, key, [column], min_minutes)[:, 0], bins)
+
+@st.cache_data(show_spinner=False)
+def bootstrap_means(version, key, min_minutes, column, n_resamples):
+    """
+    Valores da coluna no filtro e as médias de suas reamostras bootstrap.
+    Memorizado por filtro, coluna e número de reamostras: mover o nível de
+    confiança reaproveita as mesmas reamostras.
+    """
+    values = filtered_values(version, key, [column], min_minutes)[:, 0]
+    values = values[~np.isnan(values)]
+    return values, medias_bootstrap(values, n_resamples)
+
+@st.cache_data(show_spinner=False)
+def bootstrap_interval(version, key, min_minutes, column, confidence, n_resamples, method):
+    """
+    Intervalo bootstrap (percentil ou BCa) da média de uma coluna.
+    """
+    values, means = bootstrap_means(version, key, min_minutes, column, n_resamples)
+    return intervalo_bootstrap(values, means, confidence, method)
+
+@st.cache_resource
+def permutation_executor():
+    """
+    Pool de processos compartilhado pelos testes de permutação, criado uma vez
+    por servidor e usando todos os núcleos.
+    """
+    return criar_executor()
+
+@st.cache_resource(show_spinner=False, max_entries=PERMUTATION_RUNS_KEPT)
+def permutation_run(version, key, min_minutes, column, method, hypothesized_value, alternative, max_permutations):
+    """
+    Teste de permutação da Seção 5: sinais (uma amostra, contra o valor
+    hipotético) ou casa x fora (diferença de médias entre os dois grupos).
+    As tarefas são enviadas ao pool e a função retorna logo, sem esperar por
+    elas; a mesma execução é compartilhada por todas as sessões que pedirem
+    o mesmo teste. Retorna None quando o filtro não tem jogos nos dois locais.
+    """
+    positions = filter_index.posicoes(key)
+    values = filtered_values(version, key, [column], min_minutes)[:, 0]
+    valid = ~np.isnan(values)
+
+    if method == 'sinais':
+        return iniciar_permutacao_uma_amostra(values[valid], hypothesized_value, alternative,
+                                              executor=permutation_executor(), n_maximo=max_permutations)
+
+    sides = match_data.coluna('home_or_away').take(positions).to_numpy(dtype=object)
+    home = values[valid & (sides == 'home')]
+    away = values[valid & (sides == 'away')]
+    if len(home) < 2 or len(away) < 2:
+        return None
+    return iniciar_permutacao_duas_amostras(home, away, alternative,
+                                            executor=permutation_executor(), n_maximo=max_permutations)
+
+@st.fragment(run_every=PERMUTATION_POLL_SECONDS)
+def permutation_progress(run):
+    """
+    Acompanha um teste de permutação em andamento: a cada intervalo recolhe
+    as rodadas que já terminaram e mostra o progresso, sem que a execução da
+    página espere pelo pool. Ao fim, reexecuta a página para exibir o resultado.
+    """
+    if run.avancar():
+        st.rerun()
+    st.progress(run.progresso(), text=f'Executando o teste de permutação: {run.permutacoes:,} de até {run.n_maximo:,} permutações...')
+
+@st.cache_data(show_spinner=False)
+def batch_tests(version, key, min_minutes, mode, alternative):
+    """
+    Testa todas as colunas statistics_* de uma vez para a combinação de
+    filtros: teste t de uma amostra contra a média geral (sem filtros) de cada
+    coluna, ou teste de Welch entre jogos em casa e fora. Os valores-p são
+    ajustados por Benjamini-Hochberg. Retorna None se faltar um dos locais.
+    """
+    positions = filter_index.posicoes(key)
+    values = filtered_values(version, key, statistics_columns, min_minutes)
+
+    if mode == 'uma_amostra':
+        overall_means = column_stats(version, filter_index.chave(), min_minutes).loc[statistics_columns, 'media'].to_numpy()
+        return testes_t_em_lote(values, statistics_columns, overall_means, alternative)
+
+    sides = match_data.coluna('home_or_away').take(positions).to_numpy(dtype=object)
+    if not (sides == 'home').any() or not (sides == 'away').any():
+        return None
+    results = testes_welch_em_lote(values[sides == 'home'], values[sides == 'away'], statistics_columns, alternative)
+    return results.rename(columns=lambda name: name.replace('_primeiro', '_casa').replace('_segundo', '_fora'))
+
+@st.cache_data(show_spinner=False)
+def similarity_index(version, key):
+    """
+    Índice de jogadores semelhantes para uma combinação de filtros: os perfis
+    por 90 minutos são montados e padronizados uma vez, e cada busca depois
+    é só um produto matriz-vetor.
+    """
+    profile_columns = colunas_perfil(numeric_columns)
+    positions = filter_index.posicoes(key)
+    values = match_data.matriz(profile_columns + [COLUNA_MINUTOS], positions)
+    players = match_data.coluna('player_name').take(positions).to_numpy(dtype=object)
+    profiles = perfis_por_jogador(values[:, :-1], profile_columns, players, values[:, -1])
+    return IndiceSimilaridade(profiles)
+
+@st.cache_data(show_spinner=False)
+def player_percentiles(version, key, min_minutes, by_position):
+    """
+    Percentis e postos de todos os jogadores do filtro em todas as colunas
+    statistics_* (totais, ou taxas por 90 minutos com `min_minutes`), no
+    grupo todo ou dentro da posição de cada um. Como no resto da página, as
+    taxas só usam os jogos com pelo menos `min_minutes` minutos. Montados uma
+    vez por combinação; a consulta de um jogador só lê a linha dele.
+    """
+    positions = filter_index.posicoes(key)
+    values = match_data.matriz(statistics_columns, positions)
+    if min_minutes:
+        kept = values[:, statistics_columns.index(COLUNA_MINUTOS)] >= min_minutes
+        positions, values = positions[kept], values[kept]
+    players = match_data.coluna('player_name').take(positions).to_numpy(dtype=object)
+    player_positions = (match_data.coluna('player_position').take(positions).to_numpy(dtype=object)
+                        if by_position and 'player_position' in match_data else None)
+    aggregate, main_positions = agregado_por_jogador(
+        values, statistics_columns, players, values[:, statistics_columns.index(COLUNA_MINUTOS)],
+        posicoes=player_positions, minutos_minimos=MINUTOS_MINIMOS_PERFIL if min_minutes else 0,
+        por_90_minutos=bool(min_minutes)
+    )
+    return PercentisJogadores(aggregate, main_positions)
+
+@st.cache_data(show_spinner=False)
+def filtered_matches(version, key):
+    """
+    Partidas com pelo menos uma linha no filtro, com placar e resultado do
+    clube, da mais recente para a mais antiga.
+    """
+    table = derived_data['match_table']
+    matches = table.partidas.iloc[table.partidas_das_linhas(filter_index.posicoes(key))]
+    matches = matches.join(resultados(matches))
+    return matches.sort_values([col for col in table.chave if col != 'time_alvo'], ascending=False)
+
+@st.cache_data(show_spinner=False)
+def match_totals(version):
+    """
+    Totais do time em cada partida para todas as colunas statistics_*,
+    somados de uma vez pelo código de partida das linhas.
+    """
+    table = derived_data['match_table']
+    totals = table.totais(match_data.matriz(statistics_columns))
+    return pd.DataFrame(totals, index=table.partidas.index, columns=statistics_columns)
+
+@st.cache_data(show_spinner=False)
+def finishing_efficiency(version, key, level):
+    """
+    Gols e assistências contra xG e xA, conversão e significância de Poisson
+    por jogador ou por partida, para uma combinação de filtros. As linhas do
+    filtro são somadas por grupo de uma só vez; ficam só as partidas com xG
+    medido e os grupos com xG ou finalizações.
+    """
+    positions = filter_index.posicoes(key)
+    if derived_data['match_table'] is not None:
+        xg = match_data.matriz(['statistics_expected_goals'], positions)[:, 0]
+        positions = positions[linhas_cobertas(xg, derived_data['match_table'].codigos[positions])]
+    columns = colunas_finalizacao(numeric_columns)
+    values = match_data.matriz(columns, positions)
+    if level == 'jogador':
+        codes, groups = pd.factorize(match_data.coluna('player_name').take(positions).to_numpy(dtype=object))
+        groups = pd.Index(groups, name='player_name')
+    else:
+        table = derived_data['match_table']
+        codes, match_ids = pd.factorize(table.codigos[positions])
+        matches = table.partidas.iloc[match_ids]
+        matches = matches.join(resultados(matches))
+        groups = pd.Index([
+            f"{row['ano']}·{row['jogo']} {row.get('home_team', '?')} {row['placar']} {row.get('away_team', '?')}"
+            for _, row in matches.iterrows()
+        ], name='partida')
+    valid = codes >= 0
+    results = eficiencia(values[valid], columns, codes[valid], groups)
+    return results[(results['xg'] > 0) | (results['finalizacoes'] > 0)]
+
+@st.cache_data(show_spinner=False)
+def correlation_matrix(version, key, min_minutes, method):
+    """
+    Correlações entre todas as colunas statistics_* do filtro (por par, só
+    com as linhas em que as duas têm valor) e a quantidade de linhas de cada
+    par, em contagens brutas ou por 90 minutos.
+    """
+    values = filtered_values(version, key, statistics_columns, min_minutes)
+    correlation, pairs = correlacoes(values, method, minimo_pares=CORRELATION_MIN_PAIRS)
+    return (pd.DataFrame(correlation, index=statistics_columns, columns=statistics_columns),
+            pd.DataFrame(pairs, index=statistics_columns, columns=statistics_columns))
+
+@st.cache_data(show_spinner=False)
+def rating_model(version):
+    """
+    Modelo da nota por posição para a versão dos dados, lido do disco quando
+    já foi ajustado (em qualquer sessão anterior) e ajustado e gravado senão.
+    Retorna o modelo e se ele veio do disco.
+    """
+    path = caminho_modelo(MODEL_DIR, version)
+    feature_columns = colunas_explicativas(numeric_columns)
+    if os.path.exists(path):
+        model = ModeloNota.carregar(path)
+        if model.colunas == feature_columns:
+            return model, True
+    positions = match_data.coluna('player_position').to_numpy(dtype=object)
+    groups = sorted({position for position in positions if pd.notna(position)})
+    values = match_data.matriz(feature_columns + [COLUNA_ALVO])
+    model = ModeloNota.ajustar(values[:, :-1], values[:, -1], pd.Index(groups).get_indexer(positions),
+                               groups, feature_columns)
+    model.salvar(path)
+    return model, False
+
+@st.cache_data(show_spinner=False)
+def rating_residuals(version, key):
+    """
+    Nota média, nota prevista pelo modelo da posição e resíduo médio de cada
+    jogador nas linhas do filtro.
+    """
+    model, _ = rating_model(version)
+    positions = filter_index.posicoes(key)
+    values = match_data.matriz(model.colunas + [COLUNA_ALVO], positions)
+    codes = pd.Index(model.grupos).get_indexer(match_data.coluna('player_position').take(positions).to_numpy(dtype=object))
+    predicted = model.prever(values[:, :-1], codes)
+    rows = pd.DataFrame({
+        'player_name': match_data.coluna('player_name').take(positions).to_numpy(dtype=object),
+        'nota': values[:, -1],
+        'prevista': predicted,
+    }).dropna()
+    rows['residuo'] = rows['nota'] - rows['prevista']
+    return rows.groupby('player_name').agg(
+        jogos=('residuo', 'size'), nota_media=('nota', 'mean'),
+        prevista_media=('prevista', 'mean'), residuo_medio=('residuo', 'mean'),
+    )
 
 # --- 4. Tabela de Jogos e Resumo das Perguntas ---
-st.markdown(f'<div class="section-card">', unsafe_allow_html=True)
-st.markdown(f'<h2>Tabela de Jogos</h2>', unsafe_allow_html=True)
-st.markdown('Esta tabela exibe os dados dos jogos, permitindo uma visão geral das informações disponíveis.')
-df_table = df_filtered.drop(columns=[col for col in df_filtered.columns if df_filtered[col].isnull().all()])
-st.dataframe(df_table, use_container_width=True)
-st.markdown('</div>', unsafe_allow_html=True)
-st.markdown('---')
+def reset_table_page():
+    """
+    Volta a Tabela de Jogos para a primeira página quando a ordenação ou o
+    tamanho da página muda, em vez de cair no meio da nova ordem.
+    """
+    st.session_state['table_page'] = 1
+
+@st.fragment
+def games_table(key):
+    """
+    Tabela de Jogos paginada. Controles de ordenação e de página reexecutam
+    apenas este bloco.
+    """
+    positions = filter_index.posicoes(key)
+    st.markdown(f'<div class="section-card">', unsafe_allow_html=True)
+    st.markdown(f'<h2>Tabela de Jogos</h2>', unsafe_allow_html=True)
+    st.markdown('Esta tabela exibe os dados dos jogos, permitindo uma visão geral das informações disponíveis.')
+    # Somente as colunas escolhidas e as linhas da página visível são montadas e enviadas
+    table_default_columns = [col for col in TABLE_DEFAULT_COLUMNS if col in match_data]
+    table_columns = st.multiselect('Colunas exibidas', match_data.colunas, default=table_default_columns, key='table_columns')
+    # Colunas sem nenhum valor no filtro atual são descartadas, como antes, mas sem varrer os dados
+    filled_columns = set(table_columns_with_data(data_version, key))
+    table_columns = [col for col in table_columns if col in filled_columns]
+
+    col_sort, col_direction, col_page_size, col_page = st.columns(4)
+    with col_sort:
+        table_sort_column = st.selectbox('Ordenar por', [TABLE_ORIGINAL_ORDER] + table_columns, key='table_sort',
+                                         on_change=reset_table_page)
+    with col_direction:
+        table_ascending = st.selectbox('Ordem', ['Crescente', 'Decrescente'], key='table_direction',
+                                       on_change=reset_table_page) == 'Crescente'
+    with col_page_size:
+        table_page_size = st.selectbox('Linhas por página', TABLE_PAGE_SIZES, index=1, key='table_page_size',
+                                       on_change=reset_table_page)
+    table_pages = total_paginas(len(positions), table_page_size)
+    with col_page:
+        table_page = st.number_input('Página', min_value=1, max_value=table_pages, step=1, key='table_page')
+
+    table_rows = fatia_pagina(table_order(data_version, key, table_sort_column, table_ascending), table_page, table_page_size)
+    df_table = match_data.frame(table_columns, table_rows)
+    st.dataframe(df_table, use_container_width=True)
+    st.caption(f'Página {table_page} de {table_pages} · {len(positions):,} linhas com os filtros selecionados')
+    st.markdown('</div>', unsafe_allow_html=True)
+    st.markdown('---')
+
+games_table(filter_key)
+
+# --- Navegador de Partidas ---
+@st.fragment
+def section_match_browser(key):
+    """
+    Resultados das partidas do filtro e, para a partida escolhida, a
+    escalação e os totais do time. Trocar de partida reexecuta apenas esta seção.
+    """
+    st.markdown(f'<div class="section-card">', unsafe_allow_html=True)
+    st.markdown('<h2>Navegador de Partidas</h2>', unsafe_allow_html=True)
+    table = derived_data['match_table']
+    if table is None:
+        st.info("As colunas 'ano' e 'jogo', que identificam as partidas, não foram encontradas.")
+        return
+
+    matches = filtered_matches(data_version, key)
+    if matches.empty:
+        st.info("Nenhuma partida encontrada com os filtros selecionados.")
+        return
+
+    summary_columns = [col for col in ['ano', 'jogo', 'tournament', 'home_team', 'placar', 'away_team',
+                                       'stadium', 'resultado'] if col in matches]
+    st.dataframe(matches[summary_columns], hide_index=True, use_container_width=True)
+    outcomes = matches['resultado'].value_counts()
+    st.caption(
+        f"{len(matches):,} partidas · {outcomes.get('Vitória', 0)} vitórias, "
+        f"{outcomes.get('Empate', 0)} empates e {outcomes.get('Derrota', 0)} derrotas"
+    )
+
+    def match_label(match):
+        row = matches.loc[match]
+        return (f"{row['ano']} · jogo {row['jogo']} · {row.get('home_team', '?')} {row['placar']} "
+                f"{row.get('away_team', '?')}")
+
+    match = st.selectbox('Selecione a partida', list(matches.index), format_func=match_label, key='match_browser')
+    row = matches.loc[match]
+    col_score, col_info = st.columns([1, 2])
+    with col_score:
+        st.metric(label=f"Resultado ({row['resultado']})", value=row['placar'])
+    with col_info:
+        details = [(label, row[col]) for label, col in [
+            ('Torneio', 'tournament'), ('Estádio', 'stadium'),
+            ('Técnico da casa', 'home_manager'), ('Técnico visitante', 'away_manager'),
+        ] if col in row.index and pd.notna(row[col])]
+        st.markdown('  \n'.join(f'**{label}:** {value}' for label, value in details))
+
+    col_lineup, col_totals = st.columns([3, 2])
+    with col_lineup:
+        st.subheader('Escalação')
+        lineup = match_data.frame([col for col in LINEUP_COLUMNS if col in match_data], table.linhas(match))
+        if 'player_sub' in lineup:
+            lineup = lineup.sort_values('player_sub', kind='stable')
+        st.dataframe(lineup, hide_index=True, use_container_width=True)
+    with col_totals:
+        st.subheader('Totais do Time')
+        totals = match_totals(data_version).loc[match].dropna()
+        st.dataframe(totals[totals != 0].rename('total').to_frame(), use_container_width=True)
+    st.markdown('</div>', unsafe_allow_html=True)
+    st.markdown('---')
+
+section_match_browser(filter_key)
 
 st.markdown('### Perguntas a serem respondidas na análise:')
 st.markdown("""
@@ -168,343 +868,857 @@ st.markdown("""
 st.markdown('---')
 
 # --- Seção 1: Pergunta 1 ---
-st.markdown(f'<div class="section-card">', unsafe_allow_html=True)
-st.markdown('<h2>Seção 1: Análise das Variáveis</h2>', unsafe_allow_html=True)
-st.markdown('### Pergunta 1: Qual a classificação das variáveis no conjunto de dados?')
-st.markdown('---')
-col_tool, col_resp = st.columns([3, 1])
-
-with col_tool:
-    st.subheader('Tabela de Classificação de Dados')
-    data = {
-        'Variável': [
-            '`team_name`', '`home_or_away`', '`tournament`', '`player_name`', '`player_position`',
-            '`statistics_goals`', '`statistics_assists`', '`statistics_total_passes`', '`statistics_accurate_shots`', '`player_number`'
-        ],
-        'Tipo de dado': [
-            'Qualitativa (Nominal)', 'Qualitativa (Nominal)', 'Qualitativa (Nominal)', 'Qualitativa (Nominal)', 'Qualitativa (Nominal)',
-            'Quantitativa (Discreta)', 'Quantitativa (Discreta)', 'Quantitativa (Discreta)', 'Quantitativa (Discreta)', 'Quantitativa (Discreta)'
-        ],
-        'Explicação': [
-            'Categoria para o nome do time.', 'Categoria para o local do jogo.', 'Categoria para o nome do torneio.', 'Categoria para o nome do jogador.', 'Categoria para a posição do jogador.',
-            'Número de gols (contagem).', 'Número de assistências (contagem).', 'Número total de passes (contagem).', 'Número de chutes precisos (contagem).', 'Número da camisa (identificador numérico).'
-        ]
-    }
-    df_types = pd.DataFrame(data)
-    st.dataframe(df_types, use_container_width=True)
-    st.markdown("""
-    Esta tabela detalha cada variável do conjunto de dados, classificando-a como **Qualitativa** (descrições) ou **Quantitativa** (números). É o ponto de partida para qualquer análise.
-    """)
-
-with col_resp:
-    st.markdown('<div class="text-card">', unsafe_allow_html=True)
-    st.subheader('Resposta da Pergunta 1')
-    st.success("""
-    O conjunto de dados apresenta uma composição diversificada, combinando variáveis **qualitativas** e **quantitativas**. As variáveis qualitativas, como o `tournament` e a `player_position`, são essenciais para categorizar os dados, enquanto as variáveis quantitativas, como o `statistics_goals` e os `statistics_total_passes`, fornecem os valores numéricos para as análises estatísticas mais aprofundadas. Esta diversidade permite que a análise explore tanto as características descritivas quanto o desempenho numérico do time e dos jogadores.
-    """)
-    st.subheader('Explicação da Resposta')
-    st.markdown("""
-    A distinção entre esses tipos de dados é o primeiro e mais crucial passo para uma análise estatística. As variáveis qualitativas (`team_name`, `tournament`) permitem agrupar e categorizar os dados, enquanto as variáveis quantitativas (`statistics_goals`, `statistics_total_passes`) possibilitam a realização de cálculos e testes estatísticos, como médias, desvios e regressões.
-    """)
+@st.fragment
+def section_variables():
+    """
+    Seção 1: classificação das variáveis do conjunto de dados.
+    """
+    st.markdown(f'<div class="section-card">', unsafe_allow_html=True)
+    st.markdown('<h2>Seção 1: Análise das Variáveis</h2>', unsafe_allow_html=True)
+    st.markdown('### Pergunta 1: Qual a classificação das variáveis no conjunto de dados?')
+    st.markdown('---')
+    col_tool, col_resp = st.columns([3, 1])
+
+    with col_tool:
+        st.subheader('Tabela de Classificação de Dados')
+        data = {
+            'Variável': [
+                '`team_name`', '`home_or_away`', '`tournament`', '`player_name`', '`player_position`',
+                '`statistics_goals`', '`statistics_assists`', '`statistics_total_passes`', '`statistics_accurate_shots`', '`player_number`'
+            ],
+            'Tipo de dado': [
+                'Qualitativa (Nominal)', 'Qualitativa (Nominal)', 'Qualitativa (Nominal)', 'Qualitativa (Nominal)', 'Qualitativa (Nominal)',
+                'Quantitativa (Discreta)', 'Quantitativa (Discreta)', 'Quantitativa (Discreta)', 'Quantitativa (Discreta)', 'Quantitativa (Discreta)'
+            ],
+            'Explicação': [
+                'Categoria para o nome do time.', 'Categoria para o local do jogo.', 'Categoria para o nome do torneio.', 'Categoria para o nome do jogador.', 'Categoria para a posição do jogador.',
+                'Número de gols (contagem).', 'Número de assistências (contagem).', 'Número total de passes (contagem).', 'Número de chutes precisos (contagem).', 'Número da camisa (identificador numérico).'
+            ]
+        }
+        df_types = pd.DataFrame(data)
+        st.dataframe(df_types, use_container_width=True)
+        st.markdown("""
+        Esta tabela detalha cada variável do conjunto de dados, classificando-a como **Qualitativa** (descrições) ou **Quantitativa** (números). É o ponto de partida para qualquer análise.
+        """)
+
+    with col_resp:
+        st.markdown('<div class="text-card">', unsafe_allow_html=True)
+        st.subheader('Resposta da Pergunta 1')
+        st.success("""
+        O conjunto de dados apresenta uma composição diversificada, combinando variáveis **qualitativas** e **quantitativas**. As variáveis qualitativas, como o `tournament` e a `player_position`, são essenciais para categorizar os dados, enquanto as variáveis quantitativas, como o `statistics_goals` e os `statistics_total_passes`, fornecem os valores numéricos para as análises estatísticas mais aprofundadas. Esta diversidade permite que a análise explore tanto as características descritivas quanto o desempenho numérico do time e dos jogadores.
+        """)
+        st.subheader('Explicação da Resposta')
+        st.markdown("""
+        A distinção entre esses tipos de dados é o primeiro e mais crucial passo para uma análise estatística. As variáveis qualitativas (`team_name`, `tournament`) permitem agrupar e categorizar os dados, enquanto as variáveis quantitativas (`statistics_goals`, `statistics_total_passes`) possibilitam a realização de cálculos e testes estatísticos, como médias, desvios e regressões.
+        """)
+        st.markdown('</div>', unsafe_allow_html=True)
     st.markdown('</div>', unsafe_allow_html=True)
-st.markdown('</div>', unsafe_allow_html=True)
-st.markdown('---')
+    st.markdown('---')
+
+section_variables()
 
 # --- Seção 2: Pergunta 2 ---
-st.markdown(f'<div class="section-card">', unsafe_allow_html=True)
-st.markdown('<h2>Seção 2: Análise de Gols</h2>', unsafe_allow_html=True)
-st.markdown('### Pergunta 2: Quais jogadores marcaram mais gols e qual o total de gols encontrados?')
-st.markdown('---')
-col_tool, col_resp = st.columns([3, 1])
-
-with col_tool:
-    st.subheader('Gráfico de Gols por Jogador')
-    if 'statistics_goals' in df_filtered.columns and pd.api.types.is_numeric_dtype(df_filtered['statistics_goals']):
-        goals_df = df_filtered[df_filtered['statistics_goals'] > 0]
-        
-        if not goals_df.empty:
-            goals_by_player = goals_df.groupby('player_name')['statistics_goals'].sum().reset_index()
-            goals_by_player = goals_by_player.sort_values(by='statistics_goals', ascending=False)
-            
-            total_goals = goals_by_player['statistics_goals'].sum()
-            st.info(f"Total de gols encontrados: **{total_goals:,.0f}**")
-            
-            fig_goals = px.bar(goals_by_player, x='player_name', y='statistics_goals',
-                             title="Gols Marcados por Jogador",
-                             labels={'player_name': 'Jogador', 'statistics_goals': 'Total de Gols'},
-                             color_discrete_sequence=px.colors.qualitative.Plotly)
-            st.plotly_chart(fig_goals, use_container_width=True)
+@st.fragment
+def section_goals(key, min_minutes):
+    """
+    Seção 2: gols por jogador, agregados pelo motor SQL para o filtro (em
+    totais ou por 90 minutos).
+    """
+    goals_label = 'Gols por 90 min' if min_minutes else 'Total de Gols'
+
+    st.markdown(f'<div class="section-card">', unsafe_allow_html=True)
+    st.markdown('<h2>Seção 2: Análise de Gols</h2>', unsafe_allow_html=True)
+    st.markdown('### Pergunta 2: Quais jogadores marcaram mais gols e qual o total de gols encontrados?')
+    st.markdown('---')
+    col_tool, col_resp = st.columns([3, 1])
+
+    with col_tool:
+        st.subheader('Gráfico de Gols por Jogador')
+        if 'statistics_goals' in numeric_columns:
+            totals_by_player = player_totals(data_version, key, min_minutes)
+            scorers = totals_by_player[totals_by_player['gols'] > 0]
+            total_goals = player_totals(data_version, key)['gols'].sum()
+
+            if not scorers.empty:
+                goals_by_player = maiores(scorers, 'gols', len(scorers)).reset_index()
+
+                st.info(f"Total de gols encontrados: **{total_goals:,.0f}**")
+                if min_minutes:
+                    st.caption(f'Gols a cada 90 minutos jogados, entre os jogadores com pelo menos {min_minutes} minutos no total.')
+
+                fig_goals = px.bar(goals_by_player, x='player_name', y='gols',
+                                 title=f"Gols Marcados por Jogador{' (por 90 min)' if min_minutes else ''}",
+                                 labels={'player_name': 'Jogador', 'gols': goals_label},
+                                 color_discrete_sequence=px.colors.qualitative.Plotly)
+                st.plotly_chart(fig_goals, use_container_width=True)
+            else:
+                st.info("Nenhum gol encontrado com os filtros selecionados.")
         else:
-            st.info("Nenhum gol encontrado com os filtros selecionados.")
-    else:
-        st.info("A coluna 'statistics_goals' não foi encontrada ou não é numérica.")
-
-with col_resp:
-    st.markdown('<div class="text-card">', unsafe_allow_html=True)
-    st.subheader('Resposta da Pergunta 2')
-    if 'statistics_goals' in df_filtered.columns and pd.api.types.is_numeric_dtype(df_filtered['statistics_goals']):
-        goals_df = df_filtered[df_filtered['statistics_goals'] > 0]
-        if not goals_df.empty:
-            goals_by_player = goals_df.groupby('player_name')['statistics_goals'].sum().reset_index()
-            goals_by_player = goals_by_player.sort_values(by='statistics_goals', ascending=False)
-            total_goals = goals_by_player['statistics_goals'].sum()
-            top_scorer = goals_by_player.iloc[0]['player_name']
-            top_scorer_goals = goals_by_player.iloc[0]['statistics_goals']
-            st.success(f"""
-            O total de gols encontrados no conjunto de dados é de **{total_goals:,.0f}**. Deste total, o artilheiro do time é o jogador **{top_scorer}**, que contribuiu com uma parte significativa, marcando **{top_scorer_goals:,.0f}** gols. A análise do gráfico de barras mostra a distribuição de gols entre todos os jogadores, destacando a importância de {top_scorer} para o desempenho ofensivo da equipe.
-            """)
+            st.info("A coluna 'statistics_goals' não foi encontrada ou não é numérica.")
+
+    with col_resp:
+        st.markdown('<div class="text-card">', unsafe_allow_html=True)
+        st.subheader('Resposta da Pergunta 2')
+        if 'statistics_goals' in numeric_columns:
+            if not scorers.empty:
+                # Só o artilheiro é necessário aqui: seleção parcial, sem ordenar todos os jogadores
+                top_row = maiores(scorers, 'gols', 1)
+                top_scorer = top_row.index[0]
+                top_scorer_goals = top_row['gols'].iloc[0]
+                if min_minutes:
+                    st.success(f"""
+                O total de gols encontrados no conjunto de dados é de **{total_goals:,.0f}**. Considerando os minutos jogados, o jogador mais eficiente é **{top_scorer}**, com **{top_scorer_goals:,.2f}** gols a cada 90 minutos. A taxa por 90 minutos coloca titulares e reservas na mesma escala, destacando quem marca mais pelo tempo que fica em campo.
+                """)
+                else:
+                    st.success(f"""
+                O total de gols encontrados no conjunto de dados é de **{total_goals:,.0f}**. Deste total, o artilheiro do time é o jogador **{top_scorer}**, que contribuiu com uma parte significativa, marcando **{top_scorer_goals:,.0f}** gols. A análise do gráfico de barras mostra a distribuição de gols entre todos os jogadores, destacando a importância de {top_scorer} para o desempenho ofensivo da equipe.
+                """)
+            else:
+                st.warning("""
+                Nenhum gol foi encontrado com os filtros selecionados, impossibilitando a análise.
+                """)
         else:
-            st.warning("""
-            Nenhum gol foi encontrado com os filtros selecionados, impossibilitando a análise.
+            st.error("""
+            A coluna `statistics_goals` não foi encontrada no conjunto de dados.
             """)
-    else:
-        st.error("""
-        A coluna `statistics_goals` não foi encontrada no conjunto de dados.
+        st.subheader('Análise do Gráfico')
+        st.markdown("""
+        O gráfico de barras visualiza a quantidade total de gols marcados por cada jogador, permitindo que você identifique rapidamente os artilheiros do time. A altura de cada barra corresponde ao número de gols, e a interação com o mouse revela informações detalhadas.
         """)
-    st.subheader('Análise do Gráfico')
-    st.markdown("""
-    O gráfico de barras visualiza a quantidade total de gols marcados por cada jogador, permitindo que você identifique rapidamente os artilheiros do time. A altura de cada barra corresponde ao número de gols, e a interação com o mouse revela informações detalhadas.
-    """)
+        st.markdown('</div>', unsafe_allow_html=True)
     st.markdown('</div>', unsafe_allow_html=True)
-st.markdown('</div>', unsafe_allow_html=True)
-st.markdown('---')
+    st.markdown('---')
 
-# --- Seção 3: Pergunta 3 ---
-st.markdown(f'<div class="section-card">', unsafe_allow_html=True)
-st.markdown(f'<h2>Seção 3: Análise de Distribuição</h2>', unsafe_allow_html=True)
-st.markdown('### Pergunta 3: Qual é a distribuição de uma variável numérica, como o total de passes, e como se comparam suas medidas de tendência central?')
-st.markdown('---')
-col_graph_stats, col_text_stats = st.columns([3, 1])
+section_goals(filter_key, rate_minutes)
 
-with col_graph_stats:
-    st.subheader('Distribuição de Dados com Medidas Estatísticas')
-    
-    numeric_cols = df_filtered.select_dtypes(include=['number']).columns.tolist()
-    if 'statistics_total_passes' in numeric_cols:
-        selected_col = 'statistics_total_passes'
-    elif numeric_cols:
-        selected_col = st.selectbox('Selecione uma coluna para análise', numeric_cols, key='dist_analysis_select')
-    else:
-        st.warning("Não há colunas numéricas no seu arquivo para realizar a análise.")
-        st.stop()
-        
-    data_to_analyze = df_filtered[selected_col].dropna()
-
-    if not data_to_analyze.empty:
-        fig = px.histogram(data_to_analyze, x=selected_col, nbins=20, 
-                           title=f'Histograma da coluna {selected_col}', 
-                           template='plotly_dark')
-        
-        mean_val = data_to_analyze.mean()
-        fig.add_vline(x=mean_val, line_width=4, line_dash="dash", line_color="red", 
-                      annotation_text=f"Média: {mean_val:,.2f}", annotation_position="top right", 
-                      annotation_font_color="red")
-        
-        median_val = data_to_analyze.median()
-        fig.add_vline(x=median_val, line_width=4, line_dash="dash", line_color="green", 
-                      annotation_text=f"Mediana: {median_val:,.2f}", annotation_position="top left",
-                      annotation_font_color="green")
-        
-        mode_result = data_to_analyze.mode()
-        if not mode_result.empty and len(mode_result) == 1:
-            mode_val = mode_result[0] 
-            fig.add_vline(x=mode_val, line_width=4, line_dash="dash", line_color="yellow", 
-                          annotation_text=f"Moda: {mode_val:,.2f}", annotation_position="bottom right",
-                          annotation_font_color="yellow")
-        
-        st.plotly_chart(fig, use_container_width=True)
-    else:
-        st.info("Não há dados suficientes para criar o gráfico com os filtros selecionados.") 
-
-with col_text_stats:
-    st.markdown('<div class="text-card">', unsafe_allow_html=True)
-    st.subheader('Resposta da Pergunta 3')
-    if not data_to_analyze.empty:
-        mean_val = data_to_analyze.mean()
-        median_val = data_to_analyze.median()
-        mode_result = data_to_analyze.mode()
-        
-        st.success(f"""
-        A distribuição dos dados para a variável **`{selected_col}`** é concentrada em torno das medidas de tendência central, que são notavelmente próximas umas das outras. A **Média** (`{mean_val:,.2f}`), a **Mediana** (`{median_val:,.2f}`) e a **Moda** (`{mode_result[0]:,.2f}` se houver) se alinham de perto, indicando que a distribuição é bastante simétrica, com pouca influência de valores extremos. Isso sugere que a maioria dos jogadores ou eventos está consistentemente dentro de um desempenho esperado para esta variável.
-        """)
-    else:
+# --- Seção 3: Pergunta 3 ---
+@st.fragment
+def section_distribution(key, min_minutes):
+    """
+    Seção 3: distribuição de uma coluna numérica e suas medidas de tendência
+    central. A troca de coluna reexecuta apenas esta seção.
+    """
+    scale_suffix = ' (por 90 min)' if min_minutes else ''
+    st.markdown(f'<div class="section-card">', unsafe_allow_html=True)
+    st.markdown(f'<h2>Seção 3: Análise de Distribuição</h2>', unsafe_allow_html=True)
+    st.markdown('### Pergunta 3: Qual é a distribuição de uma variável numérica, como o total de passes, e como se comparam suas medidas de tendência central?')
+    st.markdown('---')
+    if len(filter_index.posicoes(key)) == 0:
         st.warning("Não há dados para analisar a distribuição. Por favor, ajuste os filtros.")
+        return
+    stats_summary = column_stats(data_version, key, min_minutes)
+    col_graph_stats, col_text_stats = st.columns([3, 1])
 
-    st.subheader('Explicação da Resposta') 
-    st.markdown("""
-    * **Média (linha vermelha):** É o valor central, ou a média aritmética dos dados. É sensível a valores extremos. 
-    * **Mediana (linha verde):** É o valor que divide a amostra exatamente ao meio. 50% dos dados estão abaixo dele e 50% estão acima. É menos sensível a valores extremos. 
-    * **Moda (linha amarela):** É o valor que aparece com mais frequência. 
-    
-    A proximidade desses valores no histograma indica que a distribuição não tem grandes picos ou dispersões extremas, o que a torna um bom resumo para o conjunto de dados.
-    """)
+    with col_graph_stats:
+        st.subheader('Distribuição de Dados com Medidas Estatísticas')
+
+        numeric_cols = numeric_columns
+        if 'statistics_total_passes' in numeric_cols:
+            selected_col = 'statistics_total_passes'
+        elif numeric_cols:
+            selected_col = st.selectbox('Selecione uma coluna para análise', numeric_cols, key='dist_analysis_select')
+        else:
+            st.warning("Não há colunas numéricas no seu arquivo para realizar a análise.")
+            return
+
+        col_summary = stats_summary.loc[selected_col]
+
+        if col_summary['contagem'] > 0:
+            hist_counts, hist_edges = column_histogram(data_version, key, min_minutes, selected_col)
+            fig = figura_histograma(hist_counts, hist_edges,
+                                    titulo=f'Histograma da coluna {selected_col}{scale_suffix}',
+                                    rotulo_x=f'{selected_col}{scale_suffix}')
+
+            mean_val = col_summary['media']
+            fig.add_vline(x=mean_val, line_width=4, line_dash="dash", line_color="red", 
+                          annotation_text=f"Média: {mean_val:,.2f}", annotation_position="top right", 
+                          annotation_font_color="red")
+
+            median_val = col_summary['mediana']
+            fig.add_vline(x=median_val, line_width=4, line_dash="dash", line_color="green", 
+                          annotation_text=f"Mediana: {median_val:,.2f}", annotation_position="top left",
+                          annotation_font_color="green")
+
+            if col_summary['moda_unica']:
+                mode_val = col_summary['moda']
+                fig.add_vline(x=mode_val, line_width=4, line_dash="dash", line_color="yellow", 
+                              annotation_text=f"Moda: {mode_val:,.2f}", annotation_position="bottom right",
+                              annotation_font_color="yellow")
+
+            st.plotly_chart(fig, use_container_width=True)
+        else:
+            st.info("Não há dados suficientes para criar o gráfico com os filtros selecionados.") 
+
+    with col_text_stats:
+        st.markdown('<div class="text-card">', unsafe_allow_html=True)
+        st.subheader('Resposta da Pergunta 3')
+        if col_summary['contagem'] > 0:
+            mean_val = col_summary['media']
+            median_val = col_summary['mediana']
+            mode_val = col_summary['moda']
+
+            st.success(f"""
+            A distribuição dos dados para a variável **`{selected_col}`** é concentrada em torno das medidas de tendência central, que são notavelmente próximas umas das outras. A **Média** (`{mean_val:,.2f}`), a **Mediana** (`{median_val:,.2f}`) e a **Moda** (`{mode_val:,.2f}` se houver) se alinham de perto, indicando que a distribuição é bastante simétrica, com pouca influência de valores extremos. Isso sugere que a maioria dos jogadores ou eventos está consistentemente dentro de um desempenho esperado para esta variável.
+            """)
+        else:
+            st.warning("Não há dados para analisar a distribuição. Por favor, ajuste os filtros.")
+
+        st.subheader('Explicação da Resposta') 
+        st.markdown("""
+        * **Média (linha vermelha):** É o valor central, ou a média aritmética dos dados. É sensível a valores extremos. 
+        * **Mediana (linha verde):** É o valor que divide a amostra exatamente ao meio. 50% dos dados estão abaixo dele e 50% estão acima. É menos sensível a valores extremos. 
+        * **Moda (linha amarela):** É o valor que aparece com mais frequência. 
+
+        A proximidade desses valores no histograma indica que a distribuição não tem grandes picos ou dispersões extremas, o que a torna um bom resumo para o conjunto de dados.
+        """)
+        st.markdown('</div>', unsafe_allow_html=True)
     st.markdown('</div>', unsafe_allow_html=True)
-st.markdown('</div>', unsafe_allow_html=True)
-st.markdown('---')
+    st.markdown('---')
+
+section_distribution(filter_key, rate_minutes)
 
  # --- Seção 4: Pergunta 4 --- 
-st.markdown(f'<div class="section-card">', unsafe_allow_html=True)
-st.markdown(f'<h2>Seção 4: Análise de Intervalo de Confiança</h2>', unsafe_allow_html=True)
-st.markdown('### Pergunta 4: Qual é a estimativa mais provável para a média do número de chutes ao gol de um jogador?')
-st.markdown('---')
-col_ic_tool, col_ic_resp = st.columns([3, 1])
+@st.fragment
+def section_confidence_interval(key, min_minutes):
+    """
+    Seção 4: intervalo de confiança da média. Mover o nível de confiança
+    reexecuta apenas esta seção.
+    """
+    st.markdown(f'<div class="section-card">', unsafe_allow_html=True)
+    st.markdown(f'<h2>Seção 4: Análise de Intervalo de Confiança</h2>', unsafe_allow_html=True)
+    st.markdown('### Pergunta 4: Qual é a estimativa mais provável para a média do número de chutes ao gol de um jogador?')
+    st.markdown('---')
+    if len(filter_index.posicoes(key)) == 0:
+        st.warning("Não há dados suficientes para calcular o intervalo de confiança.")
+        return
+    stats_summary = column_stats(data_version, key, min_minutes)
+    col_ic_tool, col_ic_resp = st.columns([3, 1])
 
-with col_ic_tool:
-    st.subheader('Intervalo de Confiança') 
+    with col_ic_tool:
+        st.subheader('Intervalo de Confiança') 
 
-    numeric_cols_ic = df_filtered.select_dtypes(include=['number']).columns.tolist()
-    if 'statistics_total_shots' in numeric_cols_ic:
-        selected_col_ic = 'statistics_total_shots'
-    elif numeric_cols_ic:
-        selected_col_ic = st.selectbox('Selecione uma coluna para análise de IC', numeric_cols_ic, key='ic_select')
-    else:
-        st.warning("Não há colunas numéricas para realizar a análise de Intervalo de Confiança.") 
-        st.stop()
-        
-    data_to_analyze_ic = df_filtered[selected_col_ic].dropna()
-
-    if len(data_to_analyze_ic) > 1:
-        st.markdown('**Configurações do Intervalo de Confiança**') 
-        confidence_level = st.slider(
-            'Selecione o Nível de Confiança (%)', 
-            min_value=80,
-            max_value=99,
-            value=95,
-            step=1,
-            key='ic_slider'
-        ) / 100.0
-
-        mean_ic = data_to_analyze_ic.mean()
-        n_ic = len(data_to_analyze_ic)
-        std_err_ic = stats.sem(data_to_analyze_ic)
-        
-        interval = stats.t.interval(confidence_level, n_ic - 1, loc=mean_ic, scale=std_err_ic)
-
-        st.markdown(f"**Média da amostra:** `{mean_ic:,.2f}`") 
-        st.metric(
-            label=f"Intervalo de Confiança ({confidence_level*100:.0f}%)", 
-            value=f"De {interval[0]:,.2f} a {interval[1]:,.2f}"
+        numeric_cols_ic = numeric_columns
+        if 'statistics_total_shots' in numeric_cols_ic:
+            selected_col_ic = 'statistics_total_shots'
+        elif numeric_cols_ic:
+            selected_col_ic = st.selectbox('Selecione uma coluna para análise de IC', numeric_cols_ic, key='ic_select')
+        else:
+            st.warning("Não há colunas numéricas para realizar a análise de Intervalo de Confiança.") 
+            return
+
+        ic_summary = stats_summary.loc[selected_col_ic]
+
+        if ic_summary['contagem'] > 1:
+            st.markdown('**Configurações do Intervalo de Confiança**') 
+            confidence_level = st.slider(
+                'Selecione o Nível de Confiança (%)', 
+                min_value=80,
+                max_value=99,
+                value=95,
+                step=1,
+                key='ic_slider'
+            ) / 100.0
+
+            # O bootstrap não supõe normalidade, o que importa em contagens com muitos zeros
+            ic_method_label = st.radio('Método do intervalo', list(CI_METHODS), horizontal=True, key='ic_method')
+            ic_method = CI_METHODS[ic_method_label]
+
+            mean_ic = ic_summary['media']
+            n_ic = ic_summary['contagem']
+            std_err_ic = ic_summary['erro_padrao']
+
+            if ic_method is None:
+                interval = stats.t.interval(confidence_level, n_ic - 1, loc=mean_ic, scale=std_err_ic)
+            else:
+                n_resamples = st.select_slider('Número de reamostras', BOOTSTRAP_RESAMPLES, value=5000, key='ic_resamples')
+                interval = bootstrap_interval(data_version, key, min_minutes, selected_col_ic, confidence_level,
+                                              n_resamples, ic_method)
+
+            st.markdown(f"**Média da amostra:** `{mean_ic:,.2f}`") 
+            st.metric(
+                label=f"Intervalo de Confiança ({confidence_level*100:.0f}%)", 
+                value=f"De {interval[0]:,.2f} a {interval[1]:,.2f}"
+            )
+            st.caption(f"Método: {ic_method_label}{' · valores por 90 minutos' if min_minutes else ''}")
+        else:
+            st.info("Não há dados suficientes para calcular o intervalo de confiança com os filtros selecionados.") 
+
+    with col_ic_resp:
+        st.markdown('<div class="text-card">', unsafe_allow_html=True)
+        st.subheader('Resposta da Pergunta 4') 
+        if ic_summary['contagem'] > 1:
+            st.success(f"""
+            Com base na amostra de dados e no nível de confiança de **{confidence_level*100:.0f}%** que você selecionou, a média real do número de chutes a gol por jogador na população completa de dados tem uma alta probabilidade de estar entre **{interval[0]:,.2f}** e **{interval[1]:,.2f}**. Este intervalo representa a estimativa mais confiável para o desempenho médio de chutes a gol do time.
+            """)
+        else:
+            st.warning("Não há dados suficientes para calcular o intervalo de confiança.")
+
+        st.subheader('O que é o Intervalo de Confiança?') 
+        st.markdown("""
+        O **Intervalo de Confiança (IC)** é uma faixa de valores que provavelmente contém o verdadeiro valor da média da população. 
+
+        * **Nível de Confiança:** Representa a chance de que o IC realmente contenha a média real. Um nível de 95% significa que, se você repetir a pesquisa 100 vezes, o IC calculado em 95 delas conterá a média verdadeira. 
+
+        * **Interpretação:** Um intervalo mais estreito indica uma estimativa mais precisa. Um intervalo mais largo indica mais incerteza nos dados.
+
+        * **Bootstrap:** Reamostra os próprios dados milhares de vezes e usa a distribuição das médias obtidas. Não supõe normalidade, o que é útil em contagens com muitos zeros. O método **BCa** ainda corrige o viés e a assimetria dessa distribuição.
+        """)
+        st.markdown('</div>', unsafe_allow_html=True)
+    st.markdown('</div>', unsafe_allow_html=True)
+    st.markdown('---')
+
+section_confidence_interval(filter_key, rate_minutes)
+
+# --- Seção 5: Pergunta 5 --- 
+@st.fragment
+def section_hypothesis_test(key, min_minutes):
+    """
+    Seção 5: teste t de uma amostra ou testes de permutação. Alterar o valor
+    hipotético ou o tipo de teste reexecuta apenas esta seção.
+    """
+    scale_suffix = ' (por 90 min)' if min_minutes else ''
+    st.markdown(f'<div class="section-card">', unsafe_allow_html=True)
+    st.markdown(f'<h2>Seção 5: Testes de Hipótese</h2>', unsafe_allow_html=True)
+    st.markdown('### Pergunta 5: A média de passes precisos do time é estatisticamente diferente de um valor específico?')
+    st.markdown('---')
+    if len(filter_index.posicoes(key)) == 0:
+        st.warning("Não há dados suficientes para realizar o teste de hipótese com os filtros selecionados.")
+        return
+    stats_summary = column_stats(data_version, key, min_minutes)
+    col_test_graph, col_test_text = st.columns([3, 1])
+
+    with col_test_graph:
+        st.subheader('Teste t de uma Amostra') 
+
+        test_cols = list(numeric_columns)
+        if 'year' in test_cols:
+            test_cols.remove('year')
+
+        if not test_cols:
+            st.warning("Não há colunas numéricas adequadas para realizar testes de hipótese.") 
+            return
+
+        if 'statistics_accurate_passes' in test_cols:
+            selected_test_col = 'statistics_accurate_passes'
+        else:
+            selected_test_col = st.selectbox('Selecione a coluna para o teste', test_cols, key='test_select')
+
+        col_test_select, col_test_value = st.columns(2)
+        with col_test_select:
+            st.markdown(f'**Coluna Selecionada:** `{selected_test_col}`')
+        with col_test_value:
+            # Sem nenhum valor na coluna, a média é NaN (ou pd.NA nas colunas inteiras anuláveis)
+            sample_mean = stats_summary.loc[selected_test_col, 'media']
+            hypothesized_value = st.number_input(
+                'Insira o valor hipotético da média da população',
+                value=float(sample_mean) if pd.notna(sample_mean) else 0.0,
+                key='hyp_value'
+            )
+
+        st.markdown('**Configuração do Teste**')
+        alternative_options = {
+            'Duas faces': 'two-sided',
+            'Maior que': 'greater',
+            'Menor que': 'less'
+        }
+        selected_alternative_label = st.selectbox(
+            'Selecione o tipo de teste',
+            list(alternative_options.keys()),
+            key='alternative_selection'
         )
-    else:
-        st.info("Não há dados suficientes para calcular o intervalo de confiança com os filtros selecionados.") 
-
-with col_ic_resp:
-    st.markdown('<div class="text-card">', unsafe_allow_html=True)
-    st.subheader('Resposta da Pergunta 4') 
-    if len(data_to_analyze_ic) > 1:
-        st.success(f"""
-        Com base na amostra de dados e no nível de confiança de **{confidence_level*100:.0f}%** que você selecionou, a média real do número de chutes a gol por jogador na população completa de dados tem uma alta probabilidade de estar entre **{interval[0]:,.2f}** e **{interval[1]:,.2f}**. Este intervalo representa a estimativa mais confiável para o desempenho médio de chutes a gol do time.
+        alternative = alternative_options[selected_alternative_label]
+
+        # Os testes de permutação não supõem normalidade; rodam em vários processos
+        test_method_label = st.radio('Método do teste', list(TEST_METHODS), horizontal=True, key='test_method')
+        test_method = TEST_METHODS[test_method_label]
+        if test_method != 't':
+            max_permutations = st.select_slider('Máximo de permutações', PERMUTATION_LIMITS, value=100000, key='test_permutations')
+
+        test_summary = stats_summary.loc[selected_test_col]
+        p_value = None
+        permutation_running = False
+
+        if test_summary['contagem'] > 1:
+            if test_method == 't':
+                t_statistic, p_value = teste_t_uma_amostra(
+                    test_summary['media'], test_summary['erro_padrao'], test_summary['contagem'],
+                    hypothesized_value, alternative
+                )
+                statistic_label = "Estatística T"
+            else:
+                run = permutation_run(data_version, key, min_minutes, selected_test_col, test_method, hypothesized_value,
+                                      alternative, max_permutations)
+                permutation = run.resultado() if run is not None and run.avancar() else None
+                if run is not None and permutation is None:
+                    permutation_running = True
+                    permutation_progress(run)
+                if permutation is not None:
+                    t_statistic, p_value = permutation['estatistica'], permutation['valor_p']
+                    statistic_label = "Desvio da Média" if test_method == 'sinais' else "Diferença (Casa - Fora)"
+
+        if p_value is not None:
+            st.subheader(f'Resultados: {test_method_label}')
+            col_t_stat, col_p_value = st.columns(2)
+            with col_t_stat:
+                st.metric(label=statistic_label, value=f"{t_statistic:,.4f}")
+            with col_p_value:
+                st.metric(label="Valor-P", value=f"{p_value:,.4f}")
+            if test_method != 't':
+                band_low, band_high = permutation['faixa_valor_p']
+                st.caption(
+                    f"{permutation['permutacoes']:,} permutações "
+                    f"({'exato' if permutation['exato'] else 'Monte Carlo'}"
+                    f"{', parada antecipada' if permutation['parou_cedo'] else ''}) · "
+                    f"faixa do valor-p: {band_low:,.4f} a {band_high:,.4f}"
+                )
+
+            st.subheader('Visualização do Teste')
+            test_counts, test_edges = column_histogram(data_version, key, min_minutes, selected_test_col)
+            fig_test = figura_histograma(test_counts, test_edges,
+                                         titulo=f'Distribuição de {selected_test_col}{scale_suffix}',
+                                         rotulo_x=f'{selected_test_col}{scale_suffix}')
+            fig_test.add_vline(x=test_summary['media'], line_dash="dash", line_color="blue",
+                               annotation_text=f"Média da Amostra: {test_summary['media']:,.2f}",
+                               annotation_position="top left")
+            fig_test.add_vline(x=hypothesized_value, line_dash="dash", line_color="red",
+                               annotation_text=f"Valor Hipotético: {hypothesized_value:,.2f}",
+                               annotation_position="top right")
+            st.plotly_chart(fig_test, use_container_width=True)
+
+        elif test_method == 'casa_fora' and test_summary['contagem'] > 1 and not permutation_running:
+            st.info("O teste casa x fora precisa de jogos nos dois locais. Selecione 'Todos' no filtro de local do jogo.")
+        elif not permutation_running:
+            st.info("Dados insuficientes para realizar o teste de hipótese. Por favor, ajuste os filtros ou selecione outra coluna.")
+
+    with col_test_text:
+        st.markdown('<div class="text-card">', unsafe_allow_html=True)
+        st.subheader('Resposta da Pergunta 5')
+        if p_value is not None and test_method == 'casa_fora':
+            if p_value < 0.05:
+                st.success(f"O P-valor de `{p_value:,.4f}` é menor que o nível de significância de 0.05. A diferença entre as médias de `{selected_test_col}` nos jogos em casa e fora **é estatisticamente significativa**.")
+            else:
+                st.warning(f"O P-valor de `{p_value:,.4f}` é maior ou igual ao nível de significância de 0.05. Não há evidências suficientes de diferença entre as médias de `{selected_test_col}` nos jogos em casa e fora.")
+        elif p_value is not None:
+            # CORREÇÃO AQUI: Verificando o valor-p corretamente
+            if p_value < 0.05:
+                st.success(f"O P-valor de `{p_value:,.4f}` é menor que o nível de significância de 0.05. Isso significa que a diferença entre a média de passes da amostra e o valor hipotético de `{hypothesized_value:,.2f}` **é estatisticamente significativa**. Portanto, temos evidências para rejeitar a hipótese nula e concluir que a média real da população é, de fato, diferente do valor hipotético.")
+            else:
+                st.warning(f"O P-valor de `{p_value:,.4f}` é maior ou igual ao nível de significância de 0.05. Não há evidências estatísticas suficientes para afirmar que a média de passes do time é diferente do valor hipotético de `{hypothesized_value:,.2f}`. Neste caso, não podemos rejeitar a hipótese nula.")
+        elif permutation_running:
+            st.info("O resultado aparece aqui assim que o teste de permutação terminar.")
+        else:
+            st.warning("Não foi possível realizar o teste devido à falta de dados.")
+
+        st.subheader('Explicação do Teste t')
+        st.markdown("""
+        Este teste compara a **média da sua amostra** com um **valor hipotético** que você definiu.
+
+        * **Hipótese Nula ($H_0$):** A média da amostra é igual ao valor hipotético.
+        * **Hipótese Alternativa ($H_a$):** A média da amostra é diferente (ou maior/menor) do valor hipotético.
+
+        * **T-Statistic:** Uma medida de quão distante a média da sua amostra está do valor hipotético.
+        * **P-valor:** A probabilidade de você obter a sua amostra (ou uma mais extrema) se a hipótese nula for verdadeira.
+
+        * **Testes de permutação:** Em vez de supor uma distribuição, embaralham os dados (invertendo sinais ou trocando os rótulos casa/fora) milhares de vezes e medem com que frequência surge um resultado tão extremo quanto o observado.
         """)
-    else:
-        st.warning("Não há dados suficientes para calcular o intervalo de confiança.")
+        st.markdown('</div>', unsafe_allow_html=True)
 
-    st.subheader('O que é o Intervalo de Confiança?') 
-    st.markdown("""
-    O **Intervalo de Confiança (IC)** é uma faixa de valores que provavelmente contém o verdadeiro valor da média da população. 
-    
-    * **Nível de Confiança:** Representa a chance de que o IC realmente contenha a média real. Um nível de 95% significa que, se você repetir a pesquisa 100 vezes, o IC calculado em 95 delas conterá a média verdadeira. 
-    
-    * **Interpretação:** Um intervalo mais estreito indica uma estimativa mais precisa. Um intervalo mais largo indica mais incerteza nos dados.
-    """)
+    # Teste em lote: todas as colunas statistics_* em uma única chamada vetorizada
+    st.subheader('Todas as Colunas de uma Vez')
+    if st.toggle('Testar todas as colunas `statistics_*`', key='batch_tests'):
+        batch_mode_label = st.radio('Comparação', list(BATCH_TEST_MODES), horizontal=True, key='batch_mode')
+        batch_results = batch_tests(data_version, key, min_minutes, BATCH_TEST_MODES[batch_mode_label], alternative)
+        if batch_results is None:
+            st.info("A comparação casa x fora precisa de jogos nos dois locais. Selecione 'Todos' no filtro de local do jogo.")
+        else:
+            significant = int((batch_results['valor_p_ajustado'] < 0.05).sum())
+            st.dataframe(batch_results.sort_values('valor_p_ajustado'), use_container_width=True)
+            st.caption(
+                f'{significant} de {len(batch_results)} colunas significativas a 5% após a correção de '
+                'Benjamini-Hochberg, que controla a taxa de falsas descobertas entre os vários testes.'
+            )
     st.markdown('</div>', unsafe_allow_html=True)
-st.markdown('</div>', unsafe_allow_html=True)
-st.markdown('---')
+    st.markdown('---')
 
-# --- Seção 5: Pergunta 5 --- 
-st.markdown(f'<div class="section-card">', unsafe_allow_html=True)
-st.markdown(f'<h2>Seção 5: Testes de Hipótese</h2>', unsafe_allow_html=True)
-st.markdown('### Pergunta 5: A média de passes precisos do time é estatisticamente diferente de um valor específico?')
-st.markdown('---')
-col_test_graph, col_test_text = st.columns([3, 1])
+section_hypothesis_test(filter_key, rate_minutes)
 
-with col_test_graph:
-    st.subheader('Teste t de uma Amostra') 
-    
-    test_cols = df_filtered.select_dtypes(include=['number']).columns.tolist()
-    if 'year' in test_cols:
-        test_cols.remove('year')
+# --- Jogadores Semelhantes ---
+@st.fragment
+def section_similar_players(key):
+    """
+    Busca dos jogadores de perfil mais parecido com o escolhido, entre os
+    jogadores do filtro. Trocar o jogador reexecuta apenas esta seção.
+    """
+    st.markdown(f'<div class="section-card">', unsafe_allow_html=True)
+    st.markdown('<h2>Jogadores Semelhantes</h2>', unsafe_allow_html=True)
+    st.markdown(
+        'Compara o perfil de cada jogador (passes, duelos, finalizações, xG, xA e ações defensivas por 90 minutos) '
+        f'entre os jogadores com pelo menos {MINUTOS_MINIMOS_PERFIL} minutos nos filtros selecionados.'
+    )
+    if COLUNA_MINUTOS not in numeric_columns or 'player_name' not in match_data or not colunas_perfil(numeric_columns):
+        st.info("As colunas de minutos, jogador e estatísticas necessárias não foram encontradas.")
+        return
 
-    if not test_cols:
-        st.warning("Não há colunas numéricas adequadas para realizar testes de hipótese.") 
-        st.stop()
-        
-    if 'statistics_accurate_passes' in test_cols:
-        selected_test_col = 'statistics_accurate_passes'
-    else:
-        selected_test_col = st.selectbox('Selecione a coluna para o teste', test_cols, key='test_select')
-    
-    col_test_select, col_test_value = st.columns(2)
-    with col_test_select:
-        st.markdown(f'**Coluna Selecionada:** `{selected_test_col}`')
-    with col_test_value:
-        hypothesized_value = st.number_input(
-            'Insira o valor hipotético da média da população',
-            value=float(df_filtered[selected_test_col].mean()),
-            key='hyp_value'
+    index = similarity_index(data_version, key)
+    if len(index) < 2:
+        st.info("Não há jogadores suficientes com os filtros selecionados.")
+        return
+
+    col_player, col_k = st.columns([3, 1])
+    with col_player:
+        player = st.selectbox('Selecione o jogador', index.jogadores(), key='similar_player')
+    with col_k:
+        n_similar = st.slider('Quantidade', min_value=1, max_value=min(20, len(index) - 1),
+                              value=min(5, len(index) - 1), key='similar_count')
+
+    similar = index.semelhantes(player, n_similar)
+    fig_similar = px.bar(similar.reset_index(), x='semelhanca', y='player_name', orientation='h',
+                         title=f'Jogadores mais parecidos com {player}',
+                         labels={'semelhanca': 'Semelhança (cosseno)', 'player_name': 'Jogador'},
+                         range_x=[-1, 1])
+    fig_similar.update_yaxes(autorange='reversed')
+    st.plotly_chart(fig_similar, use_container_width=True)
+    # O jogador escolhido na primeira linha, como referência para as taxas dos demais
+    reference = index.perfis.loc[[player]]
+    reference.insert(0, 'semelhanca', 1.0)
+    st.dataframe(pd.concat([reference, similar]).round(2), use_container_width=True)
+    st.markdown('</div>', unsafe_allow_html=True)
+    st.markdown('---')
+
+section_similar_players(filter_key)
+
+# --- Percentis dos Jogadores ---
+@st.fragment
+def section_percentiles(key, min_minutes):
+    """
+    Percentil e posto de um jogador em cada estatística, lidos da tabela de
+    percentis do filtro, e o radar das estatísticas escolhidas.
+    """
+    st.markdown(f'<div class="section-card">', unsafe_allow_html=True)
+    st.markdown('<h2>Percentis dos Jogadores</h2>', unsafe_allow_html=True)
+    if COLUNA_MINUTOS not in numeric_columns or 'player_name' not in match_data:
+        st.info("As colunas de minutos e de jogador não foram encontradas.")
+        return
+
+    by_position = st.toggle('Comparar só com jogadores da mesma posição', value=False, key='percentile_by_position',
+                            disabled='player_position' not in match_data)
+    table = player_percentiles(data_version, key, min_minutes, by_position)
+    if len(table.jogadores()) < 2:
+        st.info("Não há jogadores suficientes com os filtros selecionados.")
+        return
+    scope = (f'Taxas por 90 minutos dos jogos com pelo menos {min_minutes} minutos (mínimo da barra lateral), '
+             f'entre os jogadores com pelo menos {MINUTOS_MINIMOS_PERFIL} minutos somados nesses jogos,'
+             if min_minutes else 'Totais')
+    st.markdown(
+        f'{scope} nos filtros selecionados (a nota pela média). Percentil 100 é sempre o melhor: nas estatísticas '
+        'em que menos é melhor (perdas de posse, faltas, erros) a ordem é invertida.'
+    )
+
+    col_player, col_columns = st.columns([1, 2])
+    with col_player:
+        player = st.selectbox('Selecione o jogador', table.jogadores(), key='percentile_player')
+    with col_columns:
+        available = list(table.valores.columns)
+        radar_columns = st.multiselect(
+            'Estatísticas do radar', available, key='percentile_radar_columns',
+            default=[col for col in RADAR_DEFAULT_COLUMNS if col in available] or available[:8]
         )
 
-    st.markdown('**Configuração do Teste**')
-    alternative_options = {
-        'Duas faces': 'two-sided',
-        'Maior que': 'greater',
-        'Menor que': 'less'
-    }
-    selected_alternative_label = st.selectbox(
-        'Selecione o tipo de teste',
-        list(alternative_options.keys()),
-        key='alternative_selection'
+    profile = table.jogador(player)
+    if by_position and table.posicoes is not None:
+        st.caption(f"Comparado com: {POSITION_LABELS.get(table.posicoes[player], table.posicoes[player])}")
+    if radar_columns:
+        radar = profile.loc[radar_columns, 'percentil'].fillna(0)
+        labels = [col.removeprefix('statistics_') for col in radar_columns]
+        fig_radar = go.Figure(go.Scatterpolar(
+            r=list(radar) + [radar.iloc[0]], theta=labels + [labels[0]], fill='toself', name=player,
+            customdata=list(profile.loc[radar_columns, 'valor']) + [profile.loc[radar_columns[0], 'valor']],
+            hovertemplate='%{theta}: percentil %{r:.0f} (valor %{customdata:.2f})<extra></extra>'
+        ))
+        fig_radar.update_layout(polar=dict(radialaxis=dict(range=[0, 100])), showlegend=False,
+                                title=f'Percentis de {player}', template='plotly_dark', height=550)
+        st.plotly_chart(fig_radar, use_container_width=True)
+    st.dataframe(profile.sort_values('percentil', ascending=False, na_position='last').round(2),
+                 use_container_width=True)
+    st.markdown('</div>', unsafe_allow_html=True)
+    st.markdown('---')
+
+section_percentiles(filter_key, rate_minutes)
+
+# --- Forma Recente ---
+@st.fragment
+def section_player_form():
+    """
+    Médias móveis das últimas partidas de um jogador, lidas das somas
+    acumuladas dele, sem percorrer as linhas dos demais.
+    """
+    st.markdown(f'<div class="section-card">', unsafe_allow_html=True)
+    st.markdown('<h2>Forma Recente</h2>', unsafe_allow_html=True)
+    form = derived_data['player_form']
+    if form is None or not form.jogadores():
+        st.info("As colunas de jogador, ano, jogo e minutos jogados não foram encontradas.")
+        return
+    st.markdown('Média de cada estatística nas últimas partidas em que o jogador atuou, em todas as partidas carregadas.')
+
+    col_player, col_window = st.columns([3, 1])
+    with col_player:
+        player = st.selectbox('Selecione o jogador', form.jogadores(), key='form_player')
+    with col_window:
+        window = st.slider('Últimas partidas', min_value=2, max_value=15, value=JANELA_PADRAO, key='form_window')
+
+    rolling = form.forma(player, window)
+    rolling.index = [f'{year}·{game}' for year, game in rolling.index]
+    long_form = rolling.rename_axis('partida').reset_index().melt(
+        id_vars='partida', var_name='estatistica', value_name='media'
     )
-    alternative = alternative_options[selected_alternative_label]
-
-    data_for_test = df_filtered[selected_test_col].dropna()
-
-    if len(data_for_test) > 1:
-        t_statistic, p_value = stats.ttest_1samp(data_for_test, popmean=hypothesized_value, alternative=alternative)
-
-        st.subheader('Resultados do Teste t')
-        col_t_stat, col_p_value = st.columns(2)
-        with col_t_stat:
-            st.metric(label="Estatística T", value=f"{t_statistic:,.4f}")
-        with col_p_value:
-            st.metric(label="Valor-P", value=f"{p_value:,.4f}")
-
-        st.subheader('Visualização do Teste')
-        fig_test = px.histogram(data_for_test, x=selected_test_col, nbins=20,
-                                 title=f'Distribuição de {selected_test_col}', 
-                                 template='plotly_dark')
-        fig_test.add_vline(x=data_for_test.mean(), line_dash="dash", line_color="blue",
-                           annotation_text=f"Média da Amostra: {data_for_test.mean():,.2f}",
-                           annotation_position="top left")
-        fig_test.add_vline(x=hypothesized_value, line_dash="dash", line_color="red",
-                           annotation_text=f"Valor Hipotético: {hypothesized_value:,.2f}",
-                           annotation_position="top right")
-        st.plotly_chart(fig_test, use_container_width=True)
+    fig_form = px.line(long_form, x='partida', y='media', facet_row='estatistica', markers=True,
+                       title=f'Forma de {player} (média das últimas {window} partidas)',
+                       labels={'partida': 'Ano · jogo', 'media': 'Média'},
+                       height=220 * len(form.colunas), template='plotly_dark')
+    fig_form.update_yaxes(matches=None, title_text='')
+    fig_form.for_each_annotation(lambda annotation: annotation.update(text=annotation.text.split('=')[-1]))
+    st.plotly_chart(fig_form, use_container_width=True)
+    st.caption(f'{form.atuacoes(player)} partidas com minutos jogados.')
+    st.markdown('</div>', unsafe_allow_html=True)
+    st.markdown('---')
 
-    else:
-        st.info("Dados insuficientes para realizar o teste de hipótese. Por favor, ajuste os filtros ou selecione outra coluna.")
-
-with col_test_text:
-    st.markdown('<div class="text-card">', unsafe_allow_html=True)
-    st.subheader('Resposta da Pergunta 5')
-    if len(data_for_test) > 1:
-        # CORREÇÃO AQUI: Verificando o valor-p corretamente
-        if p_value < 0.05:
-            st.success(f"O P-valor de `{p_value:,.4f}` é menor que o nível de significância de 0.05. Isso significa que a diferença entre a média de passes da amostra e o valor hipotético de `{hypothesized_value:,.2f}` **é estatisticamente significativa**. Portanto, temos evidências para rejeitar a hipótese nula e concluir que a média real da população é, de fato, diferente do valor hipotético.")
-        else:
-            st.warning(f"O P-valor de `{p_value:,.4f}` é maior ou igual ao nível de significância de 0.05. Não há evidências estatísticas suficientes para afirmar que a média de passes do time é diferente do valor hipotético de `{hypothesized_value:,.2f}`. Neste caso, não podemos rejeitar a hipótese nula.")
-    else:
-        st.warning("Não foi possível realizar o teste devido à falta de dados.")
+section_player_form()
 
-    st.subheader('Explicação do Teste t')
-    st.markdown("""
-    Este teste compara a **média da sua amostra** com um **valor hipotético** que você definiu.
-    
-    * **Hipótese Nula ($H_0$):** A média da amostra é igual ao valor hipotético.
-    * **Hipótese Alternativa ($H_a$):** A média da amostra é diferente (ou maior/menor) do valor hipotético.
-    
-    * **T-Statistic:** Uma medida de quão distante a média da sua amostra está do valor hipotético.
-    * **P-valor:** A probabilidade de você obter a sua amostra (ou uma mais extrema) se a hipótese nula for verdadeira.
-    """)
+# --- Correlações ---
+@st.fragment
+def section_correlations(key, min_minutes):
+    """
+    Mapa de calor das correlações entre as colunas statistics_* e as colunas
+    mais correlacionadas com uma escolhida, lidos da mesma matriz memorizada.
+    """
+    st.markdown(f'<div class="section-card">', unsafe_allow_html=True)
+    st.markdown('<h2>Correlações entre Estatísticas</h2>', unsafe_allow_html=True)
+    if len(statistics_columns) < 2:
+        st.info("Não há colunas statistics_* suficientes para calcular correlações.")
+        return
+
+    method_label = st.radio('Método', list(CORRELATION_METHODS), horizontal=True, key='correlation_method')
+    correlation, pairs = correlation_matrix(data_version, key, min_minutes, CORRELATION_METHODS[method_label])
+    # Colunas sem nenhuma correlação calculável no filtro só ocupariam espaço no mapa
+    shown = correlation.columns[correlation.notna().sum() > 1]
+    if shown.empty:
+        st.info(f"Nenhum par de colunas tem pelo menos {CORRELATION_MIN_PAIRS} linhas com valor nos filtros selecionados.")
+        return
+
+    col_heatmap, col_lookup = st.columns([3, 2])
+    with col_heatmap:
+        fig_corr = px.imshow(correlation.loc[shown, shown], zmin=-1, zmax=1, color_continuous_scale='RdBu_r',
+                             title=f"Correlação de {method_label}{' (por 90 min)' if min_minutes else ''}",
+                             aspect='auto', height=700, template='plotly_dark')
+        fig_corr.update_xaxes(showticklabels=False)
+        st.plotly_chart(fig_corr, use_container_width=True)
+        st.caption(f'Cada par usa só as linhas em que as duas colunas têm valor (no mínimo {CORRELATION_MIN_PAIRS}).')
+    with col_lookup:
+        target = st.selectbox('Mais correlacionadas com', list(shown), key='correlation_target')
+        n_top = st.slider('Quantidade', min_value=3, max_value=20, value=10, key='correlation_top')
+        related = pd.DataFrame({'correlacao': correlation[target], 'linhas': pairs[target]}).drop(index=target).dropna()
+        related = maiores(related.assign(forca=related['correlacao'].abs()), 'forca', n_top)
+        st.dataframe(related[['correlacao', 'linhas']].round(3), use_container_width=True)
     st.markdown('</div>', unsafe_allow_html=True)
-st.markdown('</div>', unsafe_allow_html=True)
-st.markdown('---')
+    st.markdown('---')
+
+section_correlations(filter_key, rate_minutes)
+
+# --- Modelo da Nota ---
+@st.fragment
+def section_rating_model(key):
+    """
+    O que explica a nota dos jogadores: pesos das estatísticas no modelo de
+    cada posição e jogadores com notas acima ou abaixo do previsto.
+    """
+    st.markdown(f'<div class="section-card">', unsafe_allow_html=True)
+    st.markdown('<h2>Modelo da Nota</h2>', unsafe_allow_html=True)
+    if COLUNA_ALVO not in numeric_columns or 'player_position' not in match_data \
+            or not colunas_explicativas(numeric_columns):
+        st.info("As colunas 'statistics_rating', 'player_position' e statistics_* não foram encontradas.")
+        return
+
+    model, from_disk = rating_model(data_version)
+    fitted = [group for group, coefficients in zip(model.grupos, model.coeficientes) if not np.isnan(coefficients).all()]
+    if not fitted:
+        st.info("Nenhuma posição tem jogos com nota suficientes para o modelo.")
+        return
+
+    col_importance, col_residuals = st.columns([3, 2])
+    with col_importance:
+        group = st.selectbox('Posição', fitted, format_func=lambda position: POSITION_LABELS.get(position, position),
+                             key='rating_position')
+        g = model.grupos.index(group)
+        st.metric(label='R² do modelo', value=f'{model.r2[g]:.2f}', help=f'{int(model.linhas[g]):,} jogos com nota')
+        importance = model.importancia()[group].rename('peso').to_frame()
+        importance = maiores(importance.assign(forca=importance['peso'].abs()), 'forca', 15).reset_index()
+        fig_importance = px.bar(importance, x='peso', y='coluna', orientation='h', color=importance['peso'] > 0,
+                                color_discrete_map={True: 'green', False: 'red'},
+                                title=f'Peso de cada estatística na nota ({POSITION_LABELS.get(group, group)})',
+                                labels={'peso': 'Variação da nota por desvio padrão', 'coluna': ''},
+                                template='plotly_dark')
+        fig_importance.update_layout(showlegend=False)
+        fig_importance.update_yaxes(autorange='reversed')
+        st.plotly_chart(fig_importance, use_container_width=True)
+        st.caption(
+            f"Ridge (penalidade {model.penalidade:g}) sobre as estatísticas padronizadas de cada posição · "
+            f"{'coeficientes lidos do disco' if from_disk else 'coeficientes ajustados e gravados agora'}"
+        )
+    with col_residuals:
+        st.subheader('Nota x Previsto')
+        residuals = rating_residuals(data_version, key)
+        residuals = residuals[residuals['jogos'] >= 3].sort_values('residuo_medio', ascending=False)
+        st.dataframe(residuals.round(2), use_container_width=True)
+        st.caption('Resíduo positivo: o jogador recebe notas acima do que as estatísticas dele explicam (mínimo de 3 jogos).')
+    st.markdown('</div>', unsafe_allow_html=True)
+    st.markdown('---')
+
+section_rating_model(filter_key)
+
+# --- Eficiência de Finalização ---
+@st.fragment
+def section_finishing(key):
+    """
+    Gols e assistências acima ou abaixo do esperado (xG e xA), com a
+    significância de cada diferença. Trocar o agrupamento reexecuta apenas esta seção.
+    """
+    st.markdown(f'<div class="section-card">', unsafe_allow_html=True)
+    st.markdown('<h2>Eficiência de Finalização</h2>', unsafe_allow_html=True)
+    if not colunas_finalizacao(numeric_columns):
+        st.info("As colunas 'statistics_goals' e 'statistics_expected_goals' não foram encontradas.")
+        return
+
+    levels = {label: level for label, level in FINISHING_LEVELS.items()
+              if level == 'jogador' and 'player_name' in match_data
+              or level == 'partida' and derived_data['match_table'] is not None}
+    if not levels:
+        st.info("Não há jogadores nem partidas identificados nos dados.")
+        return
+    level_label = st.radio('Agrupamento', list(levels), horizontal=True, key='finishing_level')
+    results = finishing_efficiency(data_version, key, levels[level_label])
+    if results.empty:
+        st.info("Nenhuma partida com xG medido e finalizações foi encontrada com os filtros selecionados.")
+        return
+
+    # Classificação pelo valor-p ajustado: fora do esperado só quando significativo a 5%
+    significant = results['valor_p_gols_ajustado'] < 0.05
+    results = results.assign(desempenho=np.select(
+        [significant & (results['gols_menos_xg'] > 0), significant & (results['gols_menos_xg'] < 0)],
+        ['Acima do esperado', 'Abaixo do esperado'], default='Dentro do esperado'
+    ))
+
+    col_chart, col_text = st.columns([3, 1])
+    with col_chart:
+        axis_max = float(np.nanmax(results[['xg', 'gols']].to_numpy())) * 1.05 or 1.0
+        fig_finishing = px.scatter(
+            results.reset_index(), x='xg', y='gols', color='desempenho', hover_name=results.index.name,
+            hover_data={'assistencias': True, 'xa': ':.2f', 'conversao': ':.1%', 'valor_p_gols': ':.4f'},
+            title='Gols x Gols Esperados (xG)', labels={'xg': 'xG', 'gols': 'Gols', 'desempenho': ''},
+            color_discrete_map={'Acima do esperado': 'green', 'Abaixo do esperado': 'red', 'Dentro do esperado': 'gray'},
+            template='plotly_dark'
+        )
+        fig_finishing.add_shape(type='line', x0=0, y0=0, x1=axis_max, y1=axis_max, line=dict(dash='dash', color='white'))
+        st.plotly_chart(fig_finishing, use_container_width=True)
+    with col_text:
+        st.markdown('<div class="text-card">', unsafe_allow_html=True)
+        st.markdown(f"""
+        Acima da linha tracejada, marcou-se mais gols do que o xG previa. A diferença é testada supondo que os gols
+        seguem uma distribuição de Poisson com média igual ao xG; os valores-p são ajustados por Benjamini-Hochberg.
+        Só entram as partidas em que o xG foi medido.
+
+        * **Acima do esperado:** `{int((results['desempenho'] == 'Acima do esperado').sum())}`
+        * **Abaixo do esperado:** `{int((results['desempenho'] == 'Abaixo do esperado').sum())}`
+        * **Gols - xG no total:** `{results['gols_menos_xg'].sum():+,.2f}`
+        """)
+        st.markdown('</div>', unsafe_allow_html=True)
+
+    sort_column = st.selectbox('Ordenar por', ['gols_menos_xg', 'assistencias_menos_xa', 'conversao',
+                                               'valor_p_gols', 'valor_p_assistencias', 'gols', 'xg'],
+                               key='finishing_sort')
+    st.dataframe(results.sort_values(sort_column, ascending=sort_column.startswith('valor_p'), na_position='last'),
+                 use_container_width=True)
+    st.markdown('</div>', unsafe_allow_html=True)
+    st.markdown('---')
+
+section_finishing(filter_key)
+
+@st.cache_data(show_spinner=False, max_entries=50)
+def ad_hoc_query(version, sql):
+    """
+    Resultado de uma consulta livre, memorizado pela versão dos dados e pelo texto.
+    """
+    return derived_data['sql_engine'].consulta_livre(sql)
+
+# --- Consulta Livre (SQL) ---
+@st.fragment
+def section_sql_query():
+    """
+    Painel de consultas SQL para analistas, executadas pelo motor embutido
+    sobre os dados carregados (sem servidor e sem acesso a outros arquivos).
+    """
+    st.markdown(f'<div class="section-card">', unsafe_allow_html=True)
+    st.markdown('<h2>Consulta Livre (SQL)</h2>', unsafe_allow_html=True)
+    st.markdown(
+        f'Escreva uma consulta `SELECT` sobre a tabela `{TABELA}`, que reúne todas as linhas carregadas '
+        '(os filtros da barra lateral não se aplicam aqui).'
+    )
+    with st.expander('Colunas disponíveis'):
+        st.write(', '.join(f'`{col}`' for col in derived_data['sql_engine'].colunas))
+
+    query = st.text_area(
+        'Consulta',
+        value=(
+            f'SELECT tournament, player_name, SUM(statistics_goals) AS gols\n'
+            f'FROM {TABELA}\n'
+            'GROUP BY tournament, player_name\n'
+            'ORDER BY gols DESC NULLS LAST\n'
+            'LIMIT 20'
+        ),
+        height=160,
+        key='sql_query'
+    )
+    if st.button('Executar consulta', key='sql_run'):
+        try:
+            result, truncated = ad_hoc_query(data_version, query)
+        except Exception as e:
+            st.error(f"Erro na consulta. Detalhes: {e}")
+        else:
+            st.dataframe(result, use_container_width=True)
+            if truncated:
+                st.caption(f'Mostrando as primeiras {LIMITE_LINHAS:,} linhas do resultado.')
+    st.markdown('</div>', unsafe_allow_html=True)
+    st.markdown('---')
+
+section_sql_query()
+
+# Relatório da carga: origem, tempo e memória comparados com a leitura direta do CSV
+with load_report_box:
+    st.markdown(f"**Origem:** `{load_report['origem']}`")
+    st.markdown(f"**Tempo de carga:** `{load_report['tempo_s'] * 1000:,.1f} ms`")
+    st.markdown(f"**Memória:** `{match_data.memoria_mb():,.2f} MB`")
+    if match_data.esparsas():
+        st.markdown(
+            f"**Sem a forma esparsa:** `{match_data.memoria_densa_mb():,.2f} MB` "
+            f"(`{len(match_data.esparsas())}` colunas quase vazias guardadas só com os valores preenchidos)"
+        )
+    st.markdown(f"**Colunas em memória:** `{len(match_data.colunas_carregadas())}` de `{len(match_data.colunas)}`")
+    if load_report['tempo_csv_s'] is not None:
+        st.markdown(f"**CSV (referência):** `{load_report['tempo_csv_s'] * 1000:,.1f} ms` e `{load_report['memoria_csv_mb']:,.2f} MB`")
+    if 'linhas_anexadas' in load_report:
+        st.markdown(f"**Linhas anexadas:** `{load_report['linhas_anexadas']}` (sem reler o CSV inteiro)")
+    if len(partitions) > 1:
+        st.markdown(f"**Arquivos carregados:** `{len(selected_partitions)}` de `{len(partitions)}` partições")
+    if derived_data['match_table'] is not None:
+        match_table = derived_data['match_table']
+        st.markdown(
+            f"**Partidas:** `{len(match_table)}` em `{match_table.memoria_mb():,.2f} MB` "
+            f"(`{match_table.memoria_por_linha_mb:,.2f} MB` repetidas em cada linha de jogador)"
+        )
+    last_matches = [match for match in load_report['ultimas_partidas'].values() if match is not None]
+    if last_matches:
+        last_year, last_game = max(last_matches)
+        st.markdown(f"**Última partida:** `{last_year}`, jogo `{last_game}`")
+    loaded_at = pd.Timestamp(load_report['carregado_em'], unit='s', tz='UTC').tz_convert('America/Sao_Paulo')
+    st.markdown(f"**Versão dos dados:** `{data_version}` (carregada em `{loaded_at:%d/%m/%Y %H:%M:%S}`)")
+
+startup.marcar('fim')
@@ -1,7 +1,13 @@
+# Medição da inicialização (ligada pela variável PERFIL_INICIALIZACAO), iniciada antes das demais importações
+from analise.importacao import MedicaoPagina
+startup = MedicaoPagina('projetos')
+
 # Importa a biblioteca Streamlit
 import streamlit as st
 import os
 
+startup.marcar('importacoes')
+
 # --- Configurações da Página e Tema Personalizado ---
 # Configura o layout da página para ser mais amplo
 st.set_page_config(layout="wide", page_title="Meus Desafios")
@@ -167,3 +173,5 @@ for projeto in projetos:
             
         st.markdown('</div>', unsafe_allow_html=True)
         st.markdown("---")
+
+startup.marcar('primeira_pintura')